@@ -0,0 +1,195 @@
+"""
+Decode audio straight into NumPy through an ffmpeg pipe.
+
+yt-dlp only resolves the media URL of the best audio format; ffmpeg fetches
+it and writes mono float32 PCM at the analysis rate to stdout, which is read
+incrementally while the download is still running. Nothing is written to
+disk and the audio is resampled exactly once, by ffmpeg.
+
+resolve_audio_source blocks on the network and belongs on an I/O thread;
+decode_audio and decode_blocks are coroutines driving the ffmpeg subprocess
+from the event loop.
+"""
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
+import yt_dlp
+
+from pipeline import ANALYSIS_SAMPLE_RATE
+
+FFMPEG_BINARY = os.getenv('PITCH_FFMPEG', 'ffmpeg')
+# ffmpeg's f32le output, read without conversion
+PCM_DTYPE = np.dtype('<f4')
+READ_CHUNK_BYTES = 1 << 16
+# Buffer preallocated when the source does not advertise its duration
+DEFAULT_BUFFER_SECONDS = 300
+# Advertised durations are rounded, so leave some room before growing
+BUFFER_HEADROOM = 1.05
+# Last bytes of ffmpeg's stderr kept for the error message
+STDERR_TAIL_BYTES = 8192
+
+
+class AudioDecodeError(RuntimeError):
+    """ffmpeg could not decode the source (bad data or unreachable URL)."""
+
+
+class AudioSource:
+    """
+    Something ffmpeg can read: a media URL or a local path.
+
+    Args:
+        location: URL or file path passed to ffmpeg -i
+        http_headers: Headers ffmpeg must send when fetching location
+        duration: Advertised duration in seconds, used to size the buffer
+    """
+
+    __slots__ = ('location', 'http_headers', 'duration')
+
+    def __init__(
+        self,
+        location: str,
+        http_headers: Optional[Dict[str, str]] = None,
+        duration: Optional[float] = None,
+    ):
+        self.location = location
+        self.http_headers = http_headers or {}
+        self.duration = duration
+
+
+def resolve_audio_source(url: str) -> AudioSource:
+    """
+    Look up the best audio stream of a YouTube video without downloading it.
+
+    Args:
+        url: YouTube URL
+
+    Returns:
+        AudioSource pointing at the media URL
+
+    Raises:
+        RuntimeError: If yt-dlp found no audio stream
+    """
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True,
+    }
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    if not info or not info.get('url'):
+        raise RuntimeError("Failed to extract audio from YouTube")
+
+    return AudioSource(info['url'], info.get('http_headers'), info.get('duration'))
+
+
+def ffmpeg_command(source: AudioSource, sr: int = ANALYSIS_SAMPLE_RATE) -> List[str]:
+    """ffmpeg arguments that decode source to mono float32 PCM on stdout."""
+    command = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error']
+    if source.location.startswith(('http://', 'https://')):
+        if source.http_headers:
+            headers = ''.join(f'{name}: {value}\r\n' for name, value in source.http_headers.items())
+            command += ['-headers', headers]
+        command += ['-reconnect', '1', '-reconnect_streamed', '1']
+    command += [
+        '-i', source.location,
+        '-vn', '-ac', '1', '-ar', str(sr),
+        '-f', 'f32le', '-acodec', 'pcm_f32le',
+        'pipe:1',
+    ]
+    return command
+
+
+async def _stderr_tail(stream: asyncio.StreamReader, limit: int = STDERR_TAIL_BYTES) -> bytes:
+    """Read stream to EOF, keeping only its last limit bytes."""
+    tail = b''
+    while True:
+        chunk = await stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return tail
+        tail = (tail + chunk)[-limit:]
+
+
+async def _pcm_chunks(source: AudioSource, sr: int) -> AsyncIterator[bytes]:
+    """Run ffmpeg and yield its stdout as it arrives."""
+    process = await asyncio.create_subprocess_exec(
+        *ffmpeg_command(source, sr),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # Drained concurrently: a full stderr pipe would block ffmpeg before stdout ends
+    stderr = asyncio.create_task(_stderr_tail(process.stderr))
+    try:
+        while True:
+            chunk = await process.stdout.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+        errors = await stderr
+        if await process.wait() != 0:
+            message = errors.decode(errors='replace').strip() or f"exit status {process.returncode}"
+            raise AudioDecodeError(f"ffmpeg failed to decode audio: {message}")
+    finally:
+        # Consumer stopped early or failed: don't leave ffmpeg downloading
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr.cancel()
+
+
+async def decode_audio(source: AudioSource, sr: int = ANALYSIS_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode a whole source into a mono float32 array.
+
+    Samples are copied from the pipe into a buffer preallocated from the
+    advertised duration, which only grows (by doubling) if that was short.
+    """
+    seconds = source.duration or DEFAULT_BUFFER_SECONDS
+    buffer = np.empty(int(seconds * BUFFER_HEADROOM * sr) + 1, dtype=PCM_DTYPE)
+    filled = 0
+
+    async for chunk in _pcm_chunks(source, sr):
+        end = filled + len(chunk)
+        if end > buffer.nbytes:
+            grown = np.empty(max(2 * len(buffer), end // PCM_DTYPE.itemsize + 1), dtype=PCM_DTYPE)
+            grown.view(np.uint8)[:filled] = buffer.view(np.uint8)[:filled]
+            buffer = grown
+        buffer.view(np.uint8)[filled:end] = np.frombuffer(chunk, dtype=np.uint8)
+        filled = end
+
+    return buffer[:filled // PCM_DTYPE.itemsize]
+
+
+async def decode_blocks(
+    source: AudioSource,
+    block_samples: int,
+    sr: int = ANALYSIS_SAMPLE_RATE,
+) -> AsyncIterator[np.ndarray]:
+    """
+    Decode a source into consecutive, non-overlapping blocks of samples.
+
+    Every block but the last holds exactly block_samples samples.
+    """
+    block_bytes = block_samples * PCM_DTYPE.itemsize
+    block = np.empty(block_samples, dtype=PCM_DTYPE)
+    raw = block.view(np.uint8)
+    filled = 0
+
+    async for chunk in _pcm_chunks(source, sr):
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        while len(data):
+            take = min(block_bytes - filled, len(data))
+            raw[filled:filled + take] = data[:take]
+            filled += take
+            data = data[take:]
+            if filled == block_bytes:
+                yield block.copy()
+                filled = 0
+
+    if filled:
+        yield block[:filled // PCM_DTYPE.itemsize].copy()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark live pitch estimation across many sessions.
+
+Every session receives one hop of audio per round. Compares estimating
+each session on its own at the client rate (LivePitchSession.estimate
+without decimation) with estimating all sessions' frames together
+(live.estimate_sessions, as LiveBatchScheduler does), first at the client
+rate and then decimated to the analysis rate (the default). Receiving the
+audio, which is where decimation happens, is part of the timed work. Reports
+how many real-time sessions one core sustains and fails if the decimated
+batch is less than MIN_SPEEDUP times faster than per-session estimation.
+
+Usage:
+    python benchmarks/bench_live_batch.py [sessions] [sample_rate] [rounds]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live import LIVE_ANALYSIS_MIN_RATE, LIVE_HOP_SECONDS, LivePitchSession, estimate_sessions
+
+# Least speedup of batched, decimated estimation over per-session estimation
+# at 44.1/48 kHz
+MIN_SPEEDUP = 4.0
+
+
+def make_sessions(n_sessions, sample_rate, seconds, rng, min_analysis_rate):
+    """Sessions primed up to their first frame, with the audio still to send."""
+    sessions, streams = [], []
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    for _ in range(n_sessions):
+        session = LivePitchSession(sample_rate, min_analysis_rate=min_analysis_rate)
+        audio = (0.5 * np.sin(2 * np.pi * rng.uniform(100, 800) * t)).astype(np.float32)
+        primed = session.frame_length - session.hop_length
+        session.push_samples(audio[:primed])
+        sessions.append(session)
+        streams.append(audio[primed:])
+    return sessions, streams
+
+
+def run(sessions, streams, rounds, batched):
+    hop = sessions[0].hop_length
+    elapsed = 0.0
+    for round_index in range(rounds):
+        start = time.perf_counter()
+        for session, audio in zip(sessions, streams):
+            session.push_samples(audio[round_index * hop:(round_index + 1) * hop])
+        if batched:
+            estimate_sessions([(session, *session.take_frames()) for session in sessions])
+        else:
+            for session in sessions:
+                session.estimate()
+        elapsed += time.perf_counter() - start
+    return elapsed / rounds
+
+
+def main():
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sample_rate = int(sys.argv[2]) if len(sys.argv) > 2 else 48000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    rng = np.random.default_rng(0)
+    seconds = (rounds + 10) * LIVE_HOP_SECONDS
+    print(f"sessions: {n_sessions}, sample rate: {sample_rate} Hz, hop: {LIVE_HOP_SECONDS * 1000:.0f} ms")
+    capacities = {}
+    for name, batched, min_rate in (
+        ('per-session', False, sample_rate),
+        ('batched', True, sample_rate),
+        ('decimated', True, LIVE_ANALYSIS_MIN_RATE),
+    ):
+        sessions, streams = make_sessions(n_sessions, sample_rate, seconds, rng, min_rate)
+        per_round = run(sessions, streams, rounds, batched)
+        per_session = per_round / n_sessions
+        capacities[name] = LIVE_HOP_SECONDS / per_session
+        speedup = capacities[name] / capacities['per-session']
+        print(f"{name:12s} {per_round * 1000:9.2f} ms/round  {per_session * 1e6:8.1f} us/session-hop  "
+              f"~{capacities[name]:7.0f} sessions/core  {speedup:5.1f}x  "
+              f"(analysis at {sessions[0].analysis_rate:.0f} Hz)")
+
+    speedup = capacities['decimated'] / capacities['per-session']
+    if sample_rate >= 44100:
+        assert speedup >= MIN_SPEEDUP, f"decimated batches only {speedup:.1f}x faster, expected {MIN_SPEEDUP}x"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark median smoothing.
+
+Compares scipy.signal.medfilt with median.median_filter (selection
+networks) for a range of kernel sizes, and times median.RunningMedian fed
+block by block (as StreamingPitchTracker does) and sample by sample (as a
+live session would).
+
+Usage:
+    python benchmarks/bench_median.py [n_points]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.signal import medfilt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from median import RunningMedian, median_filter
+from streaming import STREAM_BLOCK_FRAMES
+
+
+def best_of(func, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_blocks(values, kernel_size, block):
+    running = RunningMedian(kernel_size)
+    for start in range(0, len(values), block):
+        running.process(values[start:start + block])
+    running.finish()
+
+
+def run_samples(values, kernel_size):
+    running = RunningMedian(kernel_size)
+    for value in values.tolist():
+        running.push(value)
+    running.finish()
+
+
+def main():
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    rng = np.random.default_rng(0)
+    values = (220 * 2 ** rng.normal(0, 0.3, n_points)).astype(np.float32)
+
+    print(f"points: {n_points}")
+    for kernel_size in (3, 5, 7, 9, 11):
+        reference = best_of(medfilt, values, kernel_size)
+        network = best_of(median_filter, values, kernel_size)
+        print(f"kernel {kernel_size:2d}  medfilt {reference * 1000:8.2f} ms  "
+              f"median_filter {network * 1000:8.2f} ms  ({reference / network:4.1f}x)")
+
+    blocks = best_of(run_blocks, values, 5, STREAM_BLOCK_FRAMES)
+    print(f"RunningMedian(5), {STREAM_BLOCK_FRAMES}-point blocks: {blocks * 1000:8.2f} ms")
+    samples = values[:100_000]
+    per_sample = best_of(run_samples, samples, 5, repeat=1) / len(samples)
+    print(f"RunningMedian(5), one sample at a time: {per_sample * 1e6:.2f} us/sample")
+
+
+if __name__ == "__main__":
+    main()
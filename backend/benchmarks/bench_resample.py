@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark contour resampling.
+
+Compares the original per-target bisect loop with the vectorized
+resampling.resample_contour for every mode on a synthetic contour.
+
+Usage:
+    python benchmarks/bench_resample.py [n_points] [interval]
+"""
+import bisect
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from resampling import RESAMPLE_MODES, resample_contour
+
+
+def bisect_loop(times, freqs, interval):
+    """Per-target binary search loop as previously used."""
+    targets = np.arange(times[0] + interval, times[-1], interval)
+    resampled = []
+    for target in targets:
+        idx = bisect.bisect_left(times, target)
+        if idx == 0:
+            freq = float(freqs[0])
+        elif idx >= len(times):
+            freq = float(freqs[-1])
+        elif abs(times[idx] - target) <= abs(times[idx - 1] - target):
+            freq = float(freqs[idx])
+        else:
+            freq = float(freqs[idx - 1])
+        resampled.append({'time': float(target), 'frequency': freq})
+    return resampled
+
+
+def best_of(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.random(n_points) * 0.02 + 0.001)
+    freqs = 200 + rng.random(n_points) * 600
+    contour = PitchContour(times, freqs)
+
+    print(f"points: {n_points}, span: {contour.end_time:.0f}s, interval: {interval}s")
+    loop_time = best_of(bisect_loop, contour.times, contour.frequencies, interval, repeat=1)
+    print(f"bisect loop:        {loop_time * 1000:10.2f} ms")
+    for mode in RESAMPLE_MODES:
+        elapsed = best_of(resample_contour, contour, interval, mode)
+        print(f"vectorized {mode:8s} {elapsed * 1000:10.2f} ms  ({loop_time / elapsed:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
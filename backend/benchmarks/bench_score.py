@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark sing-along scoring.
+
+Scores synthetic takes of a song against its target with the banded DTW of
+scoring.score_contours and reports takes per minute on one core and the
+peak memory, next to what a full n-by-n DTW matrix would need. Also times
+the FFT latency estimate (scoring.estimate_offset) against correlating
+every candidate lag directly.
+
+Usage:
+    python benchmarks/bench_score.py [song_seconds] [band_seconds]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from scoring import (
+    OFFSET_MAX_LAG_SECONDS,
+    SCORE_FRAME_PERIOD,
+    estimate_offset,
+    grid_cents,
+    score_contours,
+)
+
+
+def shifted_correlations(target, user, max_lag):
+    """Pearson correlation of the voiced pairs at each lag, one lag at a time."""
+    n = len(target)
+    correlations = []
+    for lag in range(-max_lag, max_lag + 1):
+        i = np.arange(max(0, -lag), min(n, n - lag))
+        voiced = ~np.isnan(target[i]) & ~np.isnan(user[i + lag])
+        correlations.append(np.corrcoef(target[i][voiced], user[i + lag][voiced])[0, 1])
+    return np.array(correlations)
+
+
+def best_of(func, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 240.0
+    band_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    rng = np.random.default_rng(0)
+    times = np.arange(0.0, seconds, 512 / 22050)
+    notes = rng.integers(-5, 8, len(times) // 20 + 1).repeat(20)[:len(times)]
+    target = PitchContour(times, 220 * 2 ** (notes / 12))
+    take = PitchContour(times + 0.15, target.frequencies * 2 ** (rng.normal(0, 30, len(times)) / 1200))
+
+    score_contours(target, take, band_seconds=band_seconds)
+    repeat = 10
+    start = time.perf_counter()
+    for _ in range(repeat):
+        score_contours(target, take, band_seconds=band_seconds)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    score_contours(target, take, band_seconds=band_seconds)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    frames = int(seconds / SCORE_FRAME_PERIOD)
+    print(f"song: {seconds:.0f}s, {frames} frames, band: {band_seconds}s")
+    print(f"banded DTW:   {elapsed * 1000:8.2f} ms/take  (~{60 / elapsed:6.0f} takes/min/core)")
+    print(f"peak memory:  {peak / 2**20:8.1f} MB  (full matrix: {frames * frames * 8 / 2**20:.0f} MB)")
+
+    fft_time = best_of(estimate_offset, target, take)
+    n = frames + 1
+    max_lag = int(round(OFFSET_MAX_LAG_SECONDS / SCORE_FRAME_PERIOD))
+    shifted_time = best_of(
+        shifted_correlations, grid_cents(target, 0.0, n), grid_cents(take, 0.0, n), max_lag, repeat=1
+    )
+    print(f"offset (FFT): {fft_time * 1000:8.2f} ms  "
+          f"(lag by lag: {shifted_time * 1000:.2f} ms, {shifted_time / fft_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Two-tier result cache for pitch extraction.
+
+Extraction results are keyed by the normalized YouTube video ID plus every
+pipeline parameter that influences the output, so a cache hit is always safe
+to serve. Entries live in a bounded in-memory LRU and are mirrored to an
+on-disk tier that survives restarts. Both tiers honour a TTL and keep
+hit/miss/eviction counters.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Hosts that serve YouTube videos; anything else is keyed by its raw URL
+YOUTUBE_HOSTS = {
+    'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com',
+    'youtube-nocookie.com', 'www.youtube-nocookie.com',
+}
+YOUTUBE_SHORT_HOSTS = {'youtu.be', 'www.youtu.be'}
+YOUTUBE_PATH_PREFIXES = ('/shorts/', '/embed/', '/live/', '/v/')
+
+CACHE_FILE_SUFFIX = '.pkl'
+
+
+def normalize_video_id(url: str) -> str:
+    """
+    Reduce a YouTube URL to a stable identifier.
+
+    Different URL spellings of the same video (watch?v=, youtu.be, shorts,
+    embed, extra query parameters) map to ``youtube:<id>``. URLs that are not
+    recognised fall back to the stripped URL so they still get cached.
+
+    Args:
+        url: URL as submitted by the client
+
+    Returns:
+        Normalized identifier string
+    """
+    url = url.strip()
+    parsed = urlparse(url if '://' in url else f'https://{url}')
+    host = (parsed.hostname or '').lower()
+
+    video_id = None
+    if host in YOUTUBE_SHORT_HOSTS:
+        video_id = parsed.path.lstrip('/').split('/')[0]
+    elif host in YOUTUBE_HOSTS:
+        if parsed.path == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [None])[0]
+        else:
+            for prefix in YOUTUBE_PATH_PREFIXES:
+                if parsed.path.startswith(prefix):
+                    video_id = parsed.path[len(prefix):].split('/')[0]
+                    break
+
+    if video_id:
+        return f'youtube:{video_id}'
+    return url
+
+
+def make_cache_key(video_id: str, **params: Any) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        video_id: Normalized video identifier (see normalize_video_id)
+        **params: Pipeline parameters that affect the result
+
+    Returns:
+        Hex SHA-256 digest of the identifier and parameters
+    """
+    payload = json.dumps({'id': video_id, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with an in-memory tier and an optional disk tier.
+
+    The memory tier is bounded by entry count and total serialized bytes; the
+    disk tier is bounded by total bytes and evicts least recently used files
+    (tracked through file mtimes, which are refreshed on every disk hit).
+    Expiry timestamps are stored alongside each value, so refreshing recency
+    never extends an entry's TTL.
+    """
+
+    def __init__(
+        self,
+        max_memory_items: int = 256,
+        max_memory_bytes: int = 256 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        ttl: Optional[float] = 7 * 24 * 3600,
+    ):
+        self.max_memory_items = max_memory_items
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+
+        # key -> (value, size in bytes, expiry timestamp or None)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'expirations': 0,
+        }
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return value
+                self._drop_memory(key)
+                self._stats['expirations'] += 1
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value under key in both tiers."""
+        expires_at = time.time() + self.ttl if self.ttl else None
+        data = pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._memory_insert(key, value, len(data), expires_at)
+
+        if self.cache_dir:
+            self._disk_put(key, data)
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(CACHE_FILE_SUFFIX):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the cache counters and current sizes."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['memory_items'] = len(self._memory)
+            snapshot['memory_bytes'] = self._memory_bytes
+        snapshot['hits'] = snapshot['memory_hits'] + snapshot['disk_hits']
+        return snapshot
+
+    # Memory tier (callers hold self._lock)
+
+    def _memory_insert(self, key: str, value: Any, size: int, expires_at: Optional[float]) -> None:
+        if key in self._memory:
+            self._drop_memory(key)
+        if size > self.max_memory_bytes:
+            return
+        self._memory[key] = (value, size, expires_at)
+        self._memory_bytes += size
+
+        while (len(self._memory) > self.max_memory_items
+               or self._memory_bytes > self.max_memory_bytes):
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self._stats['memory_evictions'] += 1
+
+    def _drop_memory(self, key: str) -> None:
+        _, size, _ = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    # Disk tier
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Any]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            expires_at, value = pickle.loads(data)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+
+        if expires_at is not None and expires_at <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._stats['expirations'] += 1
+            return None
+
+        # Refresh recency for LRU eviction and promote into memory
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            self._memory_insert(key, value, len(data), expires_at)
+        return value
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_disk_bytes:
+            return
+        # Write atomically so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._enforce_disk_limit()
+
+    def _enforce_disk_limit(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.max_disk_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats['disk_evictions'] += 1
+
+
+def cache_from_env() -> ResultCache:
+    """
+    Build the application cache from environment variables.
+
+    PITCH_CACHE_DIR enables the disk tier; PITCH_CACHE_MEMORY_ITEMS,
+    PITCH_CACHE_MEMORY_MB, PITCH_CACHE_DISK_MB and PITCH_CACHE_TTL
+    (seconds, 0 disables expiry) override the defaults.
+    """
+    ttl = float(os.getenv('PITCH_CACHE_TTL', str(7 * 24 * 3600)))
+    return ResultCache(
+        max_memory_items=int(os.getenv('PITCH_CACHE_MEMORY_ITEMS', '256')),
+        max_memory_bytes=int(float(os.getenv('PITCH_CACHE_MEMORY_MB', '256')) * 1024 * 1024),
+        cache_dir=os.getenv('PITCH_CACHE_DIR') or None,
+        max_disk_bytes=int(float(os.getenv('PITCH_CACHE_DISK_MB', '2048')) * 1024 * 1024),
+        ttl=ttl or None,
+    )
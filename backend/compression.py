@@ -0,0 +1,190 @@
+"""
+Response compression middleware.
+
+Compresses response bodies with brotli (if the optional brotli package is
+installed) or gzip, whichever the client's Accept-Encoding prefers. Bodies
+smaller than minimum_size are sent as-is, since the framing overhead would
+outweigh the savings. Streamed responses are compressed chunk by chunk with
+a flush after each one, so progressive output still arrives progressively;
+Server-Sent Events are left uncompressed, as proxies tend to buffer them.
+"""
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from etags import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+UNCOMPRESSED_MEDIA_TYPES = ('text/event-stream',)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Pick 'br' or 'gzip' for an Accept-Encoding header, or None for identity.
+
+    The highest q-value wins; brotli is preferred on ties and only offered
+    when the brotli package is available.
+    """
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in ('br', 'gzip') if brotli is not None else ('gzip',):
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31 selects the gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _echo_encoded_etag(message, encoding: str, if_none_match: Optional[str]) -> None:
+    headers = MutableHeaders(scope=message)
+    etag = headers.get('etag')
+    if etag and if_none_match and encoded_etag(etag, encoding) in if_none_match:
+        headers['ETag'] = encoded_etag(etag, encoding)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip.
+
+    Args:
+        app: ASGI application to wrap
+        minimum_size: Smallest body in bytes worth compressing
+        gzip_level: zlib compression level (1-9)
+        brotli_quality: Brotli quality (0-11); the default favours speed
+    """
+
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder(self, encoding: str):
+        if encoding == 'br':
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get('accept-encoding'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if message['type'] == 'http.response.start':
+                if message['status'] == 304:
+                    # No body to compress, but echo the tag of the compressed
+                    # representation the client is revalidating
+                    _echo_encoded_etag(message, encoding, request_headers.get('if-none-match'))
+                    passthrough = True
+                    await send(message)
+                    return
+                # Hold the headers until the first body chunk shows whether
+                # (and how) the body will be compressed
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if encoder is None:
+                headers = MutableHeaders(raw=start_message['headers'])
+                media_type = headers.get('content-type', '').split(';')[0].strip()
+                if ('content-encoding' in headers
+                        or media_type in UNCOMPRESSED_MEDIA_TYPES
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = self._encoder(encoding)
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                if 'etag' in headers:
+                    headers['ETag'] = encoded_etag(headers['etag'], encoding)
+                if more_body:
+                    del headers['content-length']
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers['Content-Length'] = str(len(body))
+                    await send(start_message)
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+                await send(start_message)
+
+            if more_body:
+                chunk = encoder.compress(body) + encoder.flush()
+            else:
+                chunk = encoder.compress(body) + encoder.finish()
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
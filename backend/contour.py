@@ -0,0 +1,220 @@
+"""
+Columnar pitch contour container.
+
+PitchContour keeps time, frequency and confidence as contiguous float32
+arrays so pipeline stages can work on whole columns with NumPy instead of
+building a dict per point. The list-of-dict form used by the JSON API is
+only produced at the serialization boundary (to_points) and parsed once on
+the way in (from_points).
+"""
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+CONTOUR_DTYPE = np.float32
+
+# Decimal places kept when serializing; finer than float32 resolution at the
+# magnitudes involved, and keeps JSON free of float32 rounding noise
+TIME_DECIMALS = 6
+FREQUENCY_DECIMALS = 4
+
+
+def _column(values: Any, copy: bool) -> np.ndarray:
+    if copy:
+        array = np.array(values, dtype=CONTOUR_DTYPE)
+    else:
+        array = np.asarray(values, dtype=CONTOUR_DTYPE)
+    if array.ndim != 1:
+        raise ValueError("contour columns must be one-dimensional")
+    return np.ascontiguousarray(array)
+
+
+class PitchContour:
+    """
+    Pitch contour stored as parallel float32 columns.
+
+    Invariants: all columns have the same length, every value is finite and
+    times are non-decreasing. Slicing returns views that share memory with
+    the original contour.
+
+    Args:
+        times: Frame times in seconds
+        frequencies: Pitch in Hz for each frame
+        confidences: Detection confidence in [0, 1] (default: all ones)
+        sort: Sort by time instead of rejecting non-monotonic input
+        copy: Always copy the input arrays
+    """
+
+    __slots__ = ('times', 'frequencies', 'confidences')
+
+    def __init__(
+        self,
+        times: Any,
+        frequencies: Any,
+        confidences: Optional[Any] = None,
+        sort: bool = False,
+        copy: bool = False,
+    ):
+        times = _column(times, copy)
+        frequencies = _column(frequencies, copy)
+        if confidences is None:
+            confidences = np.ones(len(times), dtype=CONTOUR_DTYPE)
+        else:
+            confidences = _column(confidences, copy)
+
+        if not (len(times) == len(frequencies) == len(confidences)):
+            raise ValueError("times, frequencies and confidences must have the same length")
+        if not np.isfinite(times).all():
+            raise ValueError("times must be finite numeric values (no NaN or Inf)")
+        if not np.isfinite(frequencies).all():
+            raise ValueError("frequencies must be finite numeric values (no NaN or Inf)")
+
+        if len(times) > 1 and (times[1:] < times[:-1]).any():
+            if not sort:
+                raise ValueError("times must be non-decreasing")
+            order = np.argsort(times, kind='stable')
+            times, frequencies, confidences = times[order], frequencies[order], confidences[order]
+
+        self.times = times
+        self.frequencies = frequencies
+        self.confidences = confidences
+
+    @classmethod
+    def empty(cls) -> 'PitchContour':
+        """Return a contour with no points."""
+        return cls(np.empty(0), np.empty(0), np.empty(0))
+
+    @classmethod
+    def _from_valid_columns(cls, times: np.ndarray, frequencies: np.ndarray,
+                            confidences: np.ndarray) -> 'PitchContour':
+        # Internal constructor for columns already known to satisfy the invariants
+        contour = cls.__new__(cls)
+        contour.times = times
+        contour.frequencies = frequencies
+        contour.confidences = confidences
+        return contour
+
+    @classmethod
+    def concatenate(cls, contours: Iterable['PitchContour']) -> 'PitchContour':
+        """
+        Join consecutive contours into one.
+
+        Raises:
+            ValueError: If the result would not be ordered by time
+        """
+        contours = [c for c in contours if len(c)]
+        if not contours:
+            return cls.empty()
+        if len(contours) == 1:
+            return contours[0]
+        return cls(
+            np.concatenate([c.times for c in contours]),
+            np.concatenate([c.frequencies for c in contours]),
+            np.concatenate([c.confidences for c in contours]),
+        )
+
+    @classmethod
+    def from_points(cls, points: Iterable[Dict[str, float]]) -> 'PitchContour':
+        """
+        Parse a list of {time, frequency[, confidence]} dicts.
+
+        Points are sorted by time if needed.
+
+        Raises:
+            ValueError: If a point is not a dict, lacks a required key, holds
+                        a non-numeric value, or contains NaN/Inf
+        """
+        points = list(points)
+        n = len(points)
+        times = np.empty(n, dtype=np.float64)
+        frequencies = np.empty(n, dtype=np.float64)
+        confidences = np.ones(n, dtype=np.float64)
+
+        for i, point in enumerate(points):
+            if not isinstance(point, dict):
+                raise ValueError(f"pitch_contour[{i}]: expected dict, got {type(point).__name__}")
+            if 'time' not in point:
+                raise ValueError(f"pitch_contour[{i}]: missing required 'time' key")
+            if 'frequency' not in point:
+                raise ValueError(f"pitch_contour[{i}]: missing required 'frequency' key")
+            time, frequency = point['time'], point['frequency']
+            if not isinstance(time, (int, float)):
+                raise ValueError(f"pitch_contour[{i}]: 'time' must be numeric, got {type(time).__name__}")
+            if not isinstance(frequency, (int, float)):
+                raise ValueError(f"pitch_contour[{i}]: 'frequency' must be numeric, got {type(frequency).__name__}")
+            times[i] = time
+            frequencies[i] = frequency
+            confidence = point.get('confidence')
+            if confidence is not None:
+                confidences[i] = confidence
+
+        return cls(times, frequencies, confidences, sort=True)
+
+    def to_points(self, include_confidence: bool = False) -> List[Dict[str, float]]:
+        """Serialize to the list-of-dict form used by the JSON API."""
+        times = np.round(self.times.astype(np.float64), TIME_DECIMALS).tolist()
+        frequencies = np.round(self.frequencies.astype(np.float64), FREQUENCY_DECIMALS).tolist()
+        if not include_confidence:
+            return [{'time': t, 'frequency': f} for t, f in zip(times, frequencies)]
+        confidences = np.round(self.confidences.astype(np.float64), FREQUENCY_DECIMALS).tolist()
+        return [
+            {'time': t, 'frequency': f, 'confidence': c}
+            for t, f, c in zip(times, frequencies, confidences)
+        ]
+
+    def with_frequencies(self, frequencies: Any) -> 'PitchContour':
+        """Return a contour sharing times/confidences with new frequencies."""
+        frequencies = _column(frequencies, copy=False)
+        if len(frequencies) != len(self.times):
+            raise ValueError("frequencies must have the same length as the contour")
+        if not np.isfinite(frequencies).all():
+            raise ValueError("frequencies must be finite numeric values (no NaN or Inf)")
+        return self._from_valid_columns(self.times, frequencies, self.confidences)
+
+    def window(self, start: float, end: float) -> 'PitchContour':
+        """Return a view of the points with start <= time < end."""
+        lo, hi = np.searchsorted(self.times, [start, end], side='left')
+        return self[lo:hi]
+
+    @property
+    def start_time(self) -> float:
+        return float(self.times[0]) if len(self.times) else 0.0
+
+    @property
+    def end_time(self) -> float:
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.frequencies.nbytes + self.confidences.nbytes
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union['PitchContour', Tuple[float, float, float]]:
+        if isinstance(index, slice):
+            if index.step is not None and index.step < 0:
+                raise ValueError("negative steps would break time ordering")
+            return self._from_valid_columns(
+                self.times[index], self.frequencies[index], self.confidences[index]
+            )
+        return (float(self.times[index]), float(self.frequencies[index]),
+                float(self.confidences[index]))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PitchContour):
+            return NotImplemented
+        return (np.array_equal(self.times, other.times)
+                and np.array_equal(self.frequencies, other.frequencies)
+                and np.array_equal(self.confidences, other.confidences))
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return (self.times, self.frequencies, self.confidences)
+
+    def __setstate__(self, state):
+        self.times, self.frequencies, self.confidences = state
+
+    def __repr__(self) -> str:
+        return (f"PitchContour({len(self)} points, "
+                f"{self.start_time:.3f}s-{self.end_time:.3f}s)")
@@ -0,0 +1,128 @@
+"""
+Display-oriented contour downsampling.
+
+resample_contour evaluates a contour on a fixed time grid, so features
+narrower than the interval (a fast melisma, the crest of a vibrato) fall
+between targets and vanish. The methods here instead keep a subset of the
+original points, chosen so the drawn curve looks like the full one:
+
+- 'lttb' (Largest-Triangle-Three-Buckets) splits the points into equal
+  buckets and keeps, per bucket, the point spanning the largest triangle
+  with the previously kept point and the next bucket's average.
+- 'm4' splits the time span into equal buckets (pixel columns) and keeps
+  each bucket's first, last, lowest and highest point, which reproduces the
+  envelope a line renderer would draw from all points.
+
+Shapes are judged on log frequency, the pitch axis the frontend draws.
+Every step is vectorized except LTTB's chain of kept points, which is
+inherently sequential: one argmax over a precomputed bucket per output
+point.
+"""
+import numpy as np
+
+from contour import PitchContour
+
+DOWNSAMPLE_METHODS = ('lttb', 'm4')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps, first and last included.
+
+    Args:
+        x: Sorted point positions (times)
+        y: Point values
+        n_out: Number of points to keep; at least 3 and fewer than len(x)
+    """
+    n = len(x)
+    # Inner points 1..n-2 in n_out - 2 buckets of (nearly) equal size
+    every = (n - 2) / (n_out - 2)
+    edges = np.floor(1 + np.arange(n_out - 1) * every).astype(np.int64)
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # Bucket averages from prefix sums; bucket i's triangles use bucket
+    # i + 1's average, and the last bucket uses the last point
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = ends - starts
+    next_x = np.append(((x_sums[ends] - x_sums[starts]) / sizes)[1:], x[-1])
+    next_y = np.append(((y_sums[ends] - y_sums[starts]) / sizes)[1:], y[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    anchor = 0
+    for bucket, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        ax, ay = x[anchor], y[anchor]
+        # Twice the triangle area, up to sign
+        areas = np.abs((ax - next_x[bucket]) * (y[start:end] - ay)
+                       - (ax - x[start:end]) * (next_y[bucket] - ay))
+        anchor = start + int(np.argmax(areas))
+        kept[bucket + 1] = anchor
+    return kept
+
+
+def m4_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points M4 keeps: first, last, min and max of each of
+    n_out // 4 equal time buckets (sorted, without duplicates).
+
+    Args:
+        x: Sorted point positions (times)
+        y: Point values
+        n_out: Maximum number of points to keep; at least 4
+    """
+    n = len(x)
+    n_buckets = n_out // 4
+    bounds = np.searchsorted(x, np.linspace(x[0], x[-1], n_buckets + 1), side='left')
+    bounds[0], bounds[-1] = 0, n
+    counts = np.diff(bounds)
+    filled = counts > 0
+    # Filled buckets tile the points, so reduceat over their starts is exact
+    starts = bounds[:-1][filled]
+    ends = bounds[1:][filled]
+    bucket_ids = np.repeat(np.arange(len(starts)), counts[filled])
+
+    def first_where(mask: np.ndarray) -> np.ndarray:
+        # Index of the first point of each bucket where mask holds
+        hits = np.flatnonzero(mask)
+        _, first = np.unique(bucket_ids[hits], return_index=True)
+        return hits[first]
+
+    lows = first_where(y == np.minimum.reduceat(y, starts)[bucket_ids])
+    highs = first_where(y == np.maximum.reduceat(y, starts)[bucket_ids])
+    return np.unique(np.concatenate((starts, ends - 1, lows, highs)))
+
+
+def downsample_contour(contour: PitchContour, points: int, method: str = 'lttb') -> PitchContour:
+    """
+    Reduce a contour to at most points of its own points for display.
+
+    Args:
+        contour: Sorted input contour
+        points: Target point count; LTTB keeps exactly this many, M4 at
+                most this many
+        method: One of DOWNSAMPLE_METHODS
+
+    Returns:
+        The kept points (the contour itself if it already fits)
+
+    Raises:
+        ValueError: If method is unknown or points is too small for it
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"unknown downsample method '{method}', expected one of {', '.join(DOWNSAMPLE_METHODS)}")
+    minimum = 4 if method == 'm4' else 3
+    if points < minimum:
+        raise ValueError(f"{method} needs at least {minimum} points")
+
+    if len(contour) <= points:
+        return contour
+
+    times = contour.times.astype(np.float64)
+    log_frequencies = np.log2(contour.frequencies.astype(np.float64))
+    if method == 'lttb':
+        indices = lttb_indices(times, log_frequencies, points)
+    else:
+        indices = m4_indices(times, log_frequencies, points)
+    return PitchContour(contour.times[indices], contour.frequencies[indices], contour.confidences[indices])
@@ -0,0 +1,234 @@
+"""
+Wire encodings for pitch contours.
+
+JSON (a list of {time, frequency} objects) stays the default. Clients that
+send ``Accept: application/octet-stream`` or ``format=binary`` receive a
+compact little-endian columnar payload instead:
+
+    offset  size  type      field
+    0       4     char[4]   magic b'PTCH'
+    4       1     uint8     version (1)
+    5       1     uint8     flags: bit 0 = confidence column present,
+                                   bit 1 = regular grid (no time column)
+    6       2     uint16    reserved (0)
+    8       4     uint32    count (number of points)
+    12      4     uint32    sample_rate (Hz)
+    16      8     float64   start_time (s)
+    24      8     float64   interval (s; 0 when the grid is irregular)
+    32      8     float64   duration (s)
+    40      ...   float32   times[count]        (only if bit 1 is clear)
+            ...   float32   frequencies[count]
+            ...   float32   confidences[count]  (only if bit 0 is set)
+
+On a regular grid point i is at start_time + (i + 1) * interval, matching
+the resampling grid, which first lands one interval after the start.
+frontend/app.js (decodePitchBinary) implements the matching decoder.
+
+``format=compact`` selects a quantized JSON shape for clients that cannot
+handle binary bodies: the grid is described by ``start`` and ``interval``
+and each slot holds an integer pitch in cents relative to A4, with
+UNVOICED_CENTS marking slots without a voiced point:
+
+    {"start": 0.5, "interval": 0.5, "cents": [0, 200, -32768, 190, ...]}
+
+Slot i is at start + i * interval. Cents are exact to half a cent, well
+below what a display or a singer can resolve.
+"""
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+
+from contour import PitchContour
+
+BINARY_MEDIA_TYPE = 'application/octet-stream'
+BINARY_MAGIC = b'PTCH'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sBBHIIddd')
+
+FLAG_CONFIDENCE = 0x01
+FLAG_REGULAR_GRID = 0x02
+
+_LE_FLOAT32 = np.dtype('<f4')
+
+CENTS_REFERENCE_HZ = 440.0
+UNVOICED_CENTS = -32768
+
+
+def wants_binary(accept: Optional[str], response_format: Optional[str]) -> bool:
+    """
+    Decide whether to send the binary encoding.
+
+    An explicit format parameter wins; otherwise the Accept header must name
+    application/octet-stream (JSON remains the default for */* and absent
+    headers).
+    """
+    if response_format:
+        return response_format == 'binary'
+    if not accept:
+        return False
+    for part in accept.split(','):
+        media_type, _, params = part.strip().partition(';')
+        if media_type.strip().lower() != BINARY_MEDIA_TYPE:
+            continue
+        # Honour an explicit q=0 refusal
+        return not any(p.strip().replace(' ', '') in ('q=0', 'q=0.0') for p in params.split(';'))
+    return False
+
+
+def is_regular_grid(contour: PitchContour, start_time: float, interval: float) -> bool:
+    """True if point i sits at start_time + (i + 1) * interval (to float32 precision)."""
+    if interval <= 0 or len(contour) == 0:
+        return False
+    expected = start_time + interval * np.arange(1, len(contour) + 1)
+    return np.allclose(contour.times, expected, rtol=1e-6, atol=1e-5)
+
+
+def encode_contour_binary(
+    contour: PitchContour,
+    sample_rate: int,
+    duration: float,
+    interval: Optional[float] = None,
+    start_time: Optional[float] = None,
+    include_confidence: bool = False,
+) -> bytes:
+    """
+    Encode a contour in the binary columnar format.
+
+    Args:
+        contour: Contour to encode
+        sample_rate: Analysis sample rate in Hz
+        duration: Audio duration in seconds
+        interval: Grid spacing; when the contour lies on the grid starting at
+                  start_time the time column is omitted
+        start_time: Grid origin (the resampled contour's first time minus one
+                    interval when omitted)
+        include_confidence: Append the confidence column
+
+    Returns:
+        Encoded payload
+    """
+    flags = FLAG_CONFIDENCE if include_confidence else 0
+    if start_time is None:
+        start_time = contour.start_time - (interval or 0.0)
+
+    regular = interval is not None and is_regular_grid(contour, start_time, interval)
+    if regular:
+        flags |= FLAG_REGULAR_GRID
+    else:
+        start_time, interval = contour.start_time, 0.0
+
+    header = BINARY_HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, flags, 0,
+        len(contour), int(sample_rate), float(start_time), float(interval), float(duration),
+    )
+    columns = [] if regular else [contour.times]
+    columns.append(contour.frequencies)
+    if include_confidence:
+        columns.append(contour.confidences)
+
+    return header + b''.join(column.astype(_LE_FLOAT32, copy=False).tobytes() for column in columns)
+
+
+def decode_contour_binary(payload: bytes) -> Dict:
+    """
+    Decode a binary payload (reference implementation for tests and tools).
+
+    Returns:
+        Dict with 'pitch_contour' (PitchContour), 'sample_rate', 'duration',
+        'start_time' and 'interval'
+
+    Raises:
+        ValueError: If the payload is malformed
+    """
+    if len(payload) < BINARY_HEADER.size:
+        raise ValueError("payload shorter than header")
+    magic, version, flags, _, count, sample_rate, start_time, interval, duration = \
+        BINARY_HEADER.unpack_from(payload)
+    if magic != BINARY_MAGIC:
+        raise ValueError("not a pitch contour payload")
+    if version != BINARY_VERSION:
+        raise ValueError(f"unsupported payload version {version}")
+
+    n_columns = 1 + (not flags & FLAG_REGULAR_GRID) + bool(flags & FLAG_CONFIDENCE)
+    expected = BINARY_HEADER.size + n_columns * count * 4
+    if len(payload) != expected:
+        raise ValueError(f"payload size {len(payload)} does not match header ({expected})")
+
+    data = np.frombuffer(payload, dtype=_LE_FLOAT32, offset=BINARY_HEADER.size)
+    columns = data.reshape(n_columns, count)
+    if flags & FLAG_REGULAR_GRID:
+        times = start_time + interval * np.arange(1, count + 1)
+        rest = columns
+    else:
+        times, rest = columns[0], columns[1:]
+    frequencies = rest[0]
+    confidences = rest[1] if flags & FLAG_CONFIDENCE else None
+
+    return {
+        'pitch_contour': PitchContour(times, frequencies, confidences),
+        'sample_rate': sample_rate,
+        'duration': duration,
+        'start_time': start_time,
+        'interval': interval,
+    }
+
+
+def hz_to_cents(frequencies: np.ndarray) -> np.ndarray:
+    """Integer cents relative to A4; non-positive frequencies map to UNVOICED_CENTS."""
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    voiced = frequencies > 0
+    cents = np.full(len(frequencies), UNVOICED_CENTS, dtype=np.int32)
+    cents[voiced] = np.rint(1200 * np.log2(frequencies[voiced] / CENTS_REFERENCE_HZ))
+    return cents
+
+
+def encode_contour_compact(contour: PitchContour, interval: float) -> Dict:
+    """
+    Encode a resampled contour as a quantized cents grid.
+
+    The grid starts at the contour's first point. Points are snapped to the
+    nearest slot, and slots no point lands on (e.g. bins dropped by the
+    aggregate resample modes) are filled with UNVOICED_CENTS.
+
+    Args:
+        contour: Resampled contour
+        interval: Grid spacing in seconds; must be positive
+
+    Returns:
+        Dict with 'start', 'interval', 'reference_frequency', 'unvoiced'
+        and 'cents' (list of int)
+
+    Raises:
+        ValueError: If interval is not positive
+    """
+    if interval <= 0:
+        raise ValueError("interval must be a positive number")
+
+    start = contour.start_time
+    if len(contour) == 0:
+        cents = np.empty(0, dtype=np.int32)
+    else:
+        offsets = contour.times.astype(np.float64) - start
+        slots = np.rint(offsets / interval).astype(np.int64)
+        cents = np.full(int(slots[-1]) + 1, UNVOICED_CENTS, dtype=np.int32)
+        # Later points win when two snap to the same slot
+        cents[slots] = hz_to_cents(contour.frequencies)
+
+    return {
+        'start': round(start, 6),
+        'interval': interval,
+        'reference_frequency': CENTS_REFERENCE_HZ,
+        'unvoiced': UNVOICED_CENTS,
+        'cents': cents.tolist(),
+    }
+
+
+def decode_contour_compact(data: Dict) -> PitchContour:
+    """Expand a compact cents grid back into a contour of its voiced slots."""
+    cents = np.asarray(data['cents'], dtype=np.int64)
+    voiced = np.flatnonzero(cents != data.get('unvoiced', UNVOICED_CENTS))
+    reference = data.get('reference_frequency', CENTS_REFERENCE_HZ)
+    times = data['start'] + voiced * data['interval']
+    frequencies = reference * np.exp2(cents[voiced] / 1200)
+    return PitchContour(times, frequencies)
@@ -0,0 +1,412 @@
+"""
+Pluggable pitch engines.
+
+A PitchEngine turns mono samples into the raw (unsmoothed) voiced contour;
+smoothing and resampling are shared by all engines (see pipeline.py).
+Engines are registered by name and picked per request, trading speed for
+accuracy:
+
+- 'piptrack': strongest librosa.piptrack peak per frame (the original
+  engine). Fast, but prone to octave errors.
+- 'pyin': librosa.pyin, probabilistic YIN with HMM smoothing. The most
+  accurate and by far the slowest; confidence is the voicing probability.
+- 'yin': YIN (de Cheveigné & Kawahara, 2002), vectorized in NumPy with an
+  FFT difference function; close to pyin's accuracy at a fraction of its
+  cost. Confidence is one minus the aperiodicity of the chosen lag.
+- 'autocorr': normalized FFT autocorrelation. The cheapest engine, meant for
+  previews; confidence is the autocorrelation peak.
+
+All engines share the framing of piptrack (PIPTRACK_N_FFT samples every
+PIPTRACK_HOP_LENGTH, centred), so their contours line up frame for frame.
+"""
+import os
+from typing import Dict, Tuple
+
+import librosa
+import numpy as np
+
+from contour import PitchContour
+
+PITCH_FMIN_NOTE = 'C2'
+PITCH_FMAX_NOTE = 'C7'
+PIPTRACK_HOP_LENGTH = 512
+PIPTRACK_N_FFT = 2048
+# Minimum piptrack magnitude for a frame to count as voiced
+PIPTRACK_MAGNITUDE_THRESHOLD = 0.1
+# Frames with a lower RMS are treated as silence by the time-domain engines
+SILENCE_RMS = 1e-3
+# Frames processed at once by the time-domain engines, bounding memory
+ENGINE_BLOCK_FRAMES = 512
+
+DEFAULT_ENGINE = 'piptrack'
+
+
+def extract_dominant_pitch(
+    pitches: np.ndarray,
+    magnitudes: np.ndarray,
+    sr: int,
+    hop_length: int = PIPTRACK_HOP_LENGTH,
+    threshold: float = PIPTRACK_MAGNITUDE_THRESHOLD,
+    first_frame: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pick the strongest piptrack candidate in every frame.
+
+    Fully vectorized: one argmax over the frequency axis, fancy indexing to
+    gather the winning bins and a boolean mask for voicing.
+
+    Args:
+        pitches: piptrack pitch matrix, shape (n_bins, n_frames)
+        magnitudes: piptrack magnitude matrix, same shape as pitches
+        sr: Sample rate the matrices were computed at
+        hop_length: Hop length used by piptrack
+        threshold: Minimum magnitude for a frame to count as voiced
+        first_frame: Index of the first column within the whole signal, for
+                     matrices covering one block of a longer stream
+
+    Returns:
+        (times, frequencies, magnitudes) of the voiced frames
+    """
+    frames = np.arange(pitches.shape[1])
+    best_bins = magnitudes.argmax(axis=0)
+    best_magnitudes = magnitudes[best_bins, frames]
+
+    voiced = best_magnitudes > threshold
+    voiced_frames = frames[voiced]
+    times = librosa.frames_to_time(voiced_frames + first_frame, sr=sr, hop_length=hop_length)
+    frequencies = pitches[best_bins[voiced], voiced_frames]
+
+    return times, frequencies, best_magnitudes[voiced]
+
+
+def frame_signal(y: np.ndarray, frame_length: int, hop_length: int, center: bool) -> np.ndarray:
+    """
+    Frame y into shape (n_frames, frame_length) without copying.
+
+    With center=True, y is zero padded by frame_length // 2 on both sides
+    first, like librosa's default STFT framing.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    if center:
+        y = np.pad(y, frame_length // 2)
+    if len(y) < frame_length:
+        return np.empty((0, frame_length), dtype=np.float32)
+    return np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+
+
+def parabolic_offset(left: np.ndarray, centre: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Vertex offset (in lags, within +-0.5) of the parabola through three points."""
+    denominator = left - 2 * centre + right
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(np.abs(denominator) > 1e-12, 0.5 * (left - right) / denominator, 0.0)
+    return np.clip(offset, -0.5, 0.5)
+
+
+class PitchEngine:
+    """
+    Base class of pitch engines.
+
+    Subclasses set name (the registry key and API value) and version (part
+    of cache keys; bump when the output changes) and implement track().
+
+    Attributes:
+        frame_local: Each frame's estimate depends only on that frame's
+                     samples, so the engine can run block by block (see
+                     streaming.py)
+        relative_confidence: track() returns raw strengths that the pipeline
+                             normalizes by the loudest frame
+    """
+
+    name = ''
+    version = '1'
+    frame_length = PIPTRACK_N_FFT
+    hop_length = PIPTRACK_HOP_LENGTH
+    frame_local = True
+    relative_confidence = False
+
+    def __init__(self):
+        self.fmin = librosa.note_to_hz(PITCH_FMIN_NOTE)
+        self.fmax = librosa.note_to_hz(PITCH_FMAX_NOTE)
+
+    @property
+    def cache_tag(self) -> str:
+        """Identifies the engine's output in cache keys."""
+        return f'{self.name}-{self.version}'
+
+    def track(self, y: np.ndarray, sr: int, center: bool = True, first_frame: int = 0) -> PitchContour:
+        """
+        Estimate the pitch of every voiced frame of y.
+
+        Args:
+            y: Mono samples
+            sr: Sample rate of y
+            center: Pad y so frame i is centred on sample i * hop_length;
+                    False when y is a block of a longer stream whose frames
+                    start at its first sample
+            first_frame: Index of y's first frame within the whole signal
+
+        Returns:
+            PitchContour of the voiced frames
+        """
+        raise NotImplementedError
+
+    def _frame_times(self, frames: np.ndarray, sr: int, first_frame: int) -> np.ndarray:
+        return librosa.frames_to_time(frames + first_frame, sr=sr, hop_length=self.hop_length)
+
+
+class PiptrackEngine(PitchEngine):
+    """Strongest librosa.piptrack peak per frame."""
+
+    name = 'piptrack'
+    relative_confidence = True
+
+    def __init__(self, threshold: float = PIPTRACK_MAGNITUDE_THRESHOLD):
+        super().__init__()
+        self.threshold = threshold
+
+    def track(self, y: np.ndarray, sr: int, center: bool = True, first_frame: int = 0) -> PitchContour:
+        pitches, magnitudes = librosa.piptrack(
+            y=y, sr=sr, fmin=self.fmin, fmax=self.fmax,
+            n_fft=self.frame_length, hop_length=self.hop_length, center=center,
+        )
+        times, frequencies, strengths = extract_dominant_pitch(
+            pitches, magnitudes, sr, self.hop_length, self.threshold, first_frame=first_frame
+        )
+        return PitchContour(times, frequencies, strengths)
+
+
+class PyinEngine(PitchEngine):
+    """librosa.pyin; its Viterbi decoding looks at the whole signal."""
+
+    name = 'pyin'
+    frame_local = False
+
+    def track(self, y: np.ndarray, sr: int, center: bool = True, first_frame: int = 0) -> PitchContour:
+        f0, voiced, probabilities = librosa.pyin(
+            y, fmin=self.fmin, fmax=self.fmax, sr=sr,
+            frame_length=self.frame_length, hop_length=self.hop_length, center=center,
+        )
+        frames = np.flatnonzero(voiced)
+        return PitchContour(self._frame_times(frames, sr, first_frame), f0[frames], probabilities[frames])
+
+
+def cumulative_mean_normalized_difference(frames: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    YIN's cumulative mean normalized difference d'(tau) of every frame.
+
+    The difference function d(tau) = sum_j (x[j] - x[j + tau])^2 over the
+    first frame_length - max_lag - 1 samples expands into two energy terms,
+    read off a cumulative sum of squares, and the cross-correlation of that
+    window with the frame, computed for all lags and frames at once with one
+    real FFT per frame. The FFT size is the frame length: the window is short
+    enough that the circular correlation never wraps.
+
+    Args:
+        frames: Frames, shape (n_frames, frame_length)
+        max_lag: Largest lag of interest
+
+    Returns:
+        d'(tau) for tau = 0 .. max_lag + 1, shape (n_frames, max_lag + 2)
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    frame_length = frames.shape[1]
+    width = frame_length - max_lag - 1
+    n_lags = max_lag + 2
+
+    spectrum = np.fft.rfft(frames, n=frame_length, axis=1)
+    window_spectrum = np.fft.rfft(frames[:, :width], n=frame_length, axis=1)
+    correlation = np.fft.irfft(np.conj(window_spectrum) * spectrum, n=frame_length, axis=1)[:, :n_lags]
+
+    energy = np.zeros((len(frames), frame_length + 1))
+    np.cumsum(np.square(frames), axis=1, out=energy[:, 1:])
+    shifted_energy = energy[:, width:width + n_lags] - energy[:, :n_lags]
+    # Rounding in the FFT can leave tiny negative values
+    difference = np.maximum(energy[:, width:width + 1] + shifted_energy - 2 * correlation, 0.0)
+    difference[:, 0] = 0.0
+
+    cmnd = np.ones_like(difference)
+    running_mean = np.cumsum(difference[:, 1:], axis=1) / np.arange(1, n_lags)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cmnd[:, 1:] = np.where(running_mean > 0, difference[:, 1:] / running_mean, 1.0)
+    return cmnd
+
+
+def yin_frames(
+    frames: np.ndarray,
+    sr: int,
+    fmin: float,
+    fmax: float,
+    threshold: float = 0.1,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    YIN estimate of every row of frames, in whole-array operations.
+
+    Rows can come from one signal (YinEngine) or from many (live sessions
+    batched together, see live.py).
+
+    Args:
+        frames: Frames, shape (n_frames, frame_length); frame_length must
+                exceed sr / fmin + 1
+        sr: Sample rate of the frames
+        fmin: Lowest frequency searched
+        fmax: Highest frequency searched
+        threshold: YIN's absolute threshold
+
+    Returns:
+        (frequencies, confidences, voiced), one entry per frame;
+        frequencies and confidences of unvoiced frames are meaningless
+    """
+    min_lag = max(int(np.floor(sr / fmax)), 2)
+    max_lag = int(np.ceil(sr / fmin))
+    cmnd = cumulative_mean_normalized_difference(frames, max_lag)
+
+    # YIN takes the first dip below the threshold and follows it down: that
+    # is the first lag below the threshold whose successor is no smaller (or
+    # the last lag searched)
+    search = cmnd[:, min_lag:max_lag + 1]
+    stops = cmnd[:, min_lag + 1:max_lag + 2] >= search
+    stops[:, -1] = True
+    candidates = (search < threshold) & stops
+    has_dip = candidates.any(axis=1)
+    lag = np.argmax(candidates, axis=1) + min_lag
+
+    rows = np.arange(len(frames))
+    best = cmnd[rows, lag]
+    period = lag + parabolic_offset(cmnd[rows, lag - 1], best, cmnd[rows, lag + 1])
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    voiced = has_dip & (rms > SILENCE_RMS)
+    return sr / period, np.clip(1.0 - best, 0.0, 1.0), voiced
+
+
+class YinEngine(PitchEngine):
+    """
+    YIN pitch estimation, vectorized across frames.
+
+    The signal is framed as a strided view and processed ENGINE_BLOCK_FRAMES
+    frames at a time, so memory stays bounded on long tracks; within a block
+    every step (difference function, threshold search, interpolation) is a
+    whole-array NumPy operation.
+
+    Args:
+        threshold: Largest cumulative mean normalized difference accepted
+                   as periodic (YIN's absolute threshold)
+    """
+
+    name = 'yin'
+
+    def __init__(self, threshold: float = 0.1):
+        super().__init__()
+        self.threshold = threshold
+
+    def track(self, y: np.ndarray, sr: int, center: bool = True, first_frame: int = 0) -> PitchContour:
+        frames = frame_signal(y, self.frame_length, self.hop_length, center)
+
+        times, frequencies, confidences = [], [], []
+        for start in range(0, len(frames), ENGINE_BLOCK_FRAMES):
+            block = frames[start:start + ENGINE_BLOCK_FRAMES]
+            frequency, confidence, voiced = yin_frames(block, sr, self.fmin, self.fmax, self.threshold)
+
+            times.append(np.flatnonzero(voiced) + start)
+            frequencies.append(frequency[voiced])
+            confidences.append(confidence[voiced])
+
+        frames_voiced = np.concatenate(times) if times else np.empty(0, dtype=int)
+        return PitchContour(
+            self._frame_times(frames_voiced, sr, first_frame),
+            np.concatenate(frequencies) if frequencies else [],
+            np.concatenate(confidences) if confidences else [],
+        )
+
+
+class AutocorrelationEngine(PitchEngine):
+    """
+    Normalized autocorrelation computed with one FFT per frame.
+
+    Args:
+        threshold: Smallest normalized autocorrelation peak counted as voiced
+    """
+
+    name = 'autocorr'
+
+    def __init__(self, threshold: float = 0.5):
+        super().__init__()
+        self.threshold = threshold
+
+    def track(self, y: np.ndarray, sr: int, center: bool = True, first_frame: int = 0) -> PitchContour:
+        frames = frame_signal(y, self.frame_length, self.hop_length, center)
+        min_lag = max(int(np.floor(sr / self.fmax)), 1)
+        max_lag = int(np.ceil(sr / self.fmin))
+        n_fft = 2 * self.frame_length
+        # Undo the taper of the biased estimate so long lags are not penalized
+        overlap = (self.frame_length - np.arange(max_lag + 2)) / self.frame_length
+
+        times, frequencies, confidences = [], [], []
+        for start in range(0, len(frames), ENGINE_BLOCK_FRAMES):
+            block = frames[start:start + ENGINE_BLOCK_FRAMES]
+            block = block - block.mean(axis=1, keepdims=True)
+            spectrum = np.fft.rfft(block, n=n_fft, axis=1)
+            correlation = np.fft.irfft(np.abs(spectrum) ** 2, n=n_fft, axis=1)[:, :max_lag + 2]
+            energy = correlation[:, :1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                normalized = np.where(energy > 0, correlation / (energy * overlap), 0.0)
+
+            # Shortest lag whose peak is close to the best one avoids octave-down errors
+            search = normalized[:, min_lag:max_lag + 1]
+            best = search.max(axis=1)
+            is_peak = np.zeros_like(search, dtype=bool)
+            is_peak[:, 1:-1] = (search[:, 1:-1] >= search[:, :-2]) & (search[:, 1:-1] >= search[:, 2:])
+            candidate = is_peak & (search >= 0.9 * best[:, None])
+            has_peak = candidate.any(axis=1)
+            lag = np.argmax(candidate, axis=1) + min_lag
+
+            rows = np.arange(len(block))
+            peak = normalized[rows, lag]
+            rms = np.sqrt(energy[:, 0] / self.frame_length)
+            voiced = has_peak & (peak > self.threshold) & (rms > SILENCE_RMS)
+            period = lag + parabolic_offset(normalized[rows, lag - 1], peak, normalized[rows, lag + 1])
+
+            times.append(np.arange(start, start + len(block))[voiced])
+            frequencies.append(sr / period[voiced])
+            confidences.append(np.clip(peak[voiced], 0.0, 1.0))
+
+        frames_voiced = np.concatenate(times) if times else np.empty(0, dtype=int)
+        return PitchContour(
+            self._frame_times(frames_voiced, sr, first_frame),
+            np.concatenate(frequencies) if frequencies else [],
+            np.concatenate(confidences) if confidences else [],
+        )
+
+
+PITCH_ENGINES: Dict[str, PitchEngine] = {}
+
+
+def register_engine(engine: PitchEngine) -> PitchEngine:
+    """Make engine selectable by its name."""
+    PITCH_ENGINES[engine.name] = engine
+    return engine
+
+
+def get_engine(name: str) -> PitchEngine:
+    """
+    Look up a registered engine.
+
+    Raises:
+        ValueError: If no engine is registered under name
+    """
+    try:
+        return PITCH_ENGINES[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown pitch engine '{name}', expected one of {', '.join(PITCH_ENGINES)}"
+        ) from None
+
+
+for _engine in (PiptrackEngine(), PyinEngine(), YinEngine(), AutocorrelationEngine()):
+    register_engine(_engine)
+
+
+def default_engine_from_env() -> str:
+    """Default engine name from PITCH_ENGINE (default 'piptrack')."""
+    name = os.getenv('PITCH_ENGINE', DEFAULT_ENGINE)
+    get_engine(name)
+    return name
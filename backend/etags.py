@@ -0,0 +1,54 @@
+"""
+Entity tags for extraction results.
+
+Extraction is deterministic for a given cache key (video, parameters and
+pipeline version), so the key itself identifies the representation and an
+ETag can be computed, and an If-None-Match answered, before running the
+pipeline.
+
+CompressionMiddleware appends the content coding to strong tags
+("<tag>-gzip"), as the compressed bytes are a different representation;
+etag_matches ignores that suffix so revalidation works for either.
+"""
+from typing import Optional
+
+ENCODING_SUFFIXES = ('-gzip', '-br')
+
+
+def make_etag(cache_key: str, variant: str) -> str:
+    """Strong ETag for the variant ('json', 'binary', ...) of a cached result."""
+    return f'"{cache_key[:32]}-{variant}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the representation compressed with encoding ('gzip' or 'br')."""
+    if etag.startswith('W/') or not etag.endswith('"'):
+        # Weak tags already tolerate byte-level differences
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)]
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against etag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, and
+    treats tags that differ only by a content-coding suffix as equal.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    target = _opaque(etag)
+    return any(_opaque(tag) == target for tag in if_none_match.split(',') if tag.strip())
@@ -0,0 +1,228 @@
+"""
+Asynchronous extraction jobs with request coalescing.
+
+SingleFlight makes concurrent callers asking for the same key share one
+in-flight computation. JobManager wraps work in pollable jobs so clients do
+not have to hold an HTTP connection open for the whole pipeline.
+map_unordered fans a batch of work out with bounded concurrency.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent async computations by key.
+
+    The first caller for a key starts the computation; callers arriving while
+    it is in flight await the same task. The task is shielded, so a caller
+    that disconnects does not cancel work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        """Return True if a computation for key is currently running."""
+        return key in self._in_flight
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() for key, or join the computation already in flight.
+
+        Args:
+            key: Deduplication key
+            func: Zero-argument coroutine function performing the work
+
+        Returns:
+            The result of the shared computation (exceptions propagate to
+            every caller)
+        """
+        return await asyncio.shield(self.start(key, func))
+
+    def start(self, key: str, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Start func() for key unless a computation for key is in flight.
+
+        Unlike do(), this registers the computation before returning, so a
+        caller that also consumes side output of func() knows it is its own
+        when in_flight(key) was False.
+
+        Returns:
+            The task computing key; await it through asyncio.shield
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return task
+
+
+class Job:
+    """State of one submitted extraction job."""
+
+    __slots__ = ('id', 'status', 'params', 'result', 'error',
+                 'created_at', 'finished_at', 'coalesced', '_task')
+
+    def __init__(self, params: Dict[str, Any], coalesced: bool = False):
+        self.id = uuid.uuid4().hex
+        self.status = JOB_PENDING
+        self.params = params
+        self.result: Optional[Any] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.coalesced = coalesced
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job for the status endpoint."""
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'coalesced': self.coalesced,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == JOB_DONE:
+            data['result'] = self.result
+        elif self.status == JOB_FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Registry of extraction jobs.
+
+    Finished jobs are kept for result_ttl seconds so clients can collect
+    them; the registry is capped at max_jobs entries, dropping the oldest
+    finished jobs first.
+    """
+
+    def __init__(self, max_jobs: int = 10000, result_ttl: float = 3600):
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def submit(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        params: Dict[str, Any],
+        coalesced: bool = False,
+    ) -> Job:
+        """
+        Start func() in the background and return its job.
+
+        Must be called from within the running event loop.
+        """
+        self._prune()
+        job = Job(params, coalesced=coalesced)
+        self._jobs[job.id] = job
+        job._task = asyncio.ensure_future(self._run(job, func))
+        return job
+
+    def completed(self, result: Any, params: Dict[str, Any]) -> Job:
+        """Register a job whose result is already available (e.g. cached)."""
+        self._prune()
+        job = Job(params)
+        job.status = JOB_DONE
+        job.result = result
+        job.finished_at = job.created_at
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with job_id, or None if unknown or expired."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: Job, func: Callable[[], Awaitable[Any]]) -> None:
+        job.status = JOB_RUNNING
+        try:
+            job.result = await func()
+            job.status = JOB_DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            job._task = None
+
+    def _prune(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at + self.result_ttl <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+        if len(self._jobs) < self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+            del self._jobs[job_id]
+            if len(self._jobs) < self.max_jobs:
+                break
+
+
+async def map_unordered(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    limit: int,
+) -> AsyncIterator[Tuple[int, Any, Optional[Exception]]]:
+    """
+    Run func(item) for every item, at most limit at a time.
+
+    Items are started lazily as earlier ones finish, so a long batch never
+    holds more than limit results in memory. Closing the iterator early
+    cancels the items still running.
+
+    Yields:
+        (index, result, error) in completion order; error is None on success
+        and result is None on failure
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    pending: Dict[asyncio.Task, int] = {}
+    iterator = enumerate(items)
+
+    def start_next() -> bool:
+        for index, item in iterator:
+            pending[asyncio.ensure_future(func(item))] = index
+            return True
+        return False
+
+    try:
+        while len(pending) < limit and start_next():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                error = task.exception()
+                yield index, None if error else task.result(), error
+                start_next()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,432 @@
+"""
+Live pitch sessions for server-side microphone analysis (/ws/pitch).
+
+A LivePitchSession receives little-endian PCM in chunks of any size (as
+sent by the browser), keeps the samples in a bounded buffer and estimates
+the pitch of every new hop with YIN (engines.yin_frames) on the last
+frame_length samples. Frames are short (LIVE_FRAME_SECONDS) and the
+estimate of a hop is a single FFT-based YIN pass, so each hop costs well
+under a millisecond on one core.
+
+Backpressure: at most max_pending_hops unprocessed hops are kept. When a
+client sends audio faster than it is analyzed (or reads results slower
+than they are produced), the oldest hops are skipped and counted in
+dropped_hops, so latency and memory stay bounded instead of growing.
+
+With many sessions connected, the fixed cost of a NumPy call per session
+and hop dominates the arithmetic. LiveBatchScheduler collects the pending
+frames of all sessions for up to max_wait seconds (or until max_batch
+frames are waiting), estimates them in one yin_frames call per analysis
+rate and hands every session its own messages back.
+
+The arithmetic itself shrinks by decimating: pitches up to PITCH_FMAX_NOTE
+need far fewer than the 44.1 or 48 kHz browsers send, so each session
+low-passes and downsamples its audio as it arrives (Decimator) to at least
+LIVE_ANALYSIS_MIN_RATE, and YIN runs on frames a third or a quarter as long.
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+import librosa
+import numpy as np
+from scipy.signal import firwin
+
+from engines import PITCH_FMAX_NOTE, PITCH_FMIN_NOTE, yin_frames
+
+# Analysis frame and hop in seconds (converted to samples at the client rate)
+LIVE_FRAME_SECONDS = 0.04
+LIVE_HOP_SECONDS = 0.01
+# Unprocessed hops kept before the oldest are dropped (about half a second)
+LIVE_MAX_PENDING_HOPS = 50
+LIVE_YIN_THRESHOLD = 0.15
+LIVE_MIN_SAMPLE_RATE = 8000
+LIVE_MAX_SAMPLE_RATE = 192000
+# Lowest rate live audio is decimated to before YIN; C7 stays well inside it
+LIVE_ANALYSIS_MIN_RATE = 11000
+# Anti-aliasing filter taps per unit of decimation factor
+LIVE_DECIMATION_TAPS = 9
+# Longest a frame waits for others to join its batch, in seconds
+LIVE_BATCH_MAX_WAIT = 0.005
+# Most frames estimated in one batch
+LIVE_BATCH_MAX_FRAMES = 512
+
+PCM_ENCODINGS = {
+    'float32': (np.dtype('<f4'), 1.0),
+    'int16': (np.dtype('<i2'), 1.0 / 32768),
+}
+
+
+def live_decimation(sample_rate: int, min_rate: float = LIVE_ANALYSIS_MIN_RATE) -> int:
+    """
+    Decimation factor for live audio at sample_rate.
+
+    The largest factor that keeps the rate at or above min_rate and leaves
+    the frame and hop whole numbers of decimated samples of the same
+    duration as at sample_rate, so hop timing does not change; 1 if none.
+    """
+    frame_length = int(round(sample_rate * LIVE_FRAME_SECONDS))
+    hop_length = int(round(sample_rate * LIVE_HOP_SECONDS))
+    for factor in range(int(sample_rate // min_rate), 1, -1):
+        if frame_length % factor == 0 and hop_length % factor == 0:
+            return factor
+    return 1
+
+
+class Decimator:
+    """
+    Streaming anti-aliasing filter and downsampler by an integer factor.
+
+    Samples are filtered with a windowed-sinc FIR cut off at the output
+    Nyquist rate and every factor-th one is kept (the last of each group,
+    so an output exists as soon as its input does). The filter history is
+    carried from one chunk to the next, so the output does not depend on
+    how the input is split.
+
+    Args:
+        factor: Decimation factor (1 passes samples through)
+    """
+
+    def __init__(self, factor: int):
+        self.factor = factor
+        # Symmetric, so it needs no reversal to be applied as a convolution
+        self.taps = (
+            firwin(LIVE_DECIMATION_TAPS * factor + 1, 1.0 / factor).astype(np.float32)
+            if factor > 1 else np.ones(1, dtype=np.float32)
+        )
+        self._history = np.zeros(len(self.taps) - 1, dtype=np.float32)
+        # Input samples since the last kept one
+        self._phase = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Filter and downsample the next chunk of samples."""
+        if self.factor == 1 or len(samples) == 0:
+            return samples
+        signal = np.concatenate([self._history, samples.astype(np.float32, copy=False)])
+        first = (self.factor - 1 - self._phase) % self.factor
+        count = len(range(first, len(samples), self.factor))
+        self._phase = (self._phase + len(samples)) % self.factor
+        self._history = signal[len(signal) - len(self._history):]
+        # The filter windows ending at the kept samples, signal[first + i * factor:][:len(taps)];
+        # multiplied as a contiguous copy, which is faster than a strided view
+        itemsize = signal.itemsize
+        windows = np.ndarray(
+            (count, len(self.taps)), signal.dtype, signal, first * itemsize,
+            (self.factor * itemsize, itemsize),
+        )
+        return windows.copy() @ self.taps
+
+
+class LivePitchSession:
+    """
+    Incremental pitch estimation over a stream of PCM chunks.
+
+    Feed audio with push() and collect the estimates of the hops that are
+    complete with estimate() (or take_frames() plus estimate_frames() when
+    frames from many sessions are processed together).
+
+    Args:
+        sample_rate: Sample rate of the incoming audio in Hz
+        encoding: PCM sample format, one of PCM_ENCODINGS
+        max_pending_hops: Unprocessed hops kept before dropping the oldest
+        min_analysis_rate: Lowest rate the audio is decimated to (see
+                           live_decimation); sample_rate keeps it as is
+
+    Raises:
+        ValueError: If sample_rate or encoding is not supported
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        encoding: str = 'float32',
+        max_pending_hops: int = LIVE_MAX_PENDING_HOPS,
+        min_analysis_rate: float = LIVE_ANALYSIS_MIN_RATE,
+    ):
+        if not LIVE_MIN_SAMPLE_RATE <= sample_rate <= LIVE_MAX_SAMPLE_RATE:
+            raise ValueError(
+                f"sample_rate must be between {LIVE_MIN_SAMPLE_RATE} and {LIVE_MAX_SAMPLE_RATE} Hz"
+            )
+        if encoding not in PCM_ENCODINGS:
+            raise ValueError(f"unknown encoding '{encoding}', expected one of {', '.join(PCM_ENCODINGS)}")
+
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        # Frame and hop in client samples, as reported to the client
+        self.frame_length = int(round(sample_rate * LIVE_FRAME_SECONDS))
+        self.hop_length = int(round(sample_rate * LIVE_HOP_SECONDS))
+        self.decimation = live_decimation(sample_rate, min_analysis_rate)
+        self.analysis_rate = sample_rate / self.decimation
+        self.max_pending_hops = max_pending_hops
+        self.fmin = librosa.note_to_hz(PITCH_FMIN_NOTE)
+        self.fmax = librosa.note_to_hz(PITCH_FMAX_NOTE)
+        self.dropped_hops = 0
+
+        # The buffer holds decimated samples; frames and hops in those units
+        self._decimator = Decimator(self.decimation)
+        self._frame = self.frame_length // self.decimation
+        self._hop = self.hop_length // self.decimation
+        self._window = self._frame + max_pending_hops * self._hop
+        self._buffer = np.zeros(2 * self._window + self._hop, dtype=np.float32)
+        # Buffer positions of the next frame's first sample and of the end
+        self._start = 0
+        self._end = 0
+        # Stream index of the next frame
+        self._next_frame = 0
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        """
+        Samples of a binary message in the session's encoding.
+
+        Raises:
+            ValueError: If the payload is not a whole number of samples
+        """
+        dtype, scale = PCM_ENCODINGS[self.encoding]
+        if len(payload) % dtype.itemsize:
+            raise ValueError(f"{self.encoding} payloads must be a multiple of {dtype.itemsize} bytes")
+        samples = np.frombuffer(payload, dtype=dtype).astype(np.float32)
+        if scale != 1.0:
+            samples *= scale
+        return samples
+
+    def push(self, payload: bytes) -> None:
+        """Append a binary PCM message (see decode)."""
+        self.push_samples(self.decode(payload))
+
+    def push_samples(self, samples: np.ndarray) -> None:
+        """Append samples, dropping the oldest hops beyond max_pending_hops."""
+        samples = self._decimator.process(samples)
+        # Chunks larger than the window only keep their tail anyway
+        for offset in range(0, len(samples), self._window):
+            self._append(samples[offset:offset + self._window])
+
+    def _append(self, samples: np.ndarray) -> None:
+        if self._end + len(samples) > len(self._buffer):
+            # Compact: move the unconsumed samples to the front
+            kept = self._end - self._start
+            self._buffer[:kept] = self._buffer[self._start:self._end]
+            self._start, self._end = 0, kept
+        self._buffer[self._end:self._end + len(samples)] = samples
+        self._end += len(samples)
+
+        excess = self.pending_hops - self.max_pending_hops
+        if excess > 0:
+            self._start += excess * self._hop
+            self._next_frame += excess
+            self.dropped_hops += excess
+
+    @property
+    def pending_hops(self) -> int:
+        """Number of complete frames not yet estimated."""
+        available = self._end - self._start - self._frame
+        return available // self._hop + 1 if available >= 0 else 0
+
+    def take_frames(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Remove the complete frames from the buffer.
+
+        Returns:
+            (times, frames): centre time of each frame in seconds since the
+            session started, and a (n, frame) array of the decimated frames
+        """
+        count = self.pending_hops
+        if count == 0:
+            return np.empty(0), np.empty((0, self._frame), dtype=np.float32)
+
+        if count == 1:
+            # The common case of one hop per message, without building a view
+            frames = self._buffer[self._start:self._start + self._frame].reshape(1, -1).copy()
+        else:
+            frames = np.lib.stride_tricks.sliding_window_view(
+                self._buffer[self._start:self._end], self._frame
+            )[::self._hop][:count].copy()
+        indices = self._next_frame + np.arange(count)
+        times = (indices * self.hop_length + self.frame_length / 2) / self.sample_rate
+
+        self._start += count * self._hop
+        self._next_frame += count
+        return times, frames
+
+    def estimate_frames(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(frequencies, confidences, voiced) of frames taken from this session."""
+        return yin_frames(frames, self.analysis_rate, self.fmin, self.fmax, LIVE_YIN_THRESHOLD)
+
+    def estimate(self) -> List[Dict]:
+        """Estimate every complete hop and return them as pitch messages."""
+        times, frames = self.take_frames()
+        if len(frames) == 0:
+            return []
+        return pitch_messages(times, *self.estimate_frames(frames))
+
+
+def pitch_messages(
+    times: np.ndarray,
+    frequencies: np.ndarray,
+    confidences: np.ndarray,
+    voiced: np.ndarray,
+) -> List[Dict]:
+    """WebSocket messages of hop estimates; unvoiced hops have frequency None."""
+    return [
+        {
+            'type': 'pitch',
+            'time': round(time, 4),
+            'frequency': round(frequency, 2) if is_voiced else None,
+            'confidence': round(confidence, 3) if is_voiced else 0.0,
+        }
+        for time, frequency, confidence, is_voiced in zip(
+            times.tolist(), frequencies.tolist(), confidences.tolist(), voiced.tolist()
+        )
+    ]
+
+
+def estimate_sessions(
+    requests: List[Tuple[LivePitchSession, np.ndarray, np.ndarray]],
+) -> List[List[Dict]]:
+    """
+    Estimate frames taken from many sessions in one pass per analysis rate.
+
+    Args:
+        requests: (session, times, frames) from each session's take_frames()
+
+    Returns:
+        The pitch messages of each request, in request order (identical to
+        what each session's estimate() would have produced)
+    """
+    results: List[List[Dict]] = [[] for _ in requests]
+    by_rate: Dict[int, List[int]] = {}
+    for index, (session, _, frames) in enumerate(requests):
+        if len(frames):
+            by_rate.setdefault(session.analysis_rate, []).append(index)
+
+    for indices in by_rate.values():
+        session = requests[indices[0]][0]
+        frames = np.concatenate([requests[index][2] for index in indices])
+        times = np.concatenate([requests[index][1] for index in indices])
+        # One message list for the whole batch, sliced back per request
+        messages = pitch_messages(times, *session.estimate_frames(frames))
+        offset = 0
+        for index in indices:
+            count = len(requests[index][2])
+            results[index] = messages[offset:offset + count]
+            offset += count
+    return results
+
+
+class LiveBatchScheduler:
+    """
+    Micro-batches the pending frames of all live sessions.
+
+    Sessions await estimate(session) instead of calling session.estimate().
+    The first request of a batch waits up to max_wait seconds for others;
+    the batch then runs (in a thread, so audio keeps being received) as soon
+    as the wait ends or max_batch frames are queued. Requests are never
+    split, so one larger than max_batch forms a batch of its own.
+
+    Args:
+        max_wait: Longest a request waits for its batch to fill, in seconds
+        max_batch: Most frames estimated in one batch
+    """
+
+    def __init__(self, max_wait: float = LIVE_BATCH_MAX_WAIT, max_batch: int = LIVE_BATCH_MAX_FRAMES):
+        if max_wait < 0 or max_batch < 1:
+            raise ValueError("max_wait must be non-negative and max_batch positive")
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.batches = 0
+        self.frames = 0
+        self._queue: List[Tuple[LivePitchSession, np.ndarray, np.ndarray, asyncio.Future]] = []
+        self._queued_frames = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def estimate(self, session: LivePitchSession) -> List[Dict]:
+        """Estimate every complete hop of session in the next batch."""
+        times, frames = session.take_frames()
+        if len(frames) == 0:
+            return []
+        self._ensure_running()
+        future = self._loop.create_future()
+        self._queue.append((session, times, frames, future))
+        self._queued_frames += len(frames)
+        self._wakeup.set()
+        return await future
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            # First use, or the scheduler outlived the loop it ran on
+            self._loop = loop
+            self._queue, self._queued_frames = [], 0
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            deadline = self._loop.time() + self.max_wait
+            while self._queued_frames < self.max_batch:
+                self._wakeup.clear()
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            self._wakeup.clear()
+
+            batch = self._take_batch()
+            try:
+                results = await asyncio.to_thread(
+                    estimate_sessions, [(session, times, frames) for session, times, frames, _ in batch]
+                )
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self.batches += 1
+                self.frames += sum(len(frames) for _, _, frames, _ in batch)
+                for (*_, future), messages in zip(batch, results):
+                    if not future.done():
+                        future.set_result(messages)
+            if self._queue:
+                self._wakeup.set()
+
+    def _take_batch(self) -> List[Tuple[LivePitchSession, np.ndarray, np.ndarray, asyncio.Future]]:
+        count, frames = 0, 0
+        for _, _, request_frames, _ in self._queue:
+            if count and frames + len(request_frames) > self.max_batch:
+                break
+            count += 1
+            frames += len(request_frames)
+        batch, self._queue = self._queue[:count], self._queue[count:]
+        self._queued_frames -= frames
+        return batch
+
+    async def close(self) -> None:
+        """Stop the batching task and cancel the requests still queued."""
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        for *_, future in self._queue:
+            future.cancel()
+        self._queue, self._queued_frames = [], 0
+
+
+def live_scheduler_from_env() -> LiveBatchScheduler:
+    """
+    Build the live batch scheduler from environment variables.
+
+    PITCH_LIVE_BATCH_WAIT_MS (default 5) and PITCH_LIVE_BATCH_FRAMES
+    (default 512) override the defaults.
+    """
+    return LiveBatchScheduler(
+        max_wait=float(os.getenv('PITCH_LIVE_BATCH_WAIT_MS', str(LIVE_BATCH_MAX_WAIT * 1000))) / 1000,
+        max_batch=int(os.getenv('PITCH_LIVE_BATCH_FRAMES', str(LIVE_BATCH_MAX_FRAMES))),
+    )
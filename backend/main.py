@@ -1,19 +1,97 @@
+import asyncio
+import json
 import os
 import tempfile
-import numpy as np
-import librosa
-import bisect
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, field_validator
-import yt_dlp
-from typing import Optional, List, Dict
-from scipy.signal import medfilt
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from typing import Annotated, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional
+from cache import cache_from_env, make_cache_key, normalize_video_id
+from workers import pools_from_env
+from jobs import JobManager, SingleFlight, JOB_DONE, map_unordered
+from encoding import BINARY_MEDIA_TYPE, encode_contour_binary, encode_contour_compact, wants_binary
+from compression import CompressionMiddleware, DEFAULT_MINIMUM_SIZE
+from etags import etag_matches, make_etag
+from streaming import STREAM_BLOCK_FRAMES, StreamingPitchTracker, stream_step
+from audio_source import AudioDecodeError, AudioSource, decode_audio, decode_blocks, resolve_audio_source
+from uploads import (
+    MULTIPART_OVERHEAD_BYTES,
+    UPLOAD_FIELD,
+    EmptyUpload,
+    MalformedUpload,
+    MissingUpload,
+    UploadTooLarge,
+    max_upload_bytes_from_env,
+    spool_multipart,
+    upload_source_id,
+)
+from contour import PitchContour
+from downsampling import downsample_contour
+from engines import (
+    PIPTRACK_HOP_LENGTH,
+    PITCH_FMAX_NOTE,
+    PITCH_FMIN_NOTE,
+    default_engine_from_env,
+    get_engine,
+)
+from pyramid import PYRAMID_LEVELS, ContourPyramid
+from tracks import TrackIndex, parse_track_id
+from notes import NOTES_VERSION, segment_notes
+from live import LIVE_MAX_SAMPLE_RATE, LIVE_MIN_SAMPLE_RATE, LivePitchSession, live_scheduler_from_env
+from scoring import (
+    OFFSET_MAX_LAG_SECONDS,
+    SCORE_BAND_SECONDS,
+    SCORE_SEGMENT_SECONDS,
+    SCORE_TOLERANCE_CENTS,
+    estimate_offset,
+    score_contours,
+)
+from midi import MIDI_MEDIA_TYPE, MIDI_TEMPO_BPM, MIDI_TICKS_PER_BEAT, write_midi
+from pipeline import (
+    MAX_PITCH_POINTS,
+    ANALYSIS_SAMPLE_RATE,
+    SMOOTHING_KERNEL_SIZE,
+    PIPELINE_VERSION,
+    smooth_pitch_contour,
+    resample_pitch_contour,
+    analyze_samples,
+)
+
+# Extraction results, keyed by video ID and pipeline parameters
+result_cache = cache_from_env()
+
+# yt-dlp lookup threads and analysis processes; blocking work never runs on the event loop
+worker_pools = pools_from_env()
+
+# Largest accepted audio upload
+max_upload_bytes = max_upload_bytes_from_env()
+
+# Pitch engine used when a request does not name one
+default_engine = default_engine_from_env()
+
+# Batch items downloading at once (another as many may be in analysis)
+batch_concurrency = int(os.getenv("PITCH_BATCH_CONCURRENCY", "0")) or os.cpu_count() or 1
+MAX_BATCH_ITEMS = 1000
+
+# Concurrent requests for the same video share one in-flight analysis
+extraction_flights = SingleFlight()
+job_manager = JobManager()
+
+# Live sessions' frames are estimated together in micro-batches
+live_scheduler = live_scheduler_from_env()
 
-# Maximum allowed pitch points to prevent memory issues
-MAX_PITCH_POINTS = 100000
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await live_scheduler.close()
+    worker_pools.shutdown(wait=False)
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS with secure defaults
 # Allow specific origins from environment variable or default to restrictive
@@ -30,8 +108,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Upload-Id"],
+)
+
+# gzip/brotli for bodies above the threshold (a full contour is tens of kB of JSON)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("PITCH_COMPRESSION_MIN_BYTES", DEFAULT_MINIMUM_SIZE)),
 )
 
+# Results are immutable per ETag, so browsers may reuse them for a while and
+# revalidate cheaply afterwards
+RESULT_CACHE_CONTROL = 'public, max-age=3600'
+
 class YouTubeRequest(BaseModel):
     url: str
     
@@ -42,238 +131,1561 @@ class YouTubeRequest(BaseModel):
             raise ValueError('URL cannot be empty')
         return v
 
+class BatchItem(BaseModel):
+    """One batch entry: a YouTube URL or the X-Upload-Id of an earlier upload."""
+    url: Optional[str] = None
+    upload_id: Optional[str] = Field(default=None, pattern='^[0-9a-f]{64}$')
+
+    @model_validator(mode='after')
+    def exactly_one_source(self):
+        if (self.url is None) == (self.upload_id is None):
+            raise ValueError("each item needs exactly one of 'url' or 'upload_id'")
+        if self.url is not None and not self.url.strip():
+            raise ValueError('URL cannot be empty')
+        return self
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+
+ResampleMode = Literal['nearest', 'linear', 'mean', 'median', 'min', 'max']
+DownsampleMethod = Literal['lttb', 'm4']
+ResponseFormat = Literal['json', 'binary', 'compact']
+JsonFormat = Literal['json', 'compact']
+StreamFormat = Literal['ndjson', 'sse']
+PitchEngineName = Literal['piptrack', 'pyin', 'yin', 'autocorr']
+PcmEncoding = Literal['float32', 'int16']
+
+# Query parameters shared by the extraction and track endpoints
+DEFAULT_RESAMPLE_INTERVAL = 0.5
+ResampleIntervalQuery = Annotated[float, Query(
+    ge=0.1,
+    le=2.0,
+    description="Resampling interval in seconds (0.1 to 2.0)"
+)]
+ResampleModeQuery = Annotated[ResampleMode, Query(
+    description="How points are picked per interval: nearest point, linear "
+                "interpolation, or mean/median/min/max of the interval's points"
+)]
+EngineQuery = Annotated[Optional[PitchEngineName], Query(
+    description="Pitch engine: piptrack (fast), pyin (accurate, slow), yin, or "
+                "autocorr (fastest); defaults to PITCH_ENGINE"
+)]
+DownsampleQuery = Annotated[Optional[DownsampleMethod], Query(
+    description="Instead of resampling, keep a subset of the analysis points that "
+                "draws like the full curve: lttb or m4 (min/max envelope)"
+)]
+PointsQuery = Annotated[Optional[int], Query(
+    ge=3,
+    le=MAX_PITCH_POINTS,
+    description="Point budget for downsample; defaults to the number of "
+                "resample_interval steps in the track"
+)]
+ResponseFormatQuery = Annotated[Optional[ResponseFormat], Query(
+    alias='format',
+    description="Response encoding; overrides the Accept header"
+)]
+JsonFormatQuery = Annotated[Optional[JsonFormat], Query(
+    alias='format',
+    description="Encoding of each contour: 'json' or 'compact' (quantized cents grid)"
+)]
+StreamFormatQuery = Annotated[Optional[StreamFormat], Query(
+    alias='format',
+    description="'ndjson' or 'sse'; defaults to SSE for Accept: text/event-stream"
+)]
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+SSE_MEDIA_TYPE = 'text/event-stream'
+
 class PitchPoint(BaseModel):
     time: float
     frequency: float
 
-def smooth_pitch_contour(pitch_contour, kernel_size=5):
+class ScoreRequest(BaseModel):
+    """A sung contour, timed from the start of the track; frequency 0 marks unvoiced points."""
+    pitch_data: List[PitchPoint] = Field(max_length=MAX_PITCH_POINTS)
+
+def resolve_engine(engine: Optional[str]) -> str:
+    """Name of the engine to use: engine, or the configured default."""
+    return engine or default_engine
+
+
+def analysis_cache_key(url: str, engine: Optional[str] = None) -> str:
+    """Cache key of the smoothed raw contour, shared by every resample_interval."""
+    return source_analysis_key(normalize_video_id(url), engine)
+
+
+def result_cache_key(
+    url: str,
+    resample_interval: float,
+    resample_mode: str = 'nearest',
+    engine: Optional[str] = None,
+    downsample: Optional[str] = None,
+    points: Optional[int] = None,
+) -> str:
+    """Cache key of a resampled (or downsampled) extraction result."""
+    return source_result_key(
+        normalize_video_id(url), resample_interval, resample_mode, engine, downsample, points
+    )
+
+
+def source_cache_key(source_id: str, kind: str, engine: Optional[str] = None, **params) -> str:
     """
-    Apply median filtering to smooth pitch contour
-    
-    Args:
-        pitch_contour: List of pitch points with 'time' and 'frequency' keys
-        kernel_size: Size of the median filter window (odd number, default 5)
-    
-    Returns:
-        Smoothed pitch contour
+    Cache key of one kind of data derived from any audio identifier (video
+    ID or upload hash).
+
+    Every kind depends on the analysis parameters and the pitch engine;
+    params adds the kind's own.
     """
-    if len(pitch_contour) < kernel_size:
-        return pitch_contour
-    
-    # Extract frequencies
-    frequencies = np.array([p['frequency'] for p in pitch_contour])
-    
-    # Apply median filter
-    smoothed_frequencies = medfilt(frequencies, kernel_size=kernel_size)
-    
-    # Reconstruct pitch contour with smoothed frequencies
-    smoothed_contour = []
-    for i, point in enumerate(pitch_contour):
-        smoothed_contour.append({
-            'time': point['time'],
-            'frequency': float(smoothed_frequencies[i])
-        })
-    
-    return smoothed_contour
+    return make_cache_key(
+        source_id,
+        kind=kind,
+        sample_rate=ANALYSIS_SAMPLE_RATE,
+        fmin=PITCH_FMIN_NOTE,
+        fmax=PITCH_FMAX_NOTE,
+        kernel_size=SMOOTHING_KERNEL_SIZE,
+        pitch_engine=get_engine(resolve_engine(engine)).cache_tag,
+        engine_version=PIPELINE_VERSION,
+        **params,
+    )
+
+
+def source_analysis_key(source_id: str, engine: Optional[str] = None) -> str:
+    """analysis_cache_key for any audio identifier (video ID or upload hash)."""
+    return source_cache_key(source_id, 'analysis', engine)
 
 
-def resample_pitch_contour(
-    pitch_contour: List[Dict[str, float]],
-    interval: float = 0.5
-) -> List[Dict[str, float]]:
+def source_result_key(
+    source_id: str,
+    resample_interval: float,
+    resample_mode: str = 'nearest',
+    engine: Optional[str] = None,
+    downsample: Optional[str] = None,
+    points: Optional[int] = None,
+) -> str:
+    """result_cache_key for any audio identifier (video ID or upload hash)."""
+    params = {}
+    if downsample is not None:
+        # Only downsampled results carry these, so other keys stay unchanged
+        params.update(downsample=downsample, points=points)
+    return source_cache_key(
+        source_id, 'result', engine,
+        resample_interval=resample_interval, resample_mode=resample_mode, **params,
+    )
+
+
+def pyramid_cache_key(url: str, resample_mode: str = 'nearest', engine: Optional[str] = None) -> str:
+    """Cache key of the contour pyramid of a video for one resampling mode."""
+    return source_pyramid_key(normalize_video_id(url), resample_mode, engine)
+
+
+def source_pyramid_key(source_id: str, resample_mode: str = 'nearest', engine: Optional[str] = None) -> str:
+    """pyramid_cache_key for any audio identifier (video ID or upload hash)."""
+    return source_cache_key(
+        source_id, 'pyramid', engine,
+        resample_mode=resample_mode, levels=','.join(str(level) for level in PYRAMID_LEVELS),
+    )
+
+
+def source_track_key(source_id: str, engine: Optional[str] = None) -> str:
+    """Cache key of the indexed analysis contour (TrackIndex) of a track."""
+    return source_cache_key(source_id, 'track', engine)
+
+
+def source_notes_key(source_id: str, engine: Optional[str] = None) -> str:
+    """Cache key of the note events (see notes.py) of a track."""
+    return source_cache_key(source_id, 'notes', engine, notes_version=NOTES_VERSION)
+
+
+def source_midi_key(source_id: str, engine: Optional[str] = None) -> str:
+    """Cache key of the Standard MIDI File of a track's note events."""
+    return make_cache_key(
+        source_notes_key(source_id, engine),
+        kind='midi',
+        ticks_per_beat=MIDI_TICKS_PER_BEAT,
+        tempo_bpm=MIDI_TEMPO_BPM,
+    )
+
+
+async def get_pitch_analysis(
+    url: str,
+    fetch_limit: Optional[AsyncContextManager] = None,
+    engine: Optional[str] = None,
+) -> Dict:
     """
-    Resample pitch contour to fixed time intervals using binary search.
+    Return the smoothed raw pitch analysis of a video.
 
-    Uses O(n log m) complexity where n is number of target points and m
-    is number of original points. The binary search efficiently finds
-    the closest time point for each target interval.
+    Served from the cache when possible; otherwise the download and analysis
+    run once, however many requests for the same video arrive meanwhile.
+    fetch_limit, if given, is held while downloading and decoding only, so
+    the next download can start while this one is analyzed. engine names
+    the pitch engine (default: the configured one).
+    """
+    async def load_samples():
+        async with fetch_limit or nullcontext():
+            # Resolve the stream on an I/O thread, then decode it through an
+            # ffmpeg pipe while it downloads
+            source = await worker_pools.run_io(resolve_audio_source, url)
+            return await decode_audio(source)
 
-    Args:
-        pitch_contour: List of {time, frequency} dicts, sorted by time
-        interval: Time interval in seconds (default 0.5)
+    return await get_cached_analysis(analysis_cache_key(url, engine), load_samples, engine)
 
-    Returns:
-        Resampled pitch contour with points at regular intervals
 
-    Raises:
-        ValueError: If interval is not positive, input structure is invalid,
-                    or input contains NaN/Inf values
-    """
-    # Handle None input
-    if pitch_contour is None:
-        return []
-
-    # Handle empty input
-    if not pitch_contour:
-        return []
-
-    # Validate interval parameter
-    if interval <= 0:
-        raise ValueError("interval must be a positive number")
-
-    # Validate input structure: all elements must be dicts with required keys
-    for i, point in enumerate(pitch_contour):
-        if not isinstance(point, dict):
-            raise ValueError(f"pitch_contour[{i}]: expected dict, got {type(point).__name__}")
-        if 'time' not in point:
-            raise ValueError(f"pitch_contour[{i}]: missing required 'time' key")
-        if 'frequency' not in point:
-            raise ValueError(f"pitch_contour[{i}]: missing required 'frequency' key")
-
-    # Validate numeric types for required keys
-    for i, point in enumerate(pitch_contour):
-        if not isinstance(point['time'], (int, float)):
-            raise ValueError(f"pitch_contour[{i}]: 'time' must be numeric, got {type(point['time']).__name__}")
-        if not isinstance(point['frequency'], (int, float)):
-            raise ValueError(f"pitch_contour[{i}]: 'frequency' must be numeric, got {type(point['frequency']).__name__}")
-
-    # Check input size limit to prevent memory issues
-    if len(pitch_contour) > MAX_PITCH_POINTS:
-        raise ValueError(f"pitch_contour exceeds maximum size of {MAX_PITCH_POINTS} points")
-
-    # Sort by time to ensure order (safety check)
-    sorted_contour = sorted(pitch_contour, key=lambda p: p['time'])
-
-    # Extract times and frequencies as numpy arrays for efficient operations
-    times = np.array([p['time'] for p in sorted_contour])
-    freqs = np.array([p['frequency'] for p in sorted_contour])
-
-    # Validate that times and frequencies are finite (no NaN or Inf)
-    if not np.isfinite(times).all():
-        raise ValueError("times must be finite numeric values (no NaN or Inf)")
-    if not np.isfinite(freqs).all():
-        raise ValueError("frequencies must be finite numeric values (no NaN or Inf)")
-
-    # Handle single point or short audio (less than interval duration)
-    if len(times) == 1 or times[-1] - times[0] < interval:
-        return [{'time': float(times[0]), 'frequency': float(freqs[0])}]
-
-    # Generate target times starting from first interval point
-    start_time = times[0]
-    end_time = times[-1]
-    target_times = np.arange(start_time + interval, end_time, interval)
-
-    resampled = []
-    for target in target_times:
-        # Binary search to find closest time point
-        idx = bisect.bisect_left(times, target)
-
-        # Handle edge cases at boundaries
-        if idx == 0:
-            closest_freq = float(freqs[0])
-        elif idx >= len(times):
-            closest_freq = float(freqs[-1])
-        else:
-            # Compare neighbors to find closest
-            if abs(times[idx] - target) <= abs(times[idx - 1] - target):
-                closest_freq = float(freqs[idx])
-            else:
-                closest_freq = float(freqs[idx - 1])
+async def get_cached_analysis(
+    key: str,
+    load_samples: Callable[[], Awaitable],
+    engine: Optional[str] = None,
+) -> Dict:
+    """
+    Return the analysis stored under key, computing it at most once.
+
+    load_samples decodes the audio; the analysis itself runs in a worker
+    process with the given engine and is cached under key.
+    """
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def compute():
+        samples = await load_samples()
+        analysis = await worker_pools.run_cpu(
+            analyze_samples, samples, ANALYSIS_SAMPLE_RATE, resolve_engine(engine)
+        )
+        result_cache.put(key, analysis)
+        return analysis
+
+    return await extraction_flights.do(key, compute)
+
+
+async def get_pitch_pyramid(
+    url: str,
+    resample_mode: str = 'nearest',
+    fetch_limit: Optional[AsyncContextManager] = None,
+    engine: Optional[str] = None,
+) -> Dict:
+    """Return the pyramid entry of a video, analyzing it if needed."""
+    return await get_cached_pyramid(
+        pyramid_cache_key(url, resample_mode, engine),
+        lambda: get_pitch_analysis(url, fetch_limit, engine),
+        resample_mode,
+    )
+
+
+async def get_cached_pyramid(
+    key: str,
+    get_analysis: Callable[[], Awaitable[Dict]],
+    resample_mode: str,
+) -> Dict:
+    """
+    Return the pyramid entry stored under key, building it on a miss.
+
+    The entry is the analysis plus a 'pyramid' (ContourPyramid) of its
+    contour, built once per track and mode so every later resample_interval
+    is a level lookup or one resampling of the stored contour.
+    """
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
 
-        resampled.append({
-            'time': float(target),
-            'frequency': closest_freq
-        })
+    analysis = await get_analysis()
+    entry = dict(analysis, pyramid=ContourPyramid(analysis['pitch_contour'], resample_mode))
+    result_cache.put(key, entry)
+    return entry
+
+
+async def get_cached_track(key: str, get_analysis: Callable[[], Awaitable[Dict]]) -> Dict:
+    """
+    Return the track entry stored under key, indexing get_analysis() on a miss.
+
+    The entry is the analysis plus a 'track' (TrackIndex) for window queries.
+    """
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    analysis = await get_analysis()
+    entry = dict(analysis, track=TrackIndex(analysis['pitch_contour']))
+    result_cache.put(key, entry)
+    return entry
+
+
+async def get_cached_notes(key: str, get_analysis: Callable[[], Awaitable[Dict]]) -> Dict:
+    """
+    Return the note entry stored under key, segmenting get_analysis() on a miss.
+
+    The entry holds the note events and the summary fields of the analysis,
+    not the contour, so it stays small.
+    """
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    analysis = await get_analysis()
+    notes = await worker_pools.run_cpu(segment_notes, analysis['pitch_contour'])
+    entry = {
+        'notes': notes,
+        'duration': analysis['duration'],
+        'sample_rate': analysis['sample_rate'],
+    }
+    result_cache.put(key, entry)
+    return entry
+
+
+async def get_cached_midi(
+    key: str,
+    get_notes: Callable[[], Awaitable[Dict]],
+    track_name: str = '',
+) -> bytes:
+    """Return the MIDI file stored under key, writing get_notes()'s events on a miss."""
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    entry = await get_notes()
+    midi = write_midi(entry['notes'], track_name=track_name)
+    result_cache.put(key, midi)
+    return midi
+
+
+async def build_pitch_result(
+    url: str,
+    resample_interval: float,
+    resample_mode: str = 'nearest',
+    fetch_limit: Optional[AsyncContextManager] = None,
+    engine: Optional[str] = None,
+    downsample: Optional[str] = None,
+    points: Optional[int] = None,
+) -> Dict:
+    """
+    Produce the resampled extraction result for url.
+
+    The result keeps the contour in columnar form; render_pitch_result turns
+    it into the JSON or binary response body.
+    """
+    return await get_cached_result(
+        result_cache_key(url, resample_interval, resample_mode, engine, downsample, points),
+        lambda: get_pitch_pyramid(url, resample_mode, fetch_limit, engine),
+        resample_interval,
+        resample_mode,
+        engine,
+        downsample,
+        points,
+    )
+
+
+async def get_cached_result(
+    key: str,
+    get_analysis: Callable[[], Awaitable[Dict]],
+    resample_interval: float,
+    resample_mode: str,
+    engine: Optional[str] = None,
+    downsample: Optional[str] = None,
+    points: Optional[int] = None,
+) -> Dict:
+    """
+    Return the result stored under key, resampling get_analysis() on a miss.
+
+    get_analysis may return a pyramid entry (see get_cached_pyramid), whose
+    levels are used when they match resample_interval.
+    """
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    analysis = await get_analysis()
+    result = resampled_result(analysis, resample_interval, resample_mode, engine, downsample, points)
+    result_cache.put(key, result)
+    return result
+
+
+def resampled_result(
+    analysis: Dict,
+    resample_interval: float,
+    resample_mode: str,
+    engine: Optional[str] = None,
+    downsample: Optional[str] = None,
+    points: Optional[int] = None,
+) -> Dict:
+    """
+    Resample an analysis (or pyramid entry) into the cached result form.
+
+    With a downsample method the analysis contour is instead reduced to
+    points of its own points (by default as many as the resample_interval
+    grid has), see downsampling.py. Such results have no grid, so their
+    resample_interval and resample_mode are None.
+    """
+    if downsample is not None:
+        if points is None:
+            points = max(int(round(analysis['duration'] / resample_interval)), 4)
+        return {
+            'pitch_contour': downsample_contour(analysis['pitch_contour'], points, downsample),
+            'grid_start': analysis['pitch_contour'].start_time,
+            'duration': analysis['duration'],
+            'sample_rate': analysis['sample_rate'],
+            'resample_interval': None,
+            'resample_mode': None,
+            'downsample': downsample,
+            'points': points,
+            'engine': resolve_engine(engine),
+        }
+
+    pyramid = analysis.get('pyramid')
+    if pyramid is not None and pyramid.mode == resample_mode:
+        pitch_contour = pyramid.resample(resample_interval)
+    else:
+        pitch_contour = resample_pitch_contour(
+            analysis['pitch_contour'], interval=resample_interval, mode=resample_mode
+        )
+
+    return {
+        'pitch_contour': pitch_contour,
+        # Origin of the resampling grid, used by the binary encoding
+        'grid_start': analysis['pitch_contour'].start_time,
+        'duration': analysis['duration'],
+        'sample_rate': analysis['sample_rate'],
+        'resample_interval': resample_interval,
+        'resample_mode': resample_mode,
+        'engine': resolve_engine(engine),
+    }
+
+
+def pitch_result_json(result: Dict) -> Dict:
+    """JSON body of an extraction result."""
+    body = {
+        'status': 'success',
+        'pitch_data': result['pitch_contour'].to_points(),
+        'duration': result['duration'],
+        'sample_rate': result['sample_rate'],
+        'resample_interval': result['resample_interval'],
+        'resample_mode': result['resample_mode'],
+        'engine': result['engine'],
+    }
+    if result.get('downsample') is not None:
+        body.update(downsample=result['downsample'], points=result['points'])
+    return body
+
+
+def pitch_result_compact(result: Dict) -> Dict:
+    """Quantized JSON body of an extraction result (see encoding.py)."""
+    data = {'status': 'success', 'encoding': 'cents'}
+    data.update(encode_contour_compact(result['pitch_contour'], result['resample_interval']))
+    data.update({
+        'duration': result['duration'],
+        'sample_rate': result['sample_rate'],
+        'resample_interval': result['resample_interval'],
+        'resample_mode': result['resample_mode'],
+        'engine': result['engine'],
+    })
+    return data
+
+
+def pitch_result_body(result: Dict, response_format: Optional[str]) -> Dict:
+    """JSON body of a result in the requested JSON flavour."""
+    if response_format == 'compact':
+        return pitch_result_compact(result)
+    return pitch_result_json(result)
+
+
+def pitch_result_binary(result: Dict) -> Response:
+    """Binary columnar response of an extraction result (see encoding.py)."""
+    payload = encode_contour_binary(
+        result['pitch_contour'],
+        sample_rate=result['sample_rate'],
+        duration=result['duration'],
+        interval=result['resample_interval'],
+        start_time=result['grid_start'],
+    )
+    return Response(content=payload, media_type=BINARY_MEDIA_TYPE, headers={'Vary': 'Accept'})
+
+
+def negotiate_format(http_request: Request, response_format: Optional[str]) -> str:
+    """Resolve the result variant: 'binary', 'compact' or 'json'."""
+    if wants_binary(http_request.headers.get('accept'), response_format):
+        return 'binary'
+    return response_format or 'json'
+
+
+def render_pitch_result(result: Dict, variant: str) -> Response:
+    """
+    Render a result as JSON (default), compact JSON or binary.
+
+    All variants carry Vary: Accept so shared caches keep them apart.
+    """
+    if variant == 'binary':
+        return pitch_result_binary(result)
+    return JSONResponse(pitch_result_body(result, variant), headers={'Vary': 'Accept'})
+
+
+def check_downsample_params(variant: str, downsample: Optional[str], points: Optional[int]) -> None:
+    """
+    Reject downsample parameter combinations with 422.
+
+    Downsampled contours are irregular, so they have no compact (grid)
+    encoding, and points alone would silently be ignored.
+    """
+    if downsample is None:
+        if points is not None:
+            raise HTTPException(status_code=422, detail="points requires a downsample method")
+        return
+    if variant == 'compact':
+        raise HTTPException(status_code=422, detail="format=compact cannot encode downsampled contours")
+    if downsample == 'm4' and points is not None and points < 4:
+        raise HTTPException(status_code=422, detail="m4 needs at least 4 points")
+
+
+def not_modified_response(http_request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """
+    A 304 response if http_request is a GET whose If-None-Match matches
+    headers['ETag'], otherwise None.
+
+    If-None-Match only means "send 304" for safe methods (RFC 9110 13.1.2).
+    """
+    if http_request.method == 'GET' and etag_matches(
+        http_request.headers.get('if-none-match'), headers['ETag']
+    ):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+async def serve_pitch_result(
+    url: str,
+    http_request: Request,
+    resample_interval: float,
+    resample_mode: str,
+    response_format: Optional[str],
+    engine: Optional[str] = None,
+    downsample: Optional[str] = None,
+    points: Optional[int] = None,
+) -> Response:
+    """
+    Build (or fetch) a result and render it with caching headers.
+
+    The ETag comes from the result cache key, so a GET whose If-None-Match
+    matches is answered with 304 before the cache or pipeline is consulted.
+    """
+    variant = negotiate_format(http_request, response_format)
+    check_downsample_params(variant, downsample, points)
+    key = result_cache_key(url, resample_interval, resample_mode, engine, downsample, points)
+    headers = {
+        'ETag': make_etag(key, variant),
+        'Cache-Control': RESULT_CACHE_CONTROL,
+        'Vary': 'Accept',
+    }
+    not_modified = not_modified_response(http_request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        result = await build_pitch_result(
+            url, resample_interval, resample_mode, engine=engine, downsample=downsample, points=points
+        )
+    except Exception as e:
+        print(f"Error processing YouTube URL: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response = render_pitch_result(result, variant)
+    response.headers.update(headers)
+    return response
 
-    return resampled
 
 @app.post("/api/extract-pitch")
 async def extract_pitch(
     request: YouTubeRequest,
-    resample_interval: float = Query(
-        default=0.5, 
-        ge=0.1, 
-        le=2.0, 
-        description="Resampling interval in seconds (0.1 to 2.0)"
-    )
+    http_request: Request,
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    downsample: DownsampleQuery = None,
+    points: PointsQuery = None,
+    response_format: ResponseFormatQuery = None,
 ):
     """
     Extract pitch contour from YouTube video audio.
     
     Pipeline:
     1. Download audio from YouTube
-    2. Extract raw pitch using librosa piptrack
+    2. Extract raw pitch with the selected engine
     3. Apply median filtering for smoothing
     4. Resample to fixed time intervals
     
     Args:
         request: YouTube URL to process
         resample_interval: Time interval for resampling in seconds (default 0.5)
+        resample_mode: Resampling strategy (default 'nearest')
+        engine: Pitch engine (default from PITCH_ENGINE, see engines.py)
+        downsample: 'lttb' or 'm4' to return a display-faithful subset of
+                    the analysis points instead of resampling
+        points: Point budget for downsample
+        response_format: 'json', 'compact' (quantized cents grid) or 'binary';
+                         when omitted, binary is sent only for
+                         Accept: application/octet-stream
+    """
+    return await serve_pitch_result(
+        request.url, http_request, resample_interval, resample_mode, response_format, engine,
+        downsample, points,
+    )
+
+@app.get("/api/extract-pitch")
+async def extract_pitch_get(
+    http_request: Request,
+    url: str = Query(description="YouTube URL to process"),
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    downsample: DownsampleQuery = None,
+    points: PointsQuery = None,
+    response_format: ResponseFormatQuery = None,
+):
+    """
+    Cacheable GET form of POST /api/extract-pitch.
+
+    Supports conditional requests: a matching If-None-Match returns 304
+    without running the pipeline.
+    """
+    try:
+        request = YouTubeRequest(url=url)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await serve_pitch_result(
+        request.url, http_request, resample_interval, resample_mode, response_format, engine,
+        downsample, points,
+    )
+
+def pyramid_json(entry: Dict, response_format: Optional[str], engine: str) -> Dict:
+    """JSON body of a pyramid entry, every level as pitch_data or compact cents."""
+    levels = []
+    for interval, contour in entry['pyramid'].levels.items():
+        if response_format == 'compact':
+            level = {'resample_interval': interval, 'encoding': 'cents'}
+            level.update(encode_contour_compact(contour, interval))
+        else:
+            level = {'resample_interval': interval, 'pitch_data': contour.to_points()}
+        levels.append(level)
+
+    return {
+        'status': 'success',
+        'levels': levels,
+        'duration': entry['duration'],
+        'sample_rate': entry['sample_rate'],
+        'resample_mode': entry['pyramid'].mode,
+        'engine': engine,
+    }
+
+@app.get("/api/extract-pitch/pyramid")
+async def extract_pitch_pyramid(
+    http_request: Request,
+    url: str = Query(description="YouTube URL to process"),
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    response_format: JsonFormatQuery = None,
+):
+    """
+    Return a video's contour at every pyramid level (PYRAMID_LEVELS).
+
+    Lets a zoomable view switch to a finer level as it zooms in without
+    further requests. Levels equal /api/extract-pitch at the same
+    resample_interval. Cacheable like GET /api/extract-pitch.
     """
     try:
-        # Create temp directory for audio processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            audio_path = os.path.join(temp_dir, "audio.wav")
-            
-            # Download audio from YouTube
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'wav',
-                    'preferredquality': '192',
-                }],
-                'outtmpl': os.path.join(temp_dir, 'audio'),
-                'quiet': True,
-                'no_warnings': True,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([request.url])
-            
-            # Load audio and extract pitch
-            if not os.path.exists(audio_path):
-                raise HTTPException(status_code=500, detail="Failed to extract audio from YouTube")
-            
-            # Load audio with librosa
-            y, sr = librosa.load(audio_path, sr=22050)
-            
-            # Extract pitch using pyin (pitch tracking)
-            # fmin and fmax cover typical vocal range
-            fmin = librosa.note_to_hz('C2')
-            fmax = librosa.note_to_hz('C7')
-            
-            # Get pitch frequencies
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr, fmin=fmin, fmax=fmax)
-            
-            # Extract the dominant pitch at each time frame
-            pitch_contour = []
-            for t in range(pitches.shape[1]):
-                # Get the frequency with the highest magnitude at this time frame
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                
-                # Only include confident pitch detections
-                if magnitudes[index, t] > 0.1:
-                    # Convert frame number to time
-                    time = t * len(y) / sr / pitches.shape[1]
-                    pitch_contour.append({
-                        'time': float(time),
-                        'frequency': float(pitch)
-                    })
-            
-            # Apply median filtering to smooth the pitch contour
-            pitch_contour = smooth_pitch_contour(pitch_contour, kernel_size=5)
-            
-            # Resample to fixed time intervals
-            pitch_contour = resample_pitch_contour(pitch_contour, interval=resample_interval)
-            
-            return {
-                'status': 'success',
-                'pitch_data': pitch_contour,
-                'duration': float(len(y) / sr),
-                'sample_rate': sr,
-                'resample_interval': resample_interval
-            }
-            
+        request = YouTubeRequest(url=url)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    engine = resolve_engine(engine)
+    variant = response_format or 'json'
+    headers = {
+        'ETag': make_etag(pyramid_cache_key(request.url, resample_mode, engine), variant),
+        'Cache-Control': RESULT_CACHE_CONTROL,
+    }
+    not_modified = not_modified_response(http_request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        entry = await get_pitch_pyramid(request.url, resample_mode, engine=engine)
     except Exception as e:
         print(f"Error processing YouTube URL: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    return JSONResponse(pyramid_json(entry, response_format, engine), headers=headers)
+
+async def receive_upload(http_request: Request, path: str) -> str:
+    """
+    Write the audio file of a multipart request to path.
+
+    The body is parsed as it streams in (see uploads.spool_multipart), so
+    the file is written and hashed in one pass and the size cap holds for
+    chunked requests too.
+
+    Returns:
+        Hex SHA-256 digest of the file
+
+    Raises:
+        HTTPException: 413 for a file above max_upload_bytes, 422 without a
+                       file in the 'file' field, 400 for an empty file or
+                       a malformed body
+    """
+    content_length = http_request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > max_upload_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail="Uploaded file is too large")
+
+    try:
+        with open(path, 'wb') as destination:
+            return await spool_multipart(
+                http_request.headers.get('content-type', ''),
+                http_request.stream(),
+                destination,
+                max_upload_bytes,
+            )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except MissingUpload:
+        raise HTTPException(status_code=422, detail=f"Expected an audio file in the '{UPLOAD_FIELD}' field")
+    except (EmptyUpload, MalformedUpload) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/extract-pitch-file")
+async def extract_pitch_file(
+    http_request: Request,
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    downsample: DownsampleQuery = None,
+    points: PointsQuery = None,
+    response_format: ResponseFormatQuery = None,
+):
+    """
+    Extract pitch contour from an uploaded audio file.
+
+    Expects multipart/form-data with the audio in a 'file' field, in any
+    format ffmpeg can decode and at most PITCH_UPLOAD_MAX_MB large. The
+    body is parsed as it arrives, the file written to disk once (see
+    receive_upload) and cached by content hash, so re-uploading a recording skips the analysis. The response is the same
+    as for /api/extract-pitch, including format negotiation.
+    """
+    variant = negotiate_format(http_request, response_format)
+    check_downsample_params(variant, downsample, points)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # A seekable copy, so ffmpeg can read containers indexed at the end
+        audio_path = os.path.join(temp_dir, 'upload')
+        digest = await receive_upload(http_request, audio_path)
+        source_id = upload_source_id(digest)
+        key = source_result_key(source_id, resample_interval, resample_mode, engine, downsample, points)
+        try:
+            result = await get_cached_result(
+                key,
+                lambda: get_cached_pyramid(
+                    source_pyramid_key(source_id, resample_mode, engine),
+                    lambda: get_cached_analysis(
+                        source_analysis_key(source_id, engine),
+                        lambda: decode_audio(AudioSource(audio_path)),
+                        engine,
+                    ),
+                    resample_mode,
+                ),
+                resample_interval,
+                resample_mode,
+                engine,
+                downsample,
+                points,
+            )
+        except AudioDecodeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            print(f"Error processing uploaded file: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    response = render_pitch_result(result, variant)
+    response.headers['ETag'] = make_etag(key, variant)
+    # Reference for /api/extract-pitch/batch while the analysis stays cached
+    response.headers['X-Upload-Id'] = digest
+    return response
+
+async def stream_analysis(
+    url: str,
+    resample_interval: float,
+    resample_mode: str,
+    engine: str,
+    emit: Callable[[PitchContour], None],
+) -> Dict:
+    """
+    Analyze url block by block and cache the analysis.
+
+    Each block is analyzed in a worker process, and emit receives the
+    resampled points it finalizes as soon as they are known. Returns the
+    analysis the batch pipeline would have produced, also cached under
+    analysis_cache_key(url, engine).
+    """
+    tracker = StreamingPitchTracker(resample_interval, resample_mode, engine=engine)
+    smoothed_parts = []
+    source = await worker_pools.run_io(resolve_audio_source, url)
+    async with aclosing(decode_blocks(source, STREAM_BLOCK_FRAMES * PIPTRACK_HOP_LENGTH)) as blocks:
+        while not tracker.finished:
+            # None once the decoder is exhausted, which finishes the tracker
+            block = await anext(blocks, None)
+            tracker, smoothed, resampled = await worker_pools.run_cpu(stream_step, tracker, block)
+            smoothed_parts.append(smoothed)
+            if len(resampled):
+                emit(resampled)
+
+    contour = PitchContour.concatenate(smoothed_parts)
+    # Confidence relative to the loudest frame, as in analyze_samples
+    peak = (tracker.peak or 1.0) if get_engine(engine).relative_confidence else 1.0
+    analysis = {
+        'pitch_contour': PitchContour(contour.times, contour.frequencies, contour.confidences / peak),
+        'duration': tracker.duration,
+        'sample_rate': tracker.sr,
+    }
+    result_cache.put(analysis_cache_key(url, engine), analysis)
+    return analysis
+
+
+async def stream_pitch_events(
+    url: str,
+    resample_interval: float,
+    resample_mode: str,
+    engine: Optional[str] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Produce progressive extraction events for url.
+
+    Yields a 'start' event, one 'chunk' event (with 'pitch_data') per block
+    of audio that finalizes resampled points, then 'done' with the summary
+    fields of the regular response, or 'error' if extraction fails.
+
+    Results that are cached, or being computed by another request, are
+    sent as a single chunk, and so are results of engines that need the
+    whole signal (pyin). Otherwise the audio is analyzed block by block
+    (stream_analysis) as the in-flight analysis of the track, so requests
+    for it that arrive meanwhile wait for this one instead of downloading
+    the audio again.
+    """
+    engine = resolve_engine(engine)
+    yield {
+        'type': 'start',
+        'resample_interval': resample_interval,
+        'resample_mode': resample_mode,
+        'engine': engine,
+    }
+    try:
+        key = analysis_cache_key(url, engine)
+        result = result_cache.get(result_cache_key(url, resample_interval, resample_mode, engine))
+        if result is None and (
+            extraction_flights.in_flight(key)
+            or result_cache.get(key) is not None
+            or not get_engine(engine).frame_local
+        ):
+            result = await build_pitch_result(url, resample_interval, resample_mode, engine=engine)
+        if result is not None:
+            yield {'type': 'chunk', 'pitch_data': result['pitch_contour'].to_points()}
+        else:
+            chunks = asyncio.Queue()
+
+            async def compute():
+                try:
+                    return await stream_analysis(
+                        url, resample_interval, resample_mode, engine, chunks.put_nowait
+                    )
+                finally:
+                    chunks.put_nowait(None)
+
+            # Not in flight above, so this starts our own computation. It
+            # runs to completion for the cache and for requests waiting on
+            # it even if this client goes away
+            flight = extraction_flights.start(key, compute)
+            while (resampled := await chunks.get()) is not None:
+                yield {'type': 'chunk', 'pitch_data': resampled.to_points()}
+            analysis = await asyncio.shield(flight)
+            result = resampled_result(analysis, resample_interval, resample_mode, engine)
+            result_cache.put(result_cache_key(url, resample_interval, resample_mode, engine), result)
+    except Exception as e:
+        print(f"Error streaming YouTube URL: {e}")
+        yield {'type': 'error', 'detail': str(e)}
+        return
+
+    yield {
+        'type': 'done',
+        'status': 'success',
+        'points': len(result['pitch_contour']),
+        'duration': result['duration'],
+        'sample_rate': result['sample_rate'],
+        'resample_interval': resample_interval,
+        'resample_mode': resample_mode,
+        'engine': engine,
+    }
+
+
+def format_stream_event(event: Dict, stream_format: str) -> str:
+    """Serialize one event as an NDJSON line or an SSE message."""
+    data = json.dumps(event, separators=(',', ':'))
+    if stream_format == 'sse':
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + '\n'
+
+
+def streaming_pitch_response(
+    url: str,
+    http_request: Request,
+    resample_interval: float,
+    resample_mode: str,
+    stream_format: Optional[str],
+    engine: Optional[str] = None,
+) -> StreamingResponse:
+    """Stream extraction events as NDJSON (default) or Server-Sent Events."""
+    if stream_format is None:
+        accept = http_request.headers.get('accept') or ''
+        stream_format = 'sse' if SSE_MEDIA_TYPE in accept else 'ndjson'
+
+    async def body():
+        async for event in stream_pitch_events(url, resample_interval, resample_mode, engine):
+            yield format_stream_event(event, stream_format)
+
+    return StreamingResponse(
+        body(),
+        media_type=SSE_MEDIA_TYPE if stream_format == 'sse' else NDJSON_MEDIA_TYPE,
+        # Ask reverse proxies not to buffer the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@app.post("/api/extract-pitch/stream")
+async def extract_pitch_stream(
+    request: YouTubeRequest,
+    http_request: Request,
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    stream_format: StreamFormatQuery = None,
+):
+    """
+    Extract a pitch contour progressively.
+
+    Emits the resampled contour in chunks as soon as each block of audio is
+    analyzed, so the first points arrive after one block rather than after
+    the whole song. See stream_pitch_events for the event sequence.
+    """
+    return streaming_pitch_response(
+        request.url, http_request, resample_interval, resample_mode, stream_format, engine
+    )
+
+@app.get("/api/extract-pitch/stream")
+async def extract_pitch_stream_get(
+    http_request: Request,
+    url: str = Query(description="YouTube URL to process"),
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    stream_format: StreamFormatQuery = None,
+):
+    """GET form of the progressive extraction, usable with EventSource."""
+    try:
+        request = YouTubeRequest(url=url)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return streaming_pitch_response(
+        request.url, http_request, resample_interval, resample_mode, stream_format, engine
+    )
+
+
+async def missing_upload():
+    """Sample loader of uploads that are no longer in the analysis cache."""
+    raise LookupError("Unknown upload_id; upload the file again")
+
+
+async def batch_item_result(
+    item: BatchItem,
+    resample_interval: float,
+    resample_mode: str,
+    fetch_limit: AsyncContextManager,
+    engine: Optional[str] = None,
+) -> Dict:
+    """Result of one batch item; uploads must still be in the analysis cache."""
+    if item.url is not None:
+        return await build_pitch_result(item.url, resample_interval, resample_mode, fetch_limit, engine)
+
+    source_id = upload_source_id(item.upload_id)
+    return await get_cached_result(
+        source_result_key(source_id, resample_interval, resample_mode, engine),
+        lambda: get_cached_pyramid(
+            source_pyramid_key(source_id, resample_mode, engine),
+            lambda: get_cached_analysis(source_analysis_key(source_id, engine), missing_upload, engine),
+            resample_mode,
+        ),
+        resample_interval,
+        resample_mode,
+        engine,
+    )
+
+
+async def batch_events(
+    items: List[BatchItem],
+    resample_interval: float,
+    resample_mode: str,
+    response_format: Optional[str],
+    concurrency: int,
+    engine: Optional[str] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Extract every item and yield its outcome in completion order.
+
+    At most `concurrency` items download at once, and as many more may be
+    waiting for or running analysis, so downloads overlap analysis.
+    """
+    fetch_limit = asyncio.Semaphore(concurrency)
+    succeeded = 0
+
+    async def run(item):
+        return await batch_item_result(item, resample_interval, resample_mode, fetch_limit, engine)
+
+    async with aclosing(map_unordered(run, items, 2 * concurrency)) as outcomes:
+        async for index, result, error in outcomes:
+            item = items[index].model_dump(exclude_none=True)
+            if error is not None:
+                print(f"Error processing batch item {item}: {error}")
+                yield {'type': 'error', 'index': index, **item, 'detail': str(error)}
+                continue
+            succeeded += 1
+            yield {'type': 'result', 'index': index, **item,
+                   **pitch_result_body(result, response_format)}
+
+    yield {'type': 'done', 'succeeded': succeeded, 'failed': len(items) - succeeded}
+
+@app.post("/api/extract-pitch/batch")
+async def extract_pitch_batch(
+    request: BatchRequest,
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    response_format: JsonFormatQuery = None,
+):
+    """
+    Extract many videos or uploads in parallel.
+
+    Streams one NDJSON line per item as soon as it finishes, in completion
+    order: 'result' lines carry the item's index and source plus the usual
+    extraction body, 'error' lines a 'detail'. A final 'done' line counts
+    both. Items reuse the result cache and coalesce with other requests.
+    """
+    concurrency = request.concurrency or batch_concurrency
+
+    async def body():
+        async for event in batch_events(
+            request.items, resample_interval, resample_mode, response_format, concurrency, engine
+        ):
+            yield format_stream_event(event, 'ndjson')
+
+    return StreamingResponse(
+        body(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def track_source_id(track_id: str) -> str:
+    """Source identifier of a track ID (see tracks.parse_track_id), or 404."""
+    source_id = parse_track_id(track_id)
+    if source_id is None:
+        raise HTTPException(status_code=404, detail="Unknown track")
+    return source_id
+
+
+def track_analysis_loader(track_id: str, source_id: str, engine: str) -> Callable[[], Awaitable[Dict]]:
+    """
+    Analysis loader of a track: YouTube videos are extracted on demand,
+    uploads must still be in the analysis cache (LookupError otherwise).
+    """
+    if source_id.startswith('youtube:'):
+        url = f"https://www.youtube.com/watch?v={track_id}"
+        return lambda: get_pitch_analysis(url, engine=engine)
+
+    return lambda: get_cached_analysis(source_analysis_key(source_id, engine), missing_upload, engine)
+
+
+@app.get("/api/tracks/{track_id}/pitch")
+async def get_track_pitch(
+    track_id: str,
+    http_request: Request,
+    start: float = Query(default=0.0, ge=0.0, description="Window start in seconds"),
+    end: Optional[float] = Query(
+        default=None,
+        gt=0.0,
+        description="Window end in seconds (exclusive); defaults to the end of the track"
+    ),
+    resolution: Optional[float] = Query(
+        default=None,
+        ge=0.01,
+        le=10.0,
+        description="Seconds between points, on the same grid as resample_interval; "
+                    "omit for every analysis frame"
+    ),
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    response_format: ResponseFormatQuery = None,
+):
+    """
+    Return the part of a track's contour between start and end.
+
+    track_id is a YouTube video ID (extracted on first use) or the
+    X-Upload-Id of an uploaded file. The track's analysis contour is stored
+    with a per-second seek index, so the window is found in O(log n) and
+    the response is proportional to the window, not the song. With a
+    resolution the window is resampled on the grid /api/extract-pitch uses
+    for that resample_interval, so its points equal the full result's.
+    """
+    source_id = track_source_id(track_id)
+    if end is not None and end <= start:
+        raise HTTPException(status_code=422, detail="end must be after start")
+    variant = negotiate_format(http_request, response_format)
+    if variant == 'compact' and resolution is None:
+        raise HTTPException(status_code=422, detail="format=compact needs a resolution")
+
+    engine = resolve_engine(engine)
+    track_key = source_track_key(source_id, engine)
+    window_key = make_cache_key(
+        track_key, start=start, end=end, resolution=resolution, resample_mode=resample_mode
+    )
+    headers = {
+        'ETag': make_etag(window_key, variant),
+        'Cache-Control': RESULT_CACHE_CONTROL,
+        'Vary': 'Accept',
+    }
+    not_modified = not_modified_response(http_request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        entry = await get_cached_track(track_key, track_analysis_loader(track_id, source_id, engine))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error processing track {track_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    track = entry['track']
+    window_end = entry['duration'] if end is None else end
+    if resolution is None:
+        contour = track.window(start, window_end)
+    else:
+        contour = track.resampled_window(start, window_end, resolution, resample_mode)
+
+    result = {
+        'pitch_contour': contour,
+        'grid_start': track.contour.start_time,
+        'duration': entry['duration'],
+        'sample_rate': entry['sample_rate'],
+        'resample_interval': resolution,
+        'resample_mode': resample_mode if resolution is not None else None,
+        'engine': engine,
+    }
+    if variant == 'binary':
+        response = pitch_result_binary(result)
+    else:
+        body = pitch_result_body(result, variant)
+        body.update({'track_id': track_id, 'start': start, 'end': window_end})
+        response = JSONResponse(body, headers={'Vary': 'Accept'})
+    response.headers.update(headers)
+    return response
+
+
+@app.get("/api/tracks/{track_id}/notes")
+async def get_track_notes(
+    track_id: str,
+    http_request: Request,
+    engine: EngineQuery = None,
+):
+    """
+    Return the note events of a track.
+
+    The smoothed analysis contour is segmented into notes (onset, offset,
+    MIDI number, mean cents deviation, confidence) once per track and
+    engine, see notes.py. Playback schedules these instead of one note per
+    contour point.
+    """
+    source_id = track_source_id(track_id)
+    engine = resolve_engine(engine)
+    key = source_notes_key(source_id, engine)
+    headers = {'ETag': make_etag(key, 'json'), 'Cache-Control': RESULT_CACHE_CONTROL}
+    not_modified = not_modified_response(http_request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        entry = await get_cached_notes(key, track_analysis_loader(track_id, source_id, engine))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error segmenting track {track_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return JSONResponse({
+        'status': 'success',
+        'track_id': track_id,
+        'notes': entry['notes'].to_dicts(),
+        'duration': entry['duration'],
+        'sample_rate': entry['sample_rate'],
+        'engine': engine,
+    }, headers=headers)
+
+
+@app.get("/api/tracks/{track_id}/midi")
+async def get_track_midi(
+    track_id: str,
+    http_request: Request,
+    engine: EngineQuery = None,
+):
+    """
+    Download the note events of a track as a Standard MIDI File.
+
+    The file (format 0, one piano track at MIDI_TEMPO_BPM, velocities from
+    note confidence) is written once from the cached note events and cached
+    itself, so repeated downloads are served as stored bytes.
+    """
+    source_id = track_source_id(track_id)
+    engine = resolve_engine(engine)
+    notes_key = source_notes_key(source_id, engine)
+    key = source_midi_key(source_id, engine)
+    headers = {
+        'ETag': make_etag(key, 'midi'),
+        'Cache-Control': RESULT_CACHE_CONTROL,
+        'Content-Disposition': f'attachment; filename="{track_id}.mid"',
+    }
+    not_modified = not_modified_response(http_request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    loader = track_analysis_loader(track_id, source_id, engine)
+    try:
+        midi = await get_cached_midi(key, lambda: get_cached_notes(notes_key, loader), track_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error writing MIDI for track {track_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return Response(content=midi, media_type=MIDI_MEDIA_TYPE, headers=headers)
+
+
+async def user_contour(http_request: Request, engine: str) -> PitchContour:
+    """
+    The contour of a score request: JSON pitch_data, or the analysis of a
+    recording in the 'file' field of a multipart body.
+    """
+    content_type = http_request.headers.get('content-type', '')
+    if not content_type.startswith('multipart/form-data'):
+        try:
+            request = ScoreRequest.model_validate_json(await http_request.body())
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        points = [(point.time, point.frequency) for point in request.pitch_data]
+        times, frequencies = zip(*points) if points else ((), ())
+        try:
+            return PitchContour(times, frequencies, sort=True)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio_path = os.path.join(temp_dir, 'upload')
+        await receive_upload(http_request, audio_path)
+        try:
+            samples = await decode_audio(AudioSource(audio_path))
+            analysis = await worker_pools.run_cpu(analyze_samples, samples, ANALYSIS_SAMPLE_RATE, engine)
+        except AudioDecodeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            print(f"Error analyzing recording: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    return analysis['pitch_contour']
+
+
+async def target_analysis(track_id: str, engine: str) -> Dict:
+    """
+    The analysis of the track a take is compared with, or 404.
+
+    Loaded before the take so an unknown track is rejected without
+    analyzing an uploaded recording.
+    """
+    try:
+        return await track_analysis_loader(track_id, track_source_id(track_id), engine)()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error loading track {track_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/tracks/{track_id}/score")
+async def score_track(
+    track_id: str,
+    http_request: Request,
+    offset: float = Query(
+        default=0.0,
+        ge=-10.0,
+        le=10.0,
+        description="Seconds added to the user's times, e.g. to compensate latency"
+    ),
+    band: float = Query(
+        default=SCORE_BAND_SECONDS,
+        ge=0.0,
+        le=5.0,
+        description="Largest timing difference the alignment absorbs, in seconds"
+    ),
+    tolerance: float = Query(
+        default=SCORE_TOLERANCE_CENTS,
+        gt=0.0,
+        le=600.0,
+        description="Largest pitch error in cents that counts as a hit"
+    ),
+    segment: float = Query(
+        default=SCORE_SEGMENT_SECONDS,
+        ge=1.0,
+        le=600.0,
+        description="Length in seconds of the sections accuracy is also reported for"
+    ),
+    octave_invariant: bool = Query(
+        default=True,
+        description="Accept singing an octave (or several) above or below the target"
+    ),
+    engine: EngineQuery = None,
+):
+    """
+    Score a sung take against a track's target contour.
+
+    The take is either JSON ({"pitch_data": [{"time", "frequency"}, ...]},
+    times from the start of the track) or a recording in the 'file' field
+    of a multipart body, analyzed like an upload. Both contours are binned
+    onto a 50 ms grid and aligned with a Sakoe-Chiba banded DTW in cents
+    space (see scoring.py), so timing differences up to band seconds are
+    forgiven and memory stays linear in the song length. The response has
+    the overall accuracy, mean cents error and coverage, and the same per
+    segment of the track.
+    """
+    engine = resolve_engine(engine)
+    analysis = await target_analysis(track_id, engine)
+    user = await user_contour(http_request, engine)
+
+    try:
+        score = await worker_pools.run_cpu(
+            score_contours, analysis['pitch_contour'], user, offset, band, tolerance, segment,
+            octave_invariant,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"Error scoring track {track_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        'status': 'success',
+        'track_id': track_id,
+        **score,
+        'tolerance': tolerance,
+        'band': band,
+        'offset': offset,
+        'engine': engine,
+    }
+
+
+@app.post("/api/tracks/{track_id}/offset")
+async def estimate_track_offset(
+    track_id: str,
+    http_request: Request,
+    max_lag: float = Query(
+        default=OFFSET_MAX_LAG_SECONDS,
+        gt=0.0,
+        le=10.0,
+        description="Largest latency searched either way, in seconds"
+    ),
+    engine: EngineQuery = None,
+):
+    """
+    Estimate the latency between a sung take and a track's target contour.
+
+    Takes the same body as /api/tracks/{id}/score. The lag is the peak of
+    the normalized cross-correlation of the two cents signals over the
+    frames voiced in both, computed for every lag at once with FFTs (see
+    scoring.estimate_offset), so transposition and octave do not matter.
+    The returned offset can be passed to the score endpoint or added to
+    the take's times on the client.
+    """
+    engine = resolve_engine(engine)
+    analysis = await target_analysis(track_id, engine)
+    user = await user_contour(http_request, engine)
+
+    try:
+        estimate = await worker_pools.run_cpu(estimate_offset, analysis['pitch_contour'], user, max_lag)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"Error estimating offset for track {track_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        'status': 'success',
+        'track_id': track_id,
+        **estimate,
+        'max_lag': max_lag,
+        'engine': engine,
+    }
+
+
+@app.websocket("/ws/pitch")
+async def live_pitch(
+    websocket: WebSocket,
+    sample_rate: int = Query(
+        default=44100,
+        ge=LIVE_MIN_SAMPLE_RATE,
+        le=LIVE_MAX_SAMPLE_RATE,
+        description="Sample rate of the microphone audio in Hz"
+    ),
+    encoding: PcmEncoding = Query(
+        default='float32',
+        description="Sample format of the binary messages (little-endian mono PCM)"
+    ),
+):
+    """
+    Real-time pitch of microphone audio.
+
+    The client sends binary messages of PCM samples of any length. After a
+    'ready' message (frame and hop sizes), the server sends one 'pitch'
+    message ({time, frequency, confidence}; frequency is null when
+    unvoiced) per hop, in order. Audio is received while earlier hops are
+    analyzed and sent; when the backlog exceeds the session's limit the
+    oldest hops are skipped and reported in a 'dropped' message, so a slow
+    client sees a gap instead of growing latency. A payload that is not a
+    whole number of samples ends the session with an 'error' message.
+
+    Hops are estimated by live_scheduler together with those of every
+    other connected session (see live.LiveBatchScheduler).
+    """
+    await websocket.accept()
+    session = LivePitchSession(sample_rate, encoding)
+    await websocket.send_json({
+        'type': 'ready',
+        'sample_rate': sample_rate,
+        'encoding': encoding,
+        'frame_length': session.frame_length,
+        'hop_length': session.hop_length,
+    })
+
+    received = asyncio.Event()
+    closed = asyncio.Event()
+    errors: List[str] = []
+
+    async def receive_audio():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message.get('bytes'):
+                    try:
+                        session.push(message['bytes'])
+                    except ValueError as e:
+                        errors.append(str(e))
+                        break
+                    received.set()
+        finally:
+            closed.set()
+            received.set()
+
+    receiver = asyncio.create_task(receive_audio())
+    dropped = 0
+    try:
+        while True:
+            await received.wait()
+            received.clear()
+            if errors:
+                await websocket.send_json({'type': 'error', 'detail': errors[0]})
+                await websocket.close(code=1007)
+                break
+            if closed.is_set():
+                break
+            if session.dropped_hops > dropped:
+                await websocket.send_json({'type': 'dropped', 'hops': session.dropped_hops - dropped})
+                dropped = session.dropped_hops
+            for message in await live_scheduler.estimate(session):
+                await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(
+    request: YouTubeRequest,
+    resample_interval: ResampleIntervalQuery = DEFAULT_RESAMPLE_INTERVAL,
+    resample_mode: ResampleModeQuery = 'nearest',
+    engine: EngineQuery = None,
+    response_format: Optional[ResponseFormat] = Query(
+        default=None,
+        alias='format',
+        description="Encoding of an immediately available result ('binary' is "
+                    "only honoured when polling)"
+    )
+):
+    """
+    Submit a pitch extraction job and return its id immediately.
+
+    Jobs for a video that is already being analyzed attach to the in-flight
+    analysis instead of starting a new one, whatever their resample_interval.
+    Poll GET /api/jobs/{job_id} for the result.
+    """
+    params = {
+        'url': request.url,
+        'resample_interval': resample_interval,
+        'resample_mode': resample_mode,
+        'engine': resolve_engine(engine),
+    }
+
+    cached = result_cache.get(result_cache_key(request.url, resample_interval, resample_mode, engine))
+    if cached is not None:
+        return job_status_json(job_manager.completed(cached, params), response_format)
+
+    coalesced = extraction_flights.in_flight(analysis_cache_key(request.url, engine))
+    job = job_manager.submit(
+        lambda: build_pitch_result(request.url, resample_interval, resample_mode, engine=engine),
+        params,
+        coalesced=coalesced,
+    )
+    return job_status_json(job)
+
+def job_status_json(job, response_format: Optional[str] = None) -> Dict:
+    """Job status body with the result, if any, rendered as JSON."""
+    data = job.to_dict()
+    if 'result' in data:
+        data['result'] = pitch_result_body(data['result'], response_format)
+    return data
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    http_request: Request,
+    response_format: ResponseFormatQuery = None,
+):
+    """
+    Return the status of a job, with its result once finished.
+
+    A finished job is returned as the bare binary contour when the client
+    asks for binary; pending and failed jobs always answer with JSON status.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == JOB_DONE and negotiate_format(http_request, response_format) == 'binary':
+        return pitch_result_binary(job.result)
+    return job_status_json(job, response_format)
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Report result cache hit/miss/eviction counters and sizes."""
+    return result_cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
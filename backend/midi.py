@@ -0,0 +1,102 @@
+"""
+Standard MIDI File writer for note events.
+
+write_midi produces a format 0 file (one track) with a tempo meta event,
+a program change and one note on/off pair per note event:
+
+    MThd  length=6  format=0  ntrks=1  division=ticks per quarter note
+    MTrk  length    <delta-time, event>...  end of track
+
+Delta times are variable-length quantities. Note offs come before note ons
+at the same tick, so repeated notes retrigger instead of being cut short.
+Velocities follow each note's confidence.
+"""
+import struct
+from typing import List, Tuple
+
+import numpy as np
+
+from notes import NoteEvents
+
+MIDI_MEDIA_TYPE = 'audio/midi'
+MIDI_TICKS_PER_BEAT = 480
+MIDI_TEMPO_BPM = 120.0
+# General MIDI program (0 = acoustic grand piano)
+MIDI_PROGRAM = 0
+MIDI_CHANNEL = 0
+MIDI_MIN_VELOCITY = 40
+MIDI_MAX_VELOCITY = 110
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+PROGRAM_CHANGE = 0xC0
+
+
+def variable_length_quantity(value: int) -> bytes:
+    """Encode a non-negative integer as a MIDI variable-length quantity."""
+    if value < 0:
+        raise ValueError("variable-length quantities are non-negative")
+    groups = [value & 0x7F]
+    value >>= 7
+    while value:
+        groups.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(groups))
+
+
+def _meta(kind: int, data: bytes) -> bytes:
+    return bytes([0xFF, kind]) + variable_length_quantity(len(data)) + data
+
+
+def write_midi(
+    notes: NoteEvents,
+    ticks_per_beat: int = MIDI_TICKS_PER_BEAT,
+    tempo_bpm: float = MIDI_TEMPO_BPM,
+    program: int = MIDI_PROGRAM,
+    track_name: str = '',
+) -> bytes:
+    """
+    Write note events as a Standard MIDI File.
+
+    Args:
+        notes: Note events (see notes.segment_notes)
+        ticks_per_beat: Time division in ticks per quarter note
+        tempo_bpm: Tempo the seconds of the events are mapped through
+        program: General MIDI program of the channel
+        track_name: Optional sequence/track name meta event
+
+    Returns:
+        The file contents
+    """
+    ticks_per_second = ticks_per_beat * tempo_bpm / 60.0
+    onsets = np.rint(notes.onsets * ticks_per_second).astype(np.int64)
+    # Every note lasts at least one tick
+    offsets = np.maximum(np.rint(notes.offsets * ticks_per_second).astype(np.int64), onsets + 1)
+    pitches = np.clip(notes.midi, 0, 127)
+    velocities = np.rint(
+        MIDI_MIN_VELOCITY + (MIDI_MAX_VELOCITY - MIDI_MIN_VELOCITY) * np.clip(notes.confidences, 0, 1)
+    ).astype(np.int64)
+
+    # (tick, order, status, data1, data2); order puts offs before ons
+    events: List[Tuple[int, int, int, int, int]] = []
+    for onset, offset, pitch, velocity in zip(
+        onsets.tolist(), offsets.tolist(), pitches.tolist(), velocities.tolist()
+    ):
+        events.append((onset, 1, NOTE_ON | MIDI_CHANNEL, pitch, velocity))
+        events.append((offset, 0, NOTE_OFF | MIDI_CHANNEL, pitch, 0))
+    events.sort()
+
+    microseconds_per_beat = int(round(60_000_000 / tempo_bpm))
+    track = bytearray()
+    if track_name:
+        track += b'\x00' + _meta(0x03, track_name.encode('utf-8'))
+    track += b'\x00' + _meta(0x51, microseconds_per_beat.to_bytes(3, 'big'))
+    track += b'\x00' + bytes([PROGRAM_CHANGE | MIDI_CHANNEL, program])
+    tick = 0
+    for event_tick, _, status, data1, data2 in events:
+        track += variable_length_quantity(event_tick - tick) + bytes([status, data1, data2])
+        tick = event_tick
+    track += b'\x00' + _meta(0x2F, b'')
+
+    header = b'MThd' + struct.pack('>IHHH', 6, 0, 1, ticks_per_beat)
+    return header + b'MTrk' + struct.pack('>I', len(track)) + bytes(track)
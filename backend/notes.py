@@ -0,0 +1,202 @@
+"""
+Note segmentation of pitch contours.
+
+segment_notes turns a smoothed analysis contour into note events (onset,
+offset, MIDI number, mean cents deviation, mean confidence) in a fixed
+number of array passes:
+
+1. Frequencies become fractional MIDI values. Points within
+   0.5 - NOTE_HYSTERESIS semitones of a note centre are assigned that note;
+   points nearer a boundary keep the previous assignment (forward fill),
+   so vibrato around a boundary does not flip between two notes.
+2. Runs of equal notes, split at unvoiced gaps, are found by run-length
+   encoding. Runs shorter than NOTE_MIN_DURATION are relabeled with the
+   preceding (or, at the start of a phrase, the following) long run of the
+   same phrase and the runs are recomputed, which merges them; phrases
+   with no long run at all are dropped.
+3. Per-note statistics are reduceat sums over the runs.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from contour import PitchContour
+from resampling import estimate_frame_period
+
+# Semitones a point must come closer to a new note centre than the boundary
+# (0.5) before the note changes
+NOTE_HYSTERESIS = 0.15
+# Shortest note kept as its own event, in seconds
+NOTE_MIN_DURATION = 0.1
+# Unvoiced gaps longer than this many frame periods end a note
+NOTE_GAP_FRAMES = 2.5
+
+# Bump when segmentation changes, so cached note events are recomputed
+NOTES_VERSION = '1'
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+
+def midi_note_name(midi: int) -> str:
+    """Scientific pitch name of a MIDI note number (69 -> 'A4')."""
+    return f'{NOTE_NAMES[midi % 12]}{midi // 12 - 1}'
+
+
+class NoteEvents:
+    """
+    Columnar note events of one contour.
+
+    Args:
+        onsets: Note start times in seconds
+        offsets: Note end times in seconds
+        midi: MIDI note numbers
+        cents: Mean deviation from the note centre in cents
+        confidences: Mean confidence of the note's points
+    """
+
+    def __init__(self, onsets, offsets, midi, cents, confidences):
+        self.onsets = np.asarray(onsets, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.float64)
+        self.midi = np.asarray(midi, dtype=np.int64)
+        self.cents = np.asarray(cents, dtype=np.float64)
+        self.confidences = np.asarray(confidences, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> 'NoteEvents':
+        return cls([], [], [], [], [])
+
+    def __len__(self) -> int:
+        return len(self.onsets)
+
+    def __repr__(self) -> str:
+        return f'NoteEvents({len(self)} notes)'
+
+    def to_dicts(self) -> List[Dict]:
+        """JSON-ready list of note events."""
+        return [
+            {
+                'onset': round(onset, 4),
+                'offset': round(offset, 4),
+                'midi': midi,
+                'note': midi_note_name(midi),
+                'cents': round(cents, 1),
+                'confidence': round(confidence, 3),
+            }
+            for onset, offset, midi, cents, confidence in zip(
+                self.onsets.tolist(), self.offsets.tolist(), self.midi.tolist(),
+                self.cents.tolist(), self.confidences.tolist(),
+            )
+        ]
+
+
+def _run_starts(labels: np.ndarray, breaks: np.ndarray) -> np.ndarray:
+    """Start indices of runs of equal labels, also splitting where breaks is set."""
+    changes = np.flatnonzero((labels[1:] != labels[:-1]) | breaks[1:]) + 1
+    return np.concatenate(([0], changes))
+
+
+def segment_notes(
+    contour: PitchContour,
+    hysteresis: float = NOTE_HYSTERESIS,
+    min_duration: float = NOTE_MIN_DURATION,
+    gap_frames: float = NOTE_GAP_FRAMES,
+) -> NoteEvents:
+    """
+    Segment a contour into note events.
+
+    Args:
+        contour: Smoothed analysis contour (voiced points only)
+        hysteresis: Semitones past a note boundary needed to change note
+        min_duration: Shortest note in seconds; shorter runs are merged
+                      into a neighbouring note
+        gap_frames: Unvoiced gap, in frame periods, that ends a note
+
+    Returns:
+        Note events in time order; each note ends one frame period after
+        its last point
+
+    Raises:
+        ValueError: If hysteresis is not in [0, 0.5)
+    """
+    if not 0 <= hysteresis < 0.5:
+        raise ValueError("hysteresis must be in [0, 0.5) semitones")
+    if len(contour) == 0:
+        return NoteEvents.empty()
+
+    times = contour.times.astype(np.float64)
+    midi = 69 + 12 * np.log2(contour.frequencies.astype(np.float64) / 440.0)
+    frame_period = estimate_frame_period(times)
+    n = len(times)
+
+    # Phrase boundaries: the first point after an unvoiced gap
+    breaks = np.zeros(n, dtype=bool)
+    if frame_period > 0:
+        breaks[1:] = np.diff(times) > gap_frames * frame_period
+    breaks[0] = True
+    phrase = np.cumsum(breaks) - 1
+
+    # Hysteresis: points clearly inside a note set it, the rest inherit the
+    # last clear assignment within their phrase (or round if there is none)
+    nearest = np.rint(midi)
+    clear = np.abs(midi - nearest) < 0.5 - hysteresis
+    labels = _forward_fill(nearest, clear | breaks, phrase)
+
+    # Merge runs shorter than min_duration into their neighbours
+    starts = _run_starts(labels, breaks)
+    ends = np.append(starts[1:], n)
+    durations = times[ends - 1] - times[starts] + frame_period
+    long_runs = durations >= min_duration
+    keep = np.repeat(long_runs, ends - starts)
+    labels = _forward_fill(labels, keep, phrase, fill_back=True)
+    # Phrases without any long run have nothing to merge into
+    phrase_has_long = np.zeros(phrase[-1] + 1, dtype=bool)
+    phrase_has_long[phrase[keep]] = True
+    voiced = phrase_has_long[phrase]
+    if not voiced.any():
+        return NoteEvents.empty()
+
+    times, midi, labels, breaks = times[voiced], midi[voiced], labels[voiced], breaks[voiced]
+    confidences = contour.confidences[voiced].astype(np.float64)
+    breaks[0] = True
+    starts = _run_starts(labels, breaks)
+    ends = np.append(starts[1:], len(times))
+    counts = ends - starts
+
+    notes = labels[starts]
+    return NoteEvents(
+        onsets=times[starts],
+        offsets=times[ends - 1] + frame_period,
+        midi=notes.astype(np.int64),
+        cents=100 * np.add.reduceat(midi - labels, starts) / counts,
+        confidences=np.add.reduceat(confidences, starts) / counts,
+    )
+
+
+def _forward_fill(
+    values: np.ndarray,
+    valid: np.ndarray,
+    groups: np.ndarray,
+    fill_back: bool = False,
+) -> np.ndarray:
+    """
+    Replace invalid values with the last valid value of the same group.
+
+    Invalid values before a group's first valid one are filled from that
+    first valid value when fill_back is set, and kept otherwise. groups
+    must be non-decreasing.
+    """
+    n = len(values)
+    index = np.arange(n)
+    last_valid = np.maximum.accumulate(np.where(valid, index, -1))
+    group_start = np.flatnonzero(np.diff(groups, prepend=-1))[groups]
+    has_previous = last_valid >= group_start
+    source = np.where(has_previous, last_valid, index)
+
+    if fill_back:
+        # Next valid index, restricted to the same group
+        next_valid = np.minimum.accumulate(np.where(valid, index, n)[::-1])[::-1]
+        group_end = np.append(np.flatnonzero(np.diff(groups)), n - 1)[groups]
+        use_next = ~has_previous & (next_valid <= group_end)
+        source = np.where(use_next, next_valid, source)
+
+    return values[source]
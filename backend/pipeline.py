@@ -0,0 +1,143 @@
+"""
+Pitch extraction pipeline stages.
+
+Everything in this module is free of web-framework state so it can run inside
+worker processes (see workers.py): pitch tracking and smoothing are CPU bound
+and run in the process pool. Fetching and decoding audio lives in
+audio_source.py.
+"""
+import numpy as np
+from typing import List, Dict, Optional, Tuple, Union
+from contour import PitchContour
+from engines import DEFAULT_ENGINE, get_engine
+from median import median_filter
+from resampling import resample_contour
+
+# Maximum allowed points in list-of-dict contours to prevent memory issues
+# (columnar PitchContour input is not limited)
+MAX_PITCH_POINTS = 1000000
+
+# Stages accept either a PitchContour or the JSON list-of-dict form
+ContourLike = Union[PitchContour, List[Dict[str, float]]]
+
+# Pipeline parameters; every value here is part of the result cache key
+# (engine parameters live in engines.py)
+ANALYSIS_SAMPLE_RATE = 22050
+SMOOTHING_KERNEL_SIZE = 5
+# Bump whenever the pipeline changes in a way that alters its output
+PIPELINE_VERSION = 'piptrack-5'
+
+
+def _as_contour(pitch_contour: ContourLike) -> Tuple[PitchContour, bool]:
+    """Return (contour, was_points) so list callers get lists back."""
+    if isinstance(pitch_contour, PitchContour):
+        return pitch_contour, False
+    return PitchContour.from_points(pitch_contour), True
+
+
+def smooth_pitch_contour(pitch_contour: ContourLike, kernel_size: int = 5) -> ContourLike:
+    """
+    Apply median filtering to smooth pitch contour
+    
+    Args:
+        pitch_contour: PitchContour, or list of pitch points with 'time' and
+                       'frequency' keys
+        kernel_size: Size of the median filter window (odd number, default 5)
+    
+    Returns:
+        Smoothed pitch contour, in the same form as the input
+    """
+    if len(pitch_contour) < kernel_size:
+        return pitch_contour
+    
+    contour, was_points = _as_contour(pitch_contour)
+    
+    # Apply median filter (same output as scipy.signal.medfilt, see median.py)
+    smoothed = contour.with_frequencies(median_filter(contour.frequencies, kernel_size=kernel_size))
+    
+    return smoothed.to_points() if was_points else smoothed
+
+
+def resample_pitch_contour(
+    pitch_contour: Optional[ContourLike],
+    interval: float = 0.5,
+    mode: str = 'nearest'
+) -> ContourLike:
+    """
+    Resample pitch contour to fixed time intervals.
+
+    Delegates to resampling.resample_contour, which locates every target
+    with a single np.searchsorted call (O(n log m) in C rather than a Python
+    loop) and supports interpolating and per-bin aggregation modes.
+
+    Args:
+        pitch_contour: PitchContour, or list of {time, frequency} dicts
+        interval: Time interval in seconds (default 0.5)
+        mode: One of resampling.RESAMPLE_MODES (default 'nearest')
+
+    Returns:
+        Resampled pitch contour with points at regular intervals, in the
+        same form as the input
+
+    Raises:
+        ValueError: If interval is not positive, mode is unknown, input
+                    structure is invalid, or input contains NaN/Inf values
+    """
+    # Handle None input
+    if pitch_contour is None:
+        return []
+
+    # Handle empty input
+    if len(pitch_contour) == 0:
+        return pitch_contour if isinstance(pitch_contour, PitchContour) else []
+
+    # Validate interval parameter
+    if interval <= 0:
+        raise ValueError("interval must be a positive number")
+
+    if isinstance(pitch_contour, PitchContour):
+        return resample_contour(pitch_contour, interval, mode)
+
+    # List input: check size before paying for per-point parsing
+    if len(pitch_contour) > MAX_PITCH_POINTS:
+        raise ValueError(f"pitch_contour exceeds maximum size of {MAX_PITCH_POINTS} points")
+
+    # Validates structure and finiteness, and sorts by time only if needed
+    contour = PitchContour.from_points(pitch_contour)
+    return resample_contour(contour, interval, mode).to_points()
+
+
+def analyze_samples(y: np.ndarray, sr: int = ANALYSIS_SAMPLE_RATE, engine: str = DEFAULT_ENGINE) -> Dict:
+    """
+    Extract the smoothed pitch contour of decoded mono samples.
+
+    Args:
+        y: Mono samples
+        sr: Sample rate of y
+        engine: Name of a registered pitch engine (see engines.py)
+
+    Returns:
+        Dict with the smoothed 'pitch_contour' (a PitchContour), 'duration'
+        and 'sample_rate'
+
+    Raises:
+        ValueError: If engine is unknown
+    """
+    tracker = get_engine(engine)
+
+    # Extract the pitch of every voiced frame
+    pitch_contour = tracker.track(y, sr)
+    if tracker.relative_confidence:
+        # Confidence relative to the loudest voiced frame
+        peak = pitch_contour.confidences.max() if len(pitch_contour) else 1.0
+        pitch_contour = PitchContour(pitch_contour.times, pitch_contour.frequencies,
+                                     pitch_contour.confidences / peak)
+
+    # Apply median filtering to smooth the pitch contour
+    pitch_contour = smooth_pitch_contour(pitch_contour, kernel_size=SMOOTHING_KERNEL_SIZE)
+
+    return {
+        'pitch_contour': pitch_contour,
+        'duration': float(len(y) / sr),
+        'sample_rate': sr,
+    }
@@ -0,0 +1,70 @@
+"""
+Multi-resolution contour pyramids.
+
+A ContourPyramid holds the resampled contour of one track at a fixed set of
+intervals (its levels), all computed once from the smoothed analysis
+contour. Requests for a level interval are answered by selecting it; any
+other interval is derived from the analysis contour the pyramid keeps as its
+base, so every answer equals resample_pitch_contour on the analysis.
+
+Clients that zoom (frontend/app.js) fetch all levels at once and switch to a
+finer level as they zoom in, without further requests.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from contour import PitchContour
+from pipeline import resample_pitch_contour
+
+# Level intervals in seconds, fine to coarse
+PYRAMID_LEVELS = (0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+
+class ContourPyramid:
+    """
+    Resampled levels of one analysis contour for one resampling mode.
+
+    Args:
+        contour: Smoothed analysis contour (the pyramid's base)
+        mode: Resampling mode of every level
+        levels: Level intervals in seconds
+
+    Raises:
+        ValueError: If a level is not positive or mode is unknown
+    """
+
+    def __init__(
+        self,
+        contour: PitchContour,
+        mode: str = 'nearest',
+        levels: Sequence[float] = PYRAMID_LEVELS,
+    ):
+        self.contour = contour
+        self.mode = mode
+        self.levels: Dict[float, PitchContour] = {
+            float(interval): resample_pitch_contour(contour, interval=interval, mode=mode)
+            for interval in sorted(levels)
+        }
+
+    @property
+    def intervals(self) -> Tuple[float, ...]:
+        """Level intervals, fine to coarse."""
+        return tuple(self.levels)
+
+    def level(self, interval: float) -> Optional[PitchContour]:
+        """The level at interval, or None if interval is not a level."""
+        for level_interval, level in self.levels.items():
+            if np.isclose(level_interval, interval, rtol=0, atol=1e-9):
+                return level
+        return None
+
+    def resample(self, interval: float) -> PitchContour:
+        """
+        The contour at interval: the level if there is one, otherwise
+        resampled from the base contour.
+        """
+        level = self.level(interval)
+        if level is not None:
+            return level
+        return resample_pitch_contour(self.contour, interval=interval, mode=self.mode)
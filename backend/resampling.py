@@ -0,0 +1,217 @@
+"""
+Vectorized contour resampling.
+
+All modes share one target grid: points at start + k * interval for every
+k >= 1 with a target strictly before the last input time, which is what
+/api/extract-pitch has always returned.
+
+- 'nearest' picks the input point closest to each target (ties go to the
+  later point), via one np.searchsorted call.
+- 'linear' interpolates frequency and confidence at each target.
+- 'mean', 'median', 'min' and 'max' aggregate every input point within
+  half an interval of the target, using reduceat over the contiguous bins
+  of the (already sorted) times. Their confidence is the bin's voiced
+  ratio, and targets whose bin holds no voiced frames are dropped.
+"""
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+from contour import PitchContour
+
+RESAMPLE_MODES = ('nearest', 'linear', 'mean', 'median', 'min', 'max')
+AGGREGATE_MODES = ('mean', 'median', 'min', 'max')
+
+
+def target_times(contour: PitchContour, interval: float) -> np.ndarray:
+    """Return the resampling grid for contour (float64, possibly empty)."""
+    start = float(contour.times[0])
+    end = float(contour.times[-1])
+    return np.arange(start + interval, end, interval)
+
+
+def nearest_indices(times: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Index of the point in sorted times closest to each target.
+
+    Ties between the neighbours on either side resolve to the later point.
+    """
+    times = times.astype(np.float64, copy=False)
+    n = len(times)
+    upper = np.searchsorted(times, targets, side='left')
+    np.clip(upper, 0, n - 1, out=upper)
+    lower = np.maximum(upper - 1, 0)
+    use_lower = np.abs(times[lower] - targets) < np.abs(times[upper] - targets)
+    return np.where(use_lower, lower, upper)
+
+
+def estimate_frame_period(times: np.ndarray) -> float:
+    """Typical spacing of consecutive frames (the analysis hop)."""
+    if len(times) < 2:
+        return 0.0
+    steps = np.diff(times.astype(np.float64, copy=False))
+    steps = steps[steps > 0]
+    return float(np.median(steps)) if len(steps) else 0.0
+
+
+def aggregate_bins(
+    contour: PitchContour,
+    targets: np.ndarray,
+    interval: float,
+    frame_period: Optional[float] = None,
+    statistics: Iterable[str] = AGGREGATE_MODES + ('confidence',),
+) -> Dict[str, np.ndarray]:
+    """
+    Summarize the points within half an interval of each target.
+
+    Bin edges are located with one np.searchsorted on the sorted times, so
+    the bins are contiguous, non-overlapping slices of the contour and every
+    statistic is a single reduceat (or, for the median, a single argsort)
+    over the whole contour.
+
+    Args:
+        contour: Input contour
+        targets: Evenly spaced bin centres in seconds
+        interval: Bin width in seconds
+        frame_period: Analysis hop in seconds used for the voiced ratio
+                      (estimated from the contour if omitted)
+        statistics: Which of 'mean', 'median', 'min', 'max' and
+                    'confidence' (mean input confidence) to compute
+
+    Returns:
+        Dict of per-bin arrays: 'count', 'voiced_ratio' and each requested
+        statistic. Statistics of empty bins are NaN.
+    """
+    times = contour.times.astype(np.float64, copy=False)
+
+    edges = np.append(targets - interval / 2, targets[-1] + interval / 2)
+    bounds = np.searchsorted(times, edges, side='left')
+    counts = np.diff(bounds)
+    filled = counts > 0
+
+    statistics = set(statistics)
+    stats = {name: np.full(len(targets), np.nan) for name in statistics}
+    stats['count'] = counts
+
+    if filled.any():
+        # Points between the outer edges, grouped bin by bin. Empty bins add
+        # no points, so each filled bin runs exactly up to the next filled
+        # bin's start and reduceat over the filled starts is exact.
+        lo, hi = bounds[0], bounds[-1]
+        freqs = contour.frequencies[lo:hi].astype(np.float64)
+        starts = bounds[:-1][filled] - lo
+        n = counts[filled]
+
+        if 'mean' in statistics:
+            stats['mean'][filled] = np.add.reduceat(freqs, starts) / n
+        if 'confidence' in statistics:
+            confs = contour.confidences[lo:hi].astype(np.float64)
+            stats['confidence'][filled] = np.add.reduceat(confs, starts) / n
+        if 'min' in statistics:
+            stats['min'][filled] = np.minimum.reduceat(freqs, starts)
+        if 'max' in statistics:
+            stats['max'][filled] = np.maximum.reduceat(freqs, starts)
+
+        if 'median' in statistics:
+            # Sort within bins in one go: key = bin id + frequency scaled
+            # into [0, 0.5], so a single argsort orders by bin, then by
+            # frequency (much faster than np.lexsort). Then average the one
+            # or two middle elements of each bin.
+            bin_ids = np.repeat(np.arange(len(n)), n)
+            low, span = freqs.min(), np.ptp(freqs)
+            keys = bin_ids + (freqs - low) / (2 * span) if span > 0 else bin_ids
+            ordered = freqs[np.argsort(keys)]
+            stats['median'][filled] = (
+                ordered[starts + (n - 1) // 2] + ordered[starts + n // 2]
+            ) / 2
+
+    if frame_period is None:
+        frame_period = estimate_frame_period(times)
+    if frame_period > 0:
+        expected = interval / frame_period
+        stats['voiced_ratio'] = np.minimum(counts / expected, 1.0)
+    else:
+        stats['voiced_ratio'] = filled.astype(np.float64)
+
+    return stats
+
+
+def resample_contour(
+    contour: PitchContour,
+    interval: float,
+    mode: str = 'nearest',
+    frame_period: Optional[float] = None,
+) -> PitchContour:
+    """
+    Resample a contour onto a fixed time grid.
+
+    Args:
+        contour: Sorted input contour (PitchContour guarantees ordering, so
+                 no sort is needed here)
+        interval: Grid spacing in seconds; must be positive
+        mode: One of RESAMPLE_MODES
+        frame_period: Analysis hop for the voiced ratio of aggregate modes
+
+    Returns:
+        Resampled contour. Contours shorter than one interval resample to
+        their first point.
+
+    Raises:
+        ValueError: If interval is not positive or mode is unknown
+    """
+    if interval <= 0:
+        raise ValueError("interval must be a positive number")
+    if mode not in RESAMPLE_MODES:
+        raise ValueError(f"unknown resample mode '{mode}', expected one of {', '.join(RESAMPLE_MODES)}")
+
+    if len(contour) == 0:
+        return contour
+    if len(contour) == 1 or contour.times[-1] - contour.times[0] < interval:
+        return contour[:1]
+
+    targets = target_times(contour, interval)
+    if len(targets) == 0:
+        return PitchContour.empty()
+    return resample_at_targets(contour, targets, interval, mode, frame_period)
+
+
+def resample_at_targets(
+    contour: PitchContour,
+    targets: np.ndarray,
+    interval: float,
+    mode: str = 'nearest',
+    frame_period: Optional[float] = None,
+) -> PitchContour:
+    """
+    Evaluate mode at given grid targets (the core of resample_contour).
+
+    contour only needs to cover the targets' neighbourhood: the points on
+    either side of each target and, for aggregate modes, everything within
+    half an interval of it. Results then equal those of resampling the
+    whole contour, which lets windows of a long contour be resampled on its
+    global grid (see tracks.py).
+
+    Args:
+        contour: Sorted, non-empty input contour
+        targets: Non-empty, evenly spaced target times
+        interval: Grid spacing in seconds
+        mode: One of RESAMPLE_MODES
+        frame_period: Analysis hop for the voiced ratio of aggregate modes
+
+    Returns:
+        Resampled contour (aggregate modes drop targets with empty bins)
+    """
+    if mode == 'nearest':
+        indices = nearest_indices(contour.times, targets)
+        return PitchContour(targets, contour.frequencies[indices], contour.confidences[indices])
+
+    if mode == 'linear':
+        times = contour.times.astype(np.float64)
+        return PitchContour(
+            targets,
+            np.interp(targets, times, contour.frequencies),
+            np.interp(targets, times, contour.confidences),
+        )
+
+    stats = aggregate_bins(contour, targets, interval, frame_period, statistics=(mode,))
+    voiced = stats['count'] > 0
+    return PitchContour(targets[voiced], stats[mode][voiced], stats['voiced_ratio'][voiced])
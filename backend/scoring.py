@@ -0,0 +1,367 @@
+"""
+Sing-along scoring: a user's contour against a track's target contour.
+
+Both contours are binned onto a common grid of SCORE_FRAME_PERIOD slots in
+track time (mean cents relative to A4, or unvoiced), aligned with dynamic
+time warping and compared frame by frame.
+
+The alignment is a Sakoe-Chiba banded DTW: frame i of the target may only
+match user frames within band frames of i, which is all the timing slack a
+sing-along needs and keeps the work and memory at O(n * band) instead of
+O(n^2). The accumulated costs are kept in band coordinates, an (n, 2 * band
++ 1) array whose column k holds user frame i + k - band, and each row is
+computed in a few whole-row operations: the diagonal and vertical steps
+come from the previous row, and the chain of horizontal steps within a row
+is a running minimum,
+
+    D[i, j] = P[j] + min over k <= j of (A[k] - P[k - 1])
+
+where P is the prefix sum of the row's costs and A[k] the best of the two
+steps from the previous row into column k. The warping path is then read
+back from a compact int8 step array.
+
+estimate_offset finds the constant latency between a take and the target
+before any of this: the normalized cross-correlation of the two cents
+signals, restricted to frames voiced in both, for every lag at once from a
+handful of FFTs (O(n log n) instead of one comparison per candidate lag).
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from contour import PitchContour
+from engines import parabolic_offset
+
+# Grid slot in seconds both contours are binned onto
+SCORE_FRAME_PERIOD = 0.05
+# Sakoe-Chiba band: how far the alignment may shift a frame, in seconds
+SCORE_BAND_SECONDS = 0.5
+# A target frame counts as hit when the aligned user pitch is this close
+SCORE_TOLERANCE_CENTS = 50.0
+# Length of the sections accuracy is also reported for
+SCORE_SEGMENT_SECONDS = 10.0
+# Alignment cost of a frame voiced in one contour only, in cents
+SCORE_VOICING_COST = 300.0
+
+# Largest latency estimate_offset searches, in seconds
+OFFSET_MAX_LAG_SECONDS = 2.0
+# Fewest frames voiced in both contours a lag must overlap to be considered
+OFFSET_MIN_OVERLAP_FRAMES = 20
+
+# Steps of the warping path into a cell
+STEP_DIAGONAL, STEP_UP, STEP_LEFT = 0, 1, 2
+
+
+def grid_cents(contour: PitchContour, start: float, n_frames: int,
+               frame_period: float = SCORE_FRAME_PERIOD) -> np.ndarray:
+    """
+    Mean pitch of a contour's points per grid slot.
+
+    Args:
+        contour: Input contour; points without a positive frequency are
+                 treated as unvoiced
+        start: Time of the first slot's start in seconds
+        n_frames: Number of slots
+        frame_period: Slot length in seconds
+
+    Returns:
+        Cents relative to A4 per slot, NaN for slots without points
+    """
+    slots = np.floor((contour.times.astype(np.float64) - start) / frame_period).astype(np.int64)
+    inside = (slots >= 0) & (slots < n_frames) & (contour.frequencies > 0)
+    slots = slots[inside]
+    cents = 1200 * np.log2(contour.frequencies[inside].astype(np.float64) / 440.0)
+    counts = np.bincount(slots, minlength=n_frames)
+    sums = np.bincount(slots, weights=cents, minlength=n_frames)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def cents_error(target: np.ndarray, user: np.ndarray, octave_invariant: bool = True) -> np.ndarray:
+    """Absolute cents difference, folded into [0, 600] when octave_invariant."""
+    difference = user - target
+    if octave_invariant:
+        difference = np.mod(difference + 600.0, 1200.0) - 600.0
+    return np.abs(difference)
+
+
+def band_costs(target: np.ndarray, user: np.ndarray, band: int,
+               octave_invariant: bool = True) -> np.ndarray:
+    """
+    Matching cost of every in-band frame pair of two equally long grids.
+
+    Pairs of voiced frames cost their cents error, pairs voiced on one side
+    only SCORE_VOICING_COST, unvoiced pairs nothing.
+
+    Returns:
+        (n, 2 * band + 1) costs in band coordinates (column k pairs target
+        frame i with user frame i + k - band); NaN past either end
+    """
+    n = len(target)
+    user_index = np.arange(n)[:, None] + np.arange(-band, band + 1)[None, :]
+    valid = (user_index >= 0) & (user_index < n)
+    paired = user[np.clip(user_index, 0, n - 1)]
+
+    target_voiced = np.broadcast_to(~np.isnan(target)[:, None], paired.shape)
+    user_voiced = ~np.isnan(paired)
+    costs = np.where(target_voiced == user_voiced, 0.0, SCORE_VOICING_COST)
+    both = target_voiced & user_voiced
+    costs[both] = cents_error(np.broadcast_to(target[:, None], paired.shape)[both], paired[both],
+                              octave_invariant)
+    costs[~valid] = np.nan
+    return costs
+
+
+def banded_dtw(costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cheapest warping path through band costs (see band_costs).
+
+    The path runs from frame pair (0, 0) to (n - 1, n - 1) with diagonal,
+    vertical and horizontal steps, each cell's cost counted once.
+
+    Returns:
+        (target_frames, user_frames) of the path, in order; every target
+        frame appears at least once
+    """
+    n, width = costs.shape
+    band = width // 2
+    row_costs = np.where(np.isnan(costs), 0.0, costs)
+    prefix = np.cumsum(row_costs, axis=1)
+    # A[k] - P[k - 1] = A[k] - P[k] + cost[k]
+    offsets = row_costs - prefix
+
+    # accumulated[i, :width] is D in band coordinates; the extra column
+    # (always inf) is the missing vertical step past the band's edge
+    accumulated = np.empty((n, width + 1))
+    accumulated[:, width] = np.inf
+    entries = np.empty((n, width))
+    best = np.empty((n, width))
+    entries[0] = np.inf
+    entries[0, band] = 0.0
+    for i in range(n):
+        if i:
+            np.minimum(accumulated[i - 1, :width], accumulated[i - 1, 1:], out=entries[i])
+        entries[i] += offsets[i]
+        np.minimum.accumulate(entries[i], out=best[i])
+        np.add(best[i], prefix[i], out=accumulated[i, :width])
+
+    # Steps into each cell, recovered in whole-array operations
+    up_better = np.zeros((n, width), dtype=bool)
+    up_better[1:] = accumulated[:-1, 1:] < accumulated[:-1, :width]
+    steps = np.where(best < entries, STEP_LEFT, np.where(up_better, STEP_UP, STEP_DIAGONAL))
+    steps = steps.astype(np.int8).tobytes()
+
+    target_frames: List[int] = []
+    band_columns: List[int] = []
+    i, k = n - 1, band
+    while True:
+        target_frames.append(i)
+        band_columns.append(k)
+        if i == 0 and k == band:
+            break
+        step = steps[i * width + k]
+        if step == STEP_DIAGONAL:
+            i -= 1
+        elif step == STEP_UP:
+            i -= 1
+            k += 1
+        else:
+            k -= 1
+
+    target_path = np.array(target_frames[::-1], dtype=np.int64)
+    return target_path, target_path + np.array(band_columns[::-1], dtype=np.int64) - band
+
+
+def score_contours(
+    target: PitchContour,
+    user: PitchContour,
+    offset: float = 0.0,
+    band_seconds: float = SCORE_BAND_SECONDS,
+    tolerance: float = SCORE_TOLERANCE_CENTS,
+    segment_seconds: float = SCORE_SEGMENT_SECONDS,
+    octave_invariant: bool = True,
+    frame_period: float = SCORE_FRAME_PERIOD,
+) -> Dict:
+    """
+    Score a sung contour against a target contour.
+
+    Args:
+        target: The track's analysis contour
+        user: The user's contour, timed from the start of the track
+        offset: Seconds added to the user's times (e.g. to undo latency)
+        band_seconds: Largest timing difference the alignment absorbs
+        tolerance: Largest cents error of a hit
+        segment_seconds: Length of the sections reported in 'segments'
+        octave_invariant: Compare pitch classes, so singing an octave
+                          below or above the target still hits
+        frame_period: Grid slot in seconds
+
+    Returns:
+        Dict with the overall 'accuracy' (fraction of the target's voiced
+        frames hit), 'cents_error' (mean error of the voiced target frames
+        the user sang), 'coverage' (fraction of voiced target frames the
+        user sang at all), 'voiced_frames', 'frame_period' and 'segments',
+        a list of {start, end, accuracy, cents_error, coverage}; accuracy
+        and errors are None where there is nothing to measure
+
+    Raises:
+        ValueError: If the target has no voiced points
+    """
+    if len(target) == 0:
+        raise ValueError("the target has no voiced frames to score against")
+
+    n = int(np.floor(float(target.end_time) / frame_period)) + 1
+    target_cents = grid_cents(target, 0.0, n, frame_period)
+    user_cents = grid_cents(
+        PitchContour(user.times.astype(np.float64) + offset, user.frequencies, user.confidences),
+        0.0, n, frame_period,
+    )
+
+    band = int(round(band_seconds / frame_period))
+    target_path, user_path = banded_dtw(band_costs(target_cents, user_cents, band, octave_invariant))
+
+    # Each target frame's error is its best match along the path
+    path_errors = cents_error(target_cents[target_path], user_cents[user_path], octave_invariant)
+    path_errors = np.where(np.isnan(path_errors), np.inf, path_errors)
+    row_starts = np.flatnonzero(np.diff(target_path, prepend=-1))
+    frame_errors = np.minimum.reduceat(path_errors, row_starts)
+
+    voiced = ~np.isnan(target_cents)
+    sung = voiced & np.isfinite(frame_errors)
+    hits = voiced & (frame_errors <= tolerance)
+
+    segment_ids = (np.arange(n) * frame_period // segment_seconds).astype(np.int64)
+    n_segments = segment_ids[-1] + 1
+    voiced_counts = np.bincount(segment_ids, weights=voiced, minlength=n_segments)
+    sung_counts = np.bincount(segment_ids, weights=sung, minlength=n_segments)
+    hit_counts = np.bincount(segment_ids, weights=hits, minlength=n_segments)
+    error_sums = np.bincount(segment_ids, weights=np.where(sung, frame_errors, 0.0), minlength=n_segments)
+
+    segments = [
+        {
+            'start': round(index * segment_seconds, 3),
+            'end': round(min((index + 1) * segment_seconds, n * frame_period), 3),
+            **_summary(voiced_count, sung_count, hit_count, error_sum),
+        }
+        for index, (voiced_count, sung_count, hit_count, error_sum) in enumerate(zip(
+            voiced_counts.tolist(), sung_counts.tolist(), hit_counts.tolist(), error_sums.tolist()
+        ))
+    ]
+    return {
+        **_summary(voiced.sum(), sung.sum(), hits.sum(), error_sums.sum()),
+        'voiced_frames': int(voiced.sum()),
+        'frame_period': frame_period,
+        'segments': segments,
+    }
+
+
+def _summary(voiced: float, sung: float, hits: float, error_sum: float) -> Dict[str, Optional[float]]:
+    return {
+        'accuracy': round(float(hits / voiced), 4) if voiced else None,
+        'cents_error': round(float(error_sum / sung), 1) if sung else None,
+        'coverage': round(float(sung / voiced), 4) if voiced else None,
+    }
+
+
+def masked_cross_correlation(
+    target: np.ndarray,
+    user: np.ndarray,
+    max_lag: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Normalized cross-correlation of two grids over their voiced frames.
+
+    For each lag L, frame i of target is paired with frame i + L of user
+    and the Pearson correlation of the pairs voiced on both sides is taken,
+    so unvoiced frames neither count as zeros nor shrink the score. Its six
+    sums (pair count, sums, sums of squares and of products) are masked
+    cross-correlations, all computed with one batch of real FFTs.
+
+    Args:
+        target: Cents per frame, NaN when unvoiced
+        user: Cents per frame, NaN when unvoiced
+        max_lag: Largest lag in frames, either way
+
+    Returns:
+        (lags, correlations, overlaps) for lags -max_lag..max_lag;
+        correlations are NaN where the pairs have no variance
+    """
+    target_voiced = ~np.isnan(target)
+    user_voiced = ~np.isnan(user)
+    # Centred signals keep the sums of squares well conditioned
+    x = np.where(target_voiced, target - np.mean(target[target_voiced]) if target_voiced.any() else 0.0, 0.0)
+    y = np.where(user_voiced, user - np.mean(user[user_voiced]) if user_voiced.any() else 0.0, 0.0)
+
+    size = 1 << int(np.ceil(np.log2(len(target) + len(user) + 1)))
+    target_spectra = np.fft.rfft(np.stack([target_voiced.astype(np.float64), x, x * x]), size, axis=1)
+    user_spectra = np.fft.rfft(np.stack([user_voiced.astype(np.float64), y, y * y]), size, axis=1)
+    # corr(a, b)[L] = sum_i a[i] b[i + L], with negative lags wrapped to the end
+    pairs = np.conj(target_spectra[[0, 1, 0, 1, 2, 0]]) * user_spectra[[0, 0, 1, 1, 0, 2]]
+    lags = np.arange(-max_lag, max_lag + 1)
+    sums = np.fft.irfft(pairs, size, axis=1)[:, lags % size]
+    count, sum_x, sum_y, sum_xy, sum_xx, sum_yy = sums
+    count = np.rint(count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sum_xy - sum_x * sum_y / count
+        variance_x = sum_xx - sum_x ** 2 / count
+        variance_y = sum_yy - sum_y ** 2 / count
+        # Rounding leaves tiny variances where a side is constant
+        valid = (
+            (count > 1)
+            & (variance_x > 1e-9 * np.maximum(sum_xx, 1.0))
+            & (variance_y > 1e-9 * np.maximum(sum_yy, 1.0))
+        )
+        correlations = np.where(valid, covariance / np.sqrt(variance_x * variance_y), np.nan)
+    return lags, correlations, count.astype(np.int64)
+
+
+def estimate_offset(
+    target: PitchContour,
+    user: PitchContour,
+    max_lag_seconds: float = OFFSET_MAX_LAG_SECONDS,
+    frame_period: float = SCORE_FRAME_PERIOD,
+    min_overlap: int = OFFSET_MIN_OVERLAP_FRAMES,
+) -> Dict:
+    """
+    Estimate how late a take runs relative to the target.
+
+    Args:
+        target: The track's analysis contour
+        user: The user's contour, timed from the start of the track
+        max_lag_seconds: Largest latency searched, either way
+        frame_period: Grid slot in seconds (the peak is refined to a
+                      fraction of a slot by parabolic interpolation)
+        min_overlap: Fewest frames voiced in both a lag must pair up
+
+    Returns:
+        Dict with 'lag' (seconds the user is behind the target; negative
+        when ahead), 'offset' (-lag, to add to the user's times, e.g. as
+        score_contours' offset), 'confidence' (the correlation at the peak,
+        0 to 1) and 'overlap' (seconds voiced in both at the peak)
+
+    Raises:
+        ValueError: If no lag pairs up min_overlap voiced frames
+    """
+    end = max(float(target.end_time) if len(target) else 0.0, float(user.end_time) if len(user) else 0.0)
+    n = int(np.floor(end / frame_period)) + 1
+    target_cents = grid_cents(target, 0.0, n, frame_period)
+    user_cents = grid_cents(user, 0.0, n, frame_period)
+
+    max_lag = int(round(max_lag_seconds / frame_period))
+    lags, correlations, overlaps = masked_cross_correlation(target_cents, user_cents, max_lag)
+    correlations = np.where(overlaps >= min_overlap, correlations, np.nan)
+    if np.isnan(correlations).all():
+        raise ValueError("the take and the target overlap too little to estimate an offset")
+
+    peak = int(np.nanargmax(correlations))
+    lag = float(lags[peak])
+    if 0 < peak < len(lags) - 1 and not np.isnan(correlations[peak - 1:peak + 2]).any():
+        lag += float(parabolic_offset(correlations[peak - 1], correlations[peak], correlations[peak + 1]))
+    lag *= frame_period
+    return {
+        'lag': round(lag, 4),
+        'offset': round(-lag, 4) + 0.0,
+        'confidence': round(float(np.clip(correlations[peak], 0.0, 1.0)), 4),
+        'overlap': round(float(overlaps[peak] * frame_period), 3),
+    }
@@ -0,0 +1,250 @@
+"""
+Incremental pitch extraction for progressive (streamed) responses.
+
+StreamingPitchTracker consumes audio in blocks of any size and returns each
+part of the resampled contour as soon as it is final, so a client can start
+drawing after one block instead of after the whole song. Every stage carries
+just enough state across blocks to reproduce the batch pipeline
+(analyze_samples followed by resample_pitch_contour):
+
+- framing: consecutive frames overlap by n_fft - hop_length samples, so the
+  unconsumed tail of each block is kept for the next one, and the stream is
+  padded with n_fft // 2 zeros at both ends like piptrack's centred frames;
+- smoothing: a RunningMedian carries the filter window across blocks; it
+  looks kernel_size // 2 points ahead, so the newest points are held back
+  until their successors have arrived;
+- resampling: a grid point is emitted once the points it depends on (its
+  neighbours, or for aggregate modes its whole bin) can no longer change.
+
+Only frame-local engines (see engines.PitchEngine) can be streamed; pyin's
+Viterbi pass needs the whole signal. Each frame is judged on its own samples,
+so the streamed contour matches the batch one. Confidence is the exception
+for engines with relative confidences (piptrack): the batch pipeline
+normalizes it by the loudest frame of the song, which a stream cannot know
+in advance, so streamed confidences use the loudest frame so far.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from contour import PitchContour
+from engines import DEFAULT_ENGINE, get_engine
+from median import RunningMedian
+from pipeline import ANALYSIS_SAMPLE_RATE, SMOOTHING_KERNEL_SIZE
+from resampling import AGGREGATE_MODES, RESAMPLE_MODES, aggregate_bins, nearest_indices
+
+# Frames per streamed block (about 3 s of audio at the analysis rate)
+STREAM_BLOCK_FRAMES = 128
+
+
+class StreamingPitchTracker:
+    """
+    Block-by-block equivalent of analyze_samples + resample_pitch_contour.
+
+    Feed samples with process() and call finish() once after the last block.
+    Both return (smoothed, resampled): the newly final part of the smoothed
+    analysis contour (for relative-confidence engines with raw strengths as
+    confidences, see peak) and of the resampled contour.
+
+    Args:
+        interval: Resampling interval in seconds
+        mode: Resampling mode (one of RESAMPLE_MODES)
+        sr: Sample rate of the incoming audio
+        engine: Name of a registered, frame-local pitch engine
+        kernel_size: Median filter size (odd)
+
+    Raises:
+        ValueError: If interval is not positive, mode is unknown or engine is
+                    unknown or cannot be streamed
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        mode: str = 'nearest',
+        sr: int = ANALYSIS_SAMPLE_RATE,
+        engine: str = DEFAULT_ENGINE,
+        kernel_size: int = SMOOTHING_KERNEL_SIZE,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be a positive number")
+        if mode not in RESAMPLE_MODES:
+            raise ValueError(f"unknown resample mode '{mode}', expected one of {', '.join(RESAMPLE_MODES)}")
+        pitch_engine = get_engine(engine)
+        if not pitch_engine.frame_local:
+            raise ValueError(f"pitch engine '{engine}' cannot be streamed")
+
+        self.interval = interval
+        self.mode = mode
+        self.sr = sr
+        self.engine = engine
+        self.hop_length = pitch_engine.hop_length
+        self.n_fft = pitch_engine.frame_length
+        self.kernel_size = kernel_size
+
+        # Framing: samples not yet consumed, starting with the centre padding
+        self._samples = np.zeros(self.n_fft // 2, dtype=np.float32)
+        self._next_frame = 0
+        self.n_samples = 0
+        # Loudest raw strength so far (relative-confidence engines only)
+        self.peak = 0.0
+        self._relative = pitch_engine.relative_confidence
+
+        # Smoothing: voiced points not yet emitted, and the filtered
+        # frequencies already known for the first of them
+        self._median = RunningMedian(kernel_size)
+        self._pending = PitchContour.empty()
+        self._filtered = np.empty(0)
+        self._voiced = 0
+
+        # Resampling: smoothed points still needed for upcoming grid points
+        self._points = PitchContour.empty()
+        self._first_point: Optional[PitchContour] = None
+        self._last_time = 0.0
+        self._grid_start = 0.0
+        self._grid_step = 0.0
+        self._next_target = 0
+        self.finished = False
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio consumed so far."""
+        return self.n_samples / self.sr
+
+    def process(self, samples: np.ndarray) -> Tuple[PitchContour, PitchContour]:
+        """Consume one block of mono samples."""
+        if self.finished:
+            raise RuntimeError("tracker already finished")
+        samples = np.asarray(samples, dtype=np.float32)
+        self.n_samples += len(samples)
+        return self._advance(samples, final=False)
+
+    def finish(self) -> Tuple[PitchContour, PitchContour]:
+        """Flush all held-back frames and points at the end of the stream."""
+        if self.finished:
+            raise RuntimeError("tracker already finished")
+        self.finished = True
+        return self._advance(np.zeros(self.n_fft // 2, dtype=np.float32), final=True)
+
+    def _advance(self, samples: np.ndarray, final: bool) -> Tuple[PitchContour, PitchContour]:
+        voiced = self._track(samples)
+        smoothed = self._smooth(voiced, final)
+        return smoothed, self._resample(smoothed, final)
+
+    def _track(self, samples: np.ndarray) -> PitchContour:
+        # Track every complete frame and keep the remainder
+        buffer = np.concatenate([self._samples, samples])
+        if len(buffer) < self.n_fft:
+            self._samples = buffer
+            return PitchContour.empty()
+
+        n_frames = 1 + (len(buffer) - self.n_fft) // self.hop_length
+        used = (n_frames - 1) * self.hop_length + self.n_fft
+        voiced = get_engine(self.engine).track(
+            buffer[:used], self.sr, center=False, first_frame=self._next_frame
+        )
+
+        self._samples = buffer[n_frames * self.hop_length:]
+        self._next_frame += n_frames
+        if self._relative and len(voiced):
+            self.peak = max(self.peak, float(voiced.confidences.max()))
+        return voiced
+
+    def _smooth(self, voiced: PitchContour, final: bool) -> PitchContour:
+        pending = PitchContour.concatenate([self._pending, voiced])
+        self._voiced += len(voiced)
+        filtered = [self._filtered, self._median.process(voiced.frequencies)]
+        if final:
+            filtered.append(self._median.finish())
+        filtered = np.concatenate(filtered)
+
+        if self._voiced < self.kernel_size:
+            # smooth_pitch_contour leaves contours shorter than the kernel
+            # alone, so nothing is final until enough points have arrived
+            self._pending, self._filtered = pending, filtered
+            return pending if final else PitchContour.empty()
+
+        count = len(filtered)
+        self._pending, self._filtered = pending[count:], np.empty(0)
+        return pending[:count].with_frequencies(filtered)
+
+    def _resample(self, smoothed: PitchContour, final: bool) -> PitchContour:
+        if len(smoothed):
+            if self._first_point is None:
+                self._first_point = smoothed[:1]
+                # Same grid values as np.arange(start + interval, end, interval)
+                self._grid_start = smoothed.start_time + self.interval
+                self._grid_step = (self._grid_start + self.interval) - self._grid_start
+            self._points = PitchContour.concatenate([self._points, smoothed])
+            self._last_time = smoothed.end_time
+        if self._first_point is None:
+            return PitchContour.empty()
+
+        # Number of grid points strictly before the newest point
+        available = max(int(np.ceil((self._last_time - self._grid_start) / self.interval)), 0)
+        aggregate = self.mode in AGGREGATE_MODES
+        if final:
+            if available == 0:
+                # Shorter than one interval: resample_contour keeps the first point
+                span = self._last_time - self._first_point.start_time
+                return self._first_point if span < self.interval else PitchContour.empty()
+            ready = available
+        elif aggregate:
+            # A bin's upper edge comes from the next grid point, which must exist
+            ready = available - 1
+        else:
+            ready = available
+
+        if ready <= self._next_target:
+            return PitchContour.empty()
+
+        first = self._next_target
+        extra = 1 if aggregate and not final else 0
+        targets = self._grid_start + np.arange(first, ready + extra) * self._grid_step
+        out = self._resample_targets(targets, drop_last=bool(extra))
+        self._next_target = ready
+
+        # Drop points no upcoming grid point can depend on
+        next_target = self._grid_start + ready * self._grid_step
+        lower = next_target - (self.interval / 2 if aggregate else 0.0)
+        keep = max(int(np.searchsorted(self._points.times, lower, side='left')) - 1, 0)
+        self._points = self._points[keep:]
+        return out
+
+    def _resample_targets(self, targets: np.ndarray, drop_last: bool) -> PitchContour:
+        points = self._points
+        peak = (self.peak or 1.0) if self._relative else 1.0
+        if self.mode == 'nearest':
+            indices = nearest_indices(points.times, targets)
+            return PitchContour(targets, points.frequencies[indices],
+                                points.confidences[indices] / peak)
+        if self.mode == 'linear':
+            times = points.times.astype(np.float64)
+            return PitchContour(targets, np.interp(targets, times, points.frequencies),
+                                np.interp(targets, times, points.confidences) / peak)
+
+        stats = aggregate_bins(points, targets, self.interval,
+                               frame_period=self.hop_length / self.sr, statistics=(self.mode,))
+        if drop_last:
+            targets = targets[:-1]
+            stats = {name: values[:-1] for name, values in stats.items()}
+        voiced = stats['count'] > 0
+        return PitchContour(targets[voiced], stats[self.mode][voiced], stats['voiced_ratio'][voiced])
+
+
+def stream_step(
+    tracker: StreamingPitchTracker,
+    block: Optional[np.ndarray],
+) -> Tuple[StreamingPitchTracker, PitchContour, PitchContour]:
+    """
+    Advance tracker by one block (None finishes the stream).
+
+    Module-level so the tracker can be shipped to a worker process and back
+    with each block.
+    """
+    if block is None:
+        smoothed, resampled = tracker.finish()
+    else:
+        smoothed, resampled = tracker.process(block)
+    return tracker, smoothed, resampled
+
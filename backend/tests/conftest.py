@@ -4,6 +4,7 @@ Pytest configuration and fixtures for Pitch Detector tests
 import pytest
 import sys
 import os
+from contextlib import ExitStack
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -49,3 +50,63 @@ def noisy_pitch_contour():
                 'frequency': 440.0 + (i * 5)
             })
     return contour
+
+
+class InlinePools:
+    """
+    Worker pools stand-in that runs everything in the calling thread.
+
+    Counts run_io calls, which the app only makes to look up a video's
+    audio stream, as downloads.
+    """
+
+    def __init__(self):
+        self.downloads = 0
+
+    async def run_io(self, func, *args):
+        self.downloads += 1
+        return func(*args)
+
+    async def run_cpu(self, func, *args):
+        return func(*args)
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@pytest.fixture
+def inline_pools():
+    """Worker pools that run inline and count downloads"""
+    return InlinePools()
+
+
+@pytest.fixture
+def app_client(monkeypatch, inline_pools):
+    """
+    Factory for a test client of the app on fresh state.
+
+    Call it with the attributes of main to replace (decode_audio, at least,
+    unless the test never decodes). Worker pools run inline (client.pools),
+    the result cache, request coalescing and jobs start empty, and every
+    URL resolves to a local path unless resolve_audio_source is given.
+    """
+    from fastapi.testclient import TestClient
+    from audio_source import AudioSource
+    from cache import ResultCache
+    from jobs import JobManager, SingleFlight
+    import main
+
+    with ExitStack() as stack:
+        def make(**attributes):
+            monkeypatch.setattr(main, 'resolve_audio_source', lambda url: AudioSource('/tmp/audio.wav'))
+            monkeypatch.setattr(main, 'worker_pools', inline_pools)
+            monkeypatch.setattr(main, 'result_cache', ResultCache())
+            monkeypatch.setattr(main, 'extraction_flights', SingleFlight())
+            monkeypatch.setattr(main, 'job_manager', JobManager())
+            for name, value in attributes.items():
+                monkeypatch.setattr(main, name, value)
+            client = stack.enter_context(TestClient(main.app))
+            client.pools = inline_pools
+            return client
+
+        yield make
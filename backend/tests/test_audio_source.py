@@ -0,0 +1,134 @@
+import pytest
+import sys
+import os
+import asyncio
+import shutil
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_source
+from audio_source import AudioSource, decode_audio, decode_blocks, ffmpeg_command
+from pipeline import ANALYSIS_SAMPLE_RATE
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch, tmp_path):
+    """Replace ffmpeg with a Python process writing samples as f32le in small chunks"""
+    def install(samples, chunk=1000, status=0, error='', log_bytes=0):
+        path = tmp_path / 'samples.f32'
+        path.write_bytes(np.asarray(samples, dtype='<f4').tobytes())
+        script = (
+            'import sys\n'
+            f'data = open({str(path)!r}, "rb").read()\n'
+            f'for i in range(0, len(data), {chunk}):\n'
+            f'    sys.stdout.buffer.write(data[i:i + {chunk}]); sys.stdout.buffer.flush()\n'
+            f'sys.stderr.write("reconnecting\\n" * ({log_bytes} // 13) + {error!r})\n'
+            f'sys.exit({status})\n'
+        )
+        monkeypatch.setattr(audio_source, 'ffmpeg_command', lambda source, sr: [sys.executable, '-c', script])
+    return install
+
+
+async def collect(blocks):
+    return [block async for block in blocks]
+
+
+class TestFfmpegCommand:
+    """Test suite for the ffmpeg invocation"""
+
+    def test_decodes_to_mono_float_pcm_on_stdout(self):
+        """Test the output format arguments"""
+        command = ffmpeg_command(AudioSource('/tmp/a.webm'), 22050)
+
+        assert command[command.index('-i') + 1] == '/tmp/a.webm'
+        assert command[command.index('-ac') + 1] == '1'
+        assert command[command.index('-ar') + 1] == '22050'
+        assert command[command.index('-f') + 1] == 'f32le'
+        assert command[-1] == 'pipe:1'
+        assert '-headers' not in command
+
+    def test_http_headers_forwarded(self):
+        """Test that yt-dlp's request headers reach ffmpeg"""
+        source = AudioSource('https://example.com/a', {'User-Agent': 'x', 'Referer': 'y'})
+
+        command = ffmpeg_command(source)
+
+        assert command[command.index('-headers') + 1] == 'User-Agent: x\r\nReferer: y\r\n'
+        assert command.index('-headers') < command.index('-i')
+
+
+class TestDecodeAudio:
+    """Test suite for whole-file pipe decoding"""
+
+    def test_reads_all_samples(self, fake_ffmpeg):
+        """Test that chunked output is reassembled exactly"""
+        samples = np.random.default_rng(0).standard_normal(5001).astype(np.float32)
+        fake_ffmpeg(samples, chunk=999)
+
+        y = asyncio.run(decode_audio(AudioSource('x', duration=5001 / ANALYSIS_SAMPLE_RATE)))
+
+        assert y.dtype == np.float32
+        np.testing.assert_array_equal(y, samples)
+
+    def test_buffer_grows_past_advertised_duration(self, fake_ffmpeg):
+        """Test that an underestimated duration still yields every sample"""
+        samples = np.arange(20000, dtype=np.float32)
+        fake_ffmpeg(samples)
+
+        y = asyncio.run(decode_audio(AudioSource('x', duration=0.01)))
+
+        np.testing.assert_array_equal(y, samples)
+
+    def test_ffmpeg_failure_raises(self, fake_ffmpeg):
+        """Test that a non-zero exit is reported with ffmpeg's message"""
+        fake_ffmpeg([], status=1, error='Invalid data found')
+
+        with pytest.raises(RuntimeError, match='Invalid data found'):
+            asyncio.run(decode_audio(AudioSource('x')))
+
+    def test_verbose_stderr_does_not_block(self, fake_ffmpeg):
+        """Test that more stderr than a pipe buffer holds is drained while decoding"""
+        samples = np.arange(5000, dtype=np.float32)
+        fake_ffmpeg(samples, status=1, error='gave up', log_bytes=1 << 20)
+
+        with pytest.raises(RuntimeError, match='gave up') as excinfo:
+            asyncio.run(asyncio.wait_for(decode_audio(AudioSource('x')), timeout=30))
+
+        assert len(str(excinfo.value)) < 2 * audio_source.STDERR_TAIL_BYTES
+
+
+class TestDecodeBlocks:
+    """Test suite for block-wise pipe decoding"""
+
+    def test_blocks_are_exact_and_contiguous(self, fake_ffmpeg):
+        """Test block sizes and that concatenation restores the signal"""
+        samples = np.arange(2500, dtype=np.float32)
+        fake_ffmpeg(samples, chunk=333)
+
+        blocks = asyncio.run(collect(decode_blocks(AudioSource('x'), 1000)))
+
+        assert [len(block) for block in blocks] == [1000, 1000, 500]
+        np.testing.assert_array_equal(np.concatenate(blocks), samples)
+
+    def test_empty_output(self, fake_ffmpeg):
+        """Test that no audio yields no blocks"""
+        fake_ffmpeg([])
+
+        assert asyncio.run(collect(decode_blocks(AudioSource('x'), 1000))) == []
+
+
+@pytest.mark.skipif(shutil.which(audio_source.FFMPEG_BINARY) is None, reason='ffmpeg not installed')
+def test_real_ffmpeg_decodes_wav(tmp_path):
+    """Test a round trip through the real ffmpeg binary"""
+    import soundfile
+
+    t = np.arange(ANALYSIS_SAMPLE_RATE) / ANALYSIS_SAMPLE_RATE
+    y = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+    path = str(tmp_path / 'tone.wav')
+    soundfile.write(path, y, ANALYSIS_SAMPLE_RATE, subtype='FLOAT')
+
+    decoded = asyncio.run(decode_audio(AudioSource(path)))
+
+    np.testing.assert_allclose(decoded, y, atol=1e-6)
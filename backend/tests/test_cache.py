@@ -0,0 +1,185 @@
+import pytest
+import sys
+import os
+import time
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import ResultCache, make_cache_key, normalize_video_id
+from contour import PitchContour
+
+
+class TestNormalizeVideoId:
+    """Test suite for YouTube URL normalization"""
+
+    @pytest.mark.parametrize("url", [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+        "https://m.youtube.com/watch?list=abc&v=dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ?si=tracking",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+        "  youtu.be/dQw4w9WgXcQ  ",
+    ])
+    def test_url_variants_share_id(self, url):
+        """Test that different spellings of one video normalize identically"""
+        assert normalize_video_id(url) == "youtube:dQw4w9WgXcQ"
+
+    def test_unknown_url_falls_back_to_stripped_url(self):
+        """Test that non-YouTube URLs are keyed by the URL itself"""
+        assert normalize_video_id(" https://example.com/a.mp3 ") == "https://example.com/a.mp3"
+
+
+class TestMakeCacheKey:
+    """Test suite for cache key construction"""
+
+    def test_key_is_stable(self):
+        """Test that identical inputs produce identical keys"""
+        a = make_cache_key("youtube:x", resample_interval=0.5, sample_rate=22050)
+        b = make_cache_key("youtube:x", sample_rate=22050, resample_interval=0.5)
+        assert a == b
+
+    def test_parameters_change_key(self):
+        """Test that any pipeline parameter change yields a new key"""
+        base = make_cache_key("youtube:x", resample_interval=0.5)
+        assert make_cache_key("youtube:x", resample_interval=0.1) != base
+        assert make_cache_key("youtube:y", resample_interval=0.5) != base
+
+
+class TestResultCache:
+    """Test suite for the two-tier LRU result cache"""
+
+    def test_miss_then_hit(self):
+        """Test basic put/get and hit/miss counters"""
+        cache = ResultCache()
+
+        assert cache.get("k") is None
+        cache.put("k", {"value": 1})
+        assert cache.get("k") == {"value": 1}
+
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["hits"] == 1
+
+    def test_lru_eviction_by_item_count(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = ResultCache(max_memory_items=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # 'b' is now least recently used
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["memory_evictions"] == 1
+
+    def test_eviction_by_memory_bytes(self):
+        """Test that the memory tier respects its byte budget"""
+        cache = ResultCache(max_memory_bytes=4096)
+        for i in range(10):
+            cache.put(f"k{i}", b"x" * 1000)
+
+        stats = cache.stats()
+        assert stats["memory_bytes"] <= 4096
+        assert stats["memory_evictions"] > 0
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are not served"""
+        cache = ResultCache(ttl=0.05)
+        cache.put("k", "v")
+        time.sleep(0.1)
+
+        assert cache.get("k") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        """Test that entries persist on disk across cache instances"""
+        ResultCache(cache_dir=str(tmp_path)).put("k", {"pitch_data": [1, 2, 3]})
+
+        fresh = ResultCache(cache_dir=str(tmp_path))
+        assert fresh.get("k") == {"pitch_data": [1, 2, 3]}
+        assert fresh.stats()["disk_hits"] == 1
+
+        # Promoted into memory on the disk hit
+        fresh.get("k")
+        assert fresh.stats()["memory_hits"] == 1
+
+    def test_disk_tier_expiry(self, tmp_path):
+        """Test that expired disk entries are removed"""
+        ResultCache(cache_dir=str(tmp_path), ttl=0.05).put("k", "v")
+        time.sleep(0.1)
+
+        fresh = ResultCache(cache_dir=str(tmp_path), ttl=0.05)
+        assert fresh.get("k") is None
+        assert not any(name.endswith(".pkl") for name in os.listdir(tmp_path))
+
+    def test_disk_eviction_by_bytes(self, tmp_path):
+        """Test that the disk tier evicts old files over its byte budget"""
+        cache = ResultCache(cache_dir=str(tmp_path), max_disk_bytes=5000)
+        for i in range(10):
+            cache.put(f"k{i}", b"x" * 1000)
+            os.utime(os.path.join(tmp_path, f"k{i}.pkl"), (i, i))
+
+        total = sum(os.path.getsize(os.path.join(tmp_path, n)) for n in os.listdir(tmp_path))
+        assert total <= 5000
+        assert cache.stats()["disk_evictions"] > 0
+        assert os.path.exists(os.path.join(tmp_path, "k9.pkl"))
+
+    def test_clear(self, tmp_path):
+        """Test that clear empties both tiers"""
+        cache = ResultCache(cache_dir=str(tmp_path))
+        cache.put("k", "v")
+        cache.clear()
+
+        assert cache.get("k") is None
+        assert os.listdir(tmp_path) == []
+
+
+class TestExtractPitchCache:
+    """Test suite for cache integration in /api/extract-pitch"""
+
+    def test_cache_hit_skips_pipeline(self, monkeypatch):
+        """Test that a cached result is served without downloading"""
+        from fastapi.testclient import TestClient
+        import main
+
+        monkeypatch.setattr(main, "result_cache", ResultCache())
+        url = "https://www.youtube.com/watch?v=cachedvideo"
+        key = main.result_cache_key(url, 0.5)
+        cached = {
+            'pitch_contour': PitchContour([0.5], [440.0]),
+            'grid_start': 0.0,
+            'duration': 1.0,
+            'sample_rate': main.ANALYSIS_SAMPLE_RATE,
+            'resample_interval': 0.5,
+            'resample_mode': 'nearest',
+            'engine': main.default_engine,
+        }
+        main.result_cache.put(key, cached)
+
+        def fail_download(*args, **kwargs):
+            raise AssertionError("pipeline should not run on a cache hit")
+
+        monkeypatch.setattr(main, "resolve_audio_source", fail_download)
+
+        client = TestClient(main.app)
+        response = client.post("/api/extract-pitch", json={"url": "https://youtu.be/cachedvideo"})
+
+        assert response.status_code == 200
+        assert response.json() == main.pitch_result_json(cached)
+        assert response.json()['pitch_data'] == [{'time': 0.5, 'frequency': 440.0}]
+
+    def test_cache_stats_endpoint(self):
+        """Test that cache counters are exposed"""
+        from fastapi.testclient import TestClient
+        import main
+
+        response = TestClient(main.app).get("/api/cache/stats")
+
+        assert response.status_code == 200
+        assert "hits" in response.json()
+        assert "misses" in response.json()
@@ -0,0 +1,239 @@
+import pytest
+import sys
+import os
+import gzip
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compression
+from compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+from etags import encoded_etag, etag_matches, make_etag
+
+
+def make_app(body=b'x' * 4096, media_type='application/json', chunks=None, minimum_size=1024):
+    """Wrap a one-route Starlette app in the compression middleware"""
+    from starlette.applications import Starlette
+    from starlette.responses import Response, StreamingResponse
+    from starlette.routing import Route
+
+    async def endpoint(request):
+        if chunks is not None:
+            async def generate():
+                for chunk in chunks:
+                    yield chunk
+            return StreamingResponse(generate(), media_type=media_type)
+        return Response(body, media_type=media_type, headers={'ETag': '"abc"'})
+
+    app = Starlette(routes=[Route('/', endpoint)])
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+    return app
+
+
+def get_raw(app, accept_encoding):
+    """Fetch / without transparent decompression"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        with client.stream('GET', '/', headers={'Accept-Encoding': accept_encoding}) as response:
+            return response, b''.join(response.iter_raw())
+
+
+class TestAcceptEncoding:
+    """Test suite for Accept-Encoding negotiation"""
+
+    def test_parse_q_values(self):
+        """Test that codings are mapped to their q-values"""
+        assert parse_accept_encoding('gzip;q=0.5, br, identity;q=0') == {
+            'gzip': 0.5, 'br': 1.0, 'identity': 0.0,
+        }
+
+    @pytest.mark.parametrize("header,expected", [
+        (None, None),
+        ('identity', None),
+        ('gzip', 'gzip'),
+        ('gzip;q=0', None),
+        ('*', 'gzip'),
+        ('deflate, gzip;q=0.8', 'gzip'),
+    ])
+    def test_choose_gzip(self, monkeypatch, header, expected):
+        """Test coding selection without brotli installed"""
+        monkeypatch.setattr(compression, 'brotli', None)
+        assert choose_encoding(header) == expected
+
+    def test_brotli_preferred_when_available(self, monkeypatch):
+        """Test that brotli wins ties but not a higher gzip q-value"""
+        monkeypatch.setattr(compression, 'brotli', object())
+
+        assert choose_encoding('gzip, br') == 'br'
+        assert choose_encoding('gzip, br;q=0.5') == 'gzip'
+
+
+class TestCompressionMiddleware:
+    """Test suite for the compression middleware"""
+
+    def test_large_body_is_gzipped(self, monkeypatch):
+        """Test that bodies above the threshold are compressed"""
+        monkeypatch.setattr(compression, 'brotli', None)
+        response, raw = get_raw(make_app(), 'gzip, br')
+
+        assert response.headers['content-encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['vary']
+        assert int(response.headers['content-length']) == len(raw)
+        assert gzip.decompress(raw) == b'x' * 4096
+
+    def test_small_body_is_not_compressed(self):
+        """Test that bodies below the threshold are sent as-is"""
+        response, raw = get_raw(make_app(body=b'{}'), 'gzip')
+
+        assert 'content-encoding' not in response.headers
+        assert raw == b'{}'
+
+    def test_identity_client(self):
+        """Test that clients without Accept-Encoding get the plain body"""
+        response, raw = get_raw(make_app(), 'identity')
+
+        assert 'content-encoding' not in response.headers
+        assert len(raw) == 4096
+
+    def test_strong_etag_gets_coding_suffix(self, monkeypatch):
+        """Test that the compressed representation has its own strong ETag"""
+        monkeypatch.setattr(compression, 'brotli', None)
+        response, _ = get_raw(make_app(), 'gzip')
+
+        assert response.headers['etag'] == '"abc-gzip"'
+
+    def test_streamed_response(self, monkeypatch):
+        """Test that streamed chunks are compressed into one valid gzip stream"""
+        monkeypatch.setattr(compression, 'brotli', None)
+        chunks = [b'{"n": %d}\n' % i for i in range(100)]
+        response, raw = get_raw(make_app(chunks=chunks, media_type='application/x-ndjson'), 'gzip')
+
+        assert response.headers['content-encoding'] == 'gzip'
+        assert 'content-length' not in response.headers
+        assert gzip.decompress(raw) == b''.join(chunks)
+
+    def test_event_stream_not_compressed(self):
+        """Test that Server-Sent Events are left uncompressed"""
+        chunks = [b'data: %d\n\n' % i for i in range(500)]
+        response, raw = get_raw(make_app(chunks=chunks, media_type='text/event-stream'), 'gzip')
+
+        assert 'content-encoding' not in response.headers
+        assert raw == b''.join(chunks)
+
+    def test_brotli(self):
+        """Test brotli compression when the package is installed"""
+        brotli = pytest.importorskip('brotli')
+        response, raw = get_raw(make_app(), 'br')
+
+        assert response.headers['content-encoding'] == 'br'
+        assert brotli.decompress(raw) == b'x' * 4096
+
+
+class TestETags:
+    """Test suite for ETag helpers"""
+
+    def test_make_etag_is_strong_and_per_variant(self):
+        """Test that variants of one result get distinct strong tags"""
+        key = 'f' * 64
+
+        assert make_etag(key, 'json') == '"' + 'f' * 32 + '-json"'
+        assert make_etag(key, 'json') != make_etag(key, 'binary')
+
+    def test_encoded_etag(self):
+        """Test that only strong tags get a coding suffix"""
+        assert encoded_etag('"abc"', 'br') == '"abc-br"'
+        assert encoded_etag('W/"abc"', 'br') == 'W/"abc"'
+
+    @pytest.mark.parametrize("header,expected", [
+        (None, False),
+        ('"abc"', True),
+        ('"abc-gzip"', True),
+        ('W/"abc"', True),
+        ('"other", "abc-br"', True),
+        ('*', True),
+        ('"abcd"', False),
+    ])
+    def test_etag_matches(self, header, expected):
+        """Test If-None-Match evaluation"""
+        assert etag_matches(header, '"abc"') is expected
+
+
+class TestConditionalExtraction:
+    """Test suite for ETag revalidation of /api/extract-pitch"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client with a fake pipeline that counts downloads"""
+        from contour import PitchContour
+
+        async def fake_decode(source):
+            return np.zeros(22050, dtype=np.float32)
+
+        def fixed_analysis(samples, sr, engine):
+            return {
+                'pitch_contour': PitchContour(np.arange(3001) * 0.01, np.full(3001, 440.0)),
+                'duration': 30.0,
+                'sample_rate': 22050,
+            }
+
+        return app_client(decode_audio=fake_decode, analyze_samples=fixed_analysis)
+
+    URL = '/api/extract-pitch?url=https://youtu.be/abc&resample_interval=0.1'
+
+    def test_response_is_compressed_with_etag(self, client):
+        """Test that a full contour is gzipped and tagged"""
+        response = client.get(self.URL, headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['content-encoding'] == 'gzip'
+        assert response.headers['etag'].endswith('-json-gzip"')
+        assert 'max-age' in response.headers['cache-control']
+        assert len(response.json()['pitch_data']) > 100
+
+    def test_if_none_match_returns_304_without_pipeline(self, client):
+        """Test that revalidation does not touch the pipeline"""
+        etag = client.get(self.URL).headers['etag']
+        client.pools.downloads = 0
+
+        import main
+        main.result_cache.clear()
+        response = client.get(self.URL, headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['etag'] == etag
+        assert client.pools.downloads == 0
+
+    def test_compressed_etag_revalidates(self, client):
+        """Test that the coding-suffixed tag also revalidates"""
+        etag = client.get(self.URL, headers={'Accept-Encoding': 'gzip'}).headers['etag']
+
+        response = client.get(self.URL, headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 304
+
+    def test_format_changes_etag(self, client):
+        """Test that each representation has its own tag"""
+        json_tag = client.get(self.URL).headers['etag']
+        binary_tag = client.get(self.URL + '&format=binary').headers['etag']
+
+        assert json_tag != binary_tag
+        assert client.get(self.URL + '&format=binary',
+                          headers={'If-None-Match': json_tag}).status_code == 200
+
+    def test_post_ignores_if_none_match(self, client):
+        """Test that POST always returns the result"""
+        etag = client.get(self.URL).headers['etag']
+
+        response = client.post('/api/extract-pitch?resample_interval=0.1',
+                               json={'url': 'https://youtu.be/abc'},
+                               headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['etag'] == etag
+
+    def test_get_rejects_empty_url(self, client):
+        """Test that the GET form validates the URL like the POST body"""
+        assert client.get('/api/extract-pitch?url=%20').status_code == 422
@@ -0,0 +1,159 @@
+import pytest
+import sys
+import os
+import pickle
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from pipeline import smooth_pitch_contour, resample_pitch_contour
+
+
+class TestPitchContour:
+    """Test suite for the columnar pitch contour type"""
+
+    def test_columns_are_contiguous_float32(self):
+        """Test storage layout of the columns"""
+        contour = PitchContour([0.0, 0.1, 0.2], [440, 441, 442])
+
+        for column in (contour.times, contour.frequencies, contour.confidences):
+            assert column.dtype == np.float32
+            assert column.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(contour.confidences, [1, 1, 1])
+
+    def test_uses_slots(self):
+        """Test that instances carry no per-object __dict__"""
+        assert not hasattr(PitchContour([0.0], [440.0]), '__dict__')
+
+    def test_rejects_non_monotonic_times(self):
+        """Test the monotonic-time invariant"""
+        with pytest.raises(ValueError, match="non-decreasing"):
+            PitchContour([0.0, 0.2, 0.1], [440, 441, 442])
+
+    def test_sort_option(self):
+        """Test that sort=True reorders all columns by time"""
+        contour = PitchContour([0.2, 0.0, 0.1], [442, 440, 441], [0.3, 0.1, 0.2], sort=True)
+
+        np.testing.assert_allclose(contour.times, [0.0, 0.1, 0.2])
+        np.testing.assert_array_equal(contour.frequencies, [440, 441, 442])
+        np.testing.assert_allclose(contour.confidences, [0.1, 0.2, 0.3])
+
+    def test_rejects_mismatched_lengths(self):
+        """Test that columns must have equal length"""
+        with pytest.raises(ValueError, match="same length"):
+            PitchContour([0.0, 0.1], [440.0])
+
+    def test_rejects_non_finite(self):
+        """Test that NaN/Inf values are rejected"""
+        with pytest.raises(ValueError, match="times must be finite"):
+            PitchContour([0.0, float('nan')], [440.0, 441.0])
+        with pytest.raises(ValueError, match="frequencies must be finite"):
+            PitchContour([0.0, 0.1], [440.0, float('inf')])
+
+    def test_slicing_returns_views(self):
+        """Test that slices share memory with the parent"""
+        contour = PitchContour(np.arange(10) * 0.1, np.full(10, 440.0))
+
+        part = contour[2:5]
+
+        assert isinstance(part, PitchContour)
+        assert len(part) == 3
+        assert np.shares_memory(part.times, contour.times)
+
+    def test_integer_index(self):
+        """Test that integer indexing returns a (time, frequency, confidence) tuple"""
+        contour = PitchContour([0.0, 0.5], [440.0, 880.0])
+
+        assert contour[1] == (0.5, 880.0, 1.0)
+
+    def test_window(self):
+        """Test time-window selection"""
+        contour = PitchContour(np.arange(10) * 0.5, np.arange(10) + 400.0)
+
+        part = contour.window(1.0, 2.5)
+
+        np.testing.assert_allclose(part.times, [1.0, 1.5, 2.0])
+
+    def test_points_round_trip(self):
+        """Test conversion from and to the JSON list-of-dict form"""
+        points = [{'time': 0.1, 'frequency': 440.5}, {'time': 0.2, 'frequency': 441.25}]
+
+        contour = PitchContour.from_points(points)
+
+        assert contour.to_points() == points
+        assert contour.to_points(include_confidence=True)[0]['confidence'] == 1.0
+
+    def test_from_points_sorts(self):
+        """Test that unsorted points are ordered by time"""
+        contour = PitchContour.from_points([
+            {'time': 1.0, 'frequency': 442.0},
+            {'time': 0.0, 'frequency': 440.0},
+        ])
+
+        np.testing.assert_array_equal(contour.frequencies, [440.0, 442.0])
+
+    def test_from_points_validation(self):
+        """Test that malformed points are reported with their index"""
+        with pytest.raises(ValueError, match=r"pitch_contour\[1\]: expected dict"):
+            PitchContour.from_points([{'time': 0, 'frequency': 1}, 'x'])
+        with pytest.raises(ValueError, match=r"pitch_contour\[0\]: 'frequency' must be numeric"):
+            PitchContour.from_points([{'time': 0, 'frequency': 'x'}])
+
+    def test_pickle_round_trip(self):
+        """Test that contours survive the process-pool and cache boundary"""
+        contour = PitchContour([0.0, 0.1], [440.0, 441.0], [0.5, 1.0])
+
+        assert pickle.loads(pickle.dumps(contour)) == contour
+
+    def test_empty(self):
+        """Test the empty contour"""
+        contour = PitchContour.empty()
+
+        assert len(contour) == 0
+        assert contour.to_points() == []
+
+    def test_concatenate(self):
+        """Test joining consecutive contours, skipping empty ones"""
+        a = PitchContour([0.0, 0.1], [440.0, 441.0])
+        b = PitchContour([0.2], [442.0])
+
+        joined = PitchContour.concatenate([a, PitchContour.empty(), b])
+
+        np.testing.assert_allclose(joined.times, [0.0, 0.1, 0.2])
+        assert len(PitchContour.concatenate([])) == 0
+        with pytest.raises(ValueError):
+            PitchContour.concatenate([b, a])
+
+
+class TestPipelineWithPitchContour:
+    """Test suite for pipeline stages operating on PitchContour"""
+
+    def test_smooth_returns_contour(self):
+        """Test that smoothing keeps the columnar form"""
+        contour = PitchContour(np.arange(6) * 0.1, [440, 442, 1000, 444, 446, 448])
+
+        result = smooth_pitch_contour(contour, kernel_size=3)
+
+        assert isinstance(result, PitchContour)
+        assert result.frequencies[2] == 444.0
+        assert result.times is contour.times
+
+    def test_resample_returns_contour(self):
+        """Test that resampling keeps the columnar form and confidences"""
+        contour = PitchContour(np.arange(21) * 0.1, np.arange(21) + 440.0, np.linspace(0, 1, 21))
+
+        result = resample_pitch_contour(contour, interval=0.5)
+
+        assert isinstance(result, PitchContour)
+        np.testing.assert_allclose(result.times, [0.5, 1.0, 1.5])
+        np.testing.assert_array_equal(result.frequencies, [445.0, 450.0, 455.0])
+        np.testing.assert_allclose(result.confidences, [0.25, 0.5, 0.75])
+
+    def test_resample_empty_contour(self):
+        """Test that an empty contour resamples to an empty contour"""
+        result = resample_pitch_contour(PitchContour.empty())
+
+        assert isinstance(result, PitchContour)
+        assert len(result) == 0
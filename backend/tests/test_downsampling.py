@@ -0,0 +1,192 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from downsampling import downsample_contour, lttb_indices, m4_indices
+from pipeline import ANALYSIS_SAMPLE_RATE, resample_pitch_contour
+
+
+def vibrato_contour(seconds=20.0, frame=512 / 22050, rate=5.5):
+    """A contour with vibrato faster than the usual display intervals"""
+    times = np.arange(0.1, seconds, frame)
+    frequencies = 220 * 2 ** (np.sin(2 * np.pi * rate * times) / 12)
+    return PitchContour(times, frequencies, np.linspace(0.2, 1.0, len(times)))
+
+
+def lttb_reference(x, y, n_out):
+    """Textbook LTTB, one bucket at a time"""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    kept = [0]
+    anchor = 0
+    for i in range(n_out - 2):
+        start = int(np.floor(1 + i * every))
+        end = n - 1 if i == n_out - 3 else int(np.floor(1 + (i + 1) * every))
+        next_end = min(int(np.floor(1 + (i + 2) * every)), n - 1)
+        if i == n_out - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = np.mean(x[end:next_end]), np.mean(y[end:next_end])
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[anchor] - avg_x) * (y[j] - y[anchor]) - (x[anchor] - x[j]) * (avg_y - y[anchor]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        anchor = best
+    kept.append(n - 1)
+    return np.array(kept)
+
+
+class TestLttb:
+    """Test suite for Largest-Triangle-Three-Buckets"""
+
+    @pytest.mark.parametrize('n_out', [3, 4, 17, 100, 999])
+    def test_matches_reference(self, n_out):
+        """Test that the vectorized buckets pick the textbook points"""
+        rng = np.random.default_rng(n_out)
+        x = np.cumsum(rng.uniform(0.01, 0.05, 1000))
+        y = np.cumsum(rng.standard_normal(1000))
+
+        np.testing.assert_array_equal(lttb_indices(x, y, n_out), lttb_reference(x, y, n_out))
+
+    def test_exact_count_with_endpoints(self):
+        """Test that exactly the requested points are kept, in time order"""
+        contour = vibrato_contour()
+        result = downsample_contour(contour, 200, 'lttb')
+
+        assert len(result) == 200
+        assert result[0] == contour[0] and result[-1] == contour[-1]
+        assert np.all(np.diff(result.times) > 0)
+
+
+class TestM4:
+    """Test suite for the min/max envelope"""
+
+    def test_keeps_bucket_extremes(self):
+        """Test that every bucket keeps its first, last, lowest and highest point"""
+        rng = np.random.default_rng(1)
+        x = np.sort(rng.uniform(0, 10, 5000))
+        y = rng.standard_normal(5000)
+
+        kept = m4_indices(x, y, 40)
+        buckets = np.array_split(np.arange(5000), [np.searchsorted(x, edge) for edge in np.linspace(x[0], x[-1], 11)[1:-1]])
+        for bucket in buckets:
+            chosen = set(kept[(kept >= bucket[0]) & (kept <= bucket[-1])].tolist())
+            assert {bucket[0], bucket[-1], bucket[np.argmin(y[bucket])], bucket[np.argmax(y[bucket])]} == chosen
+
+    def test_envelope_preserved(self):
+        """Test that vibrato peaks survive a budget where the grid loses them"""
+        contour = vibrato_contour()
+        budget = len(resample_pitch_contour(contour, interval=0.5))
+
+        m4 = downsample_contour(contour, budget, 'm4')
+        assert len(m4) <= budget
+        assert m4.frequencies.max() == contour.frequencies.max()
+        assert m4.frequencies.min() == contour.frequencies.min()
+
+
+class TestDownsampleContour:
+    """Test suite for downsample_contour"""
+
+    @pytest.mark.parametrize('method', ['lttb', 'm4'])
+    def test_small_contours_unchanged(self, method):
+        """Test that contours within the budget are returned as they are"""
+        contour = vibrato_contour(seconds=1.0)
+
+        assert downsample_contour(contour, len(contour), method) is contour
+        assert len(downsample_contour(PitchContour.empty(), 10, method)) == 0
+
+    def test_subset_of_input(self):
+        """Test that only original points (with their confidences) are returned"""
+        contour = vibrato_contour()
+        result = downsample_contour(contour, 300, 'm4')
+
+        indices = np.searchsorted(contour.times, result.times)
+        np.testing.assert_array_equal(contour.frequencies[indices], result.frequencies)
+        np.testing.assert_array_equal(contour.confidences[indices], result.confidences)
+
+    def test_invalid_arguments(self):
+        """Test that unknown methods and tiny budgets are rejected"""
+        contour = vibrato_contour()
+
+        with pytest.raises(ValueError):
+            downsample_contour(contour, 100, 'nearest')
+        with pytest.raises(ValueError):
+            downsample_contour(contour, 2, 'lttb')
+        with pytest.raises(ValueError):
+            downsample_contour(contour, 3, 'm4')
+
+
+class TestDownsampleParameter:
+    """Test suite for the downsample query parameter"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' is a tone with fast vibrato"""
+        async def fake_decode(source):
+            t = np.arange(ANALYSIS_SAMPLE_RATE * 6) / ANALYSIS_SAMPLE_RATE
+            frequency = 220 * 2 ** (np.sin(2 * np.pi * 5.5 * t) / 12)
+            return (0.5 * np.sin(2 * np.pi * np.cumsum(frequency) / ANALYSIS_SAMPLE_RATE)).astype(np.float32)
+
+        return app_client(decode_audio=fake_decode)
+
+    URL = 'https://youtu.be/downsample1'
+
+    def extract(self, client, **params):
+        return client.get('/api/extract-pitch', params={'url': self.URL, **params})
+
+    @pytest.mark.parametrize('method', ['lttb', 'm4'])
+    def test_default_budget_is_interval_grid(self, client, method):
+        """Test that the point budget defaults to the resample_interval grid"""
+        body = self.extract(client, downsample=method, resample_interval=0.5).json()
+
+        assert body['downsample'] == method
+        assert body['points'] == 12
+        assert body['resample_interval'] is None
+        assert 4 <= len(body['pitch_data']) <= 12
+
+    def test_wider_range_than_resampling(self, client):
+        """Test that downsampled curves keep peaks the 0.5 s grid misses"""
+        def spread(body):
+            frequencies = [point['frequency'] for point in body['pitch_data']]
+            return max(frequencies) - min(frequencies)
+
+        nearest = self.extract(client, resample_interval=0.5).json()
+        m4 = self.extract(client, downsample='m4', points=len(nearest['pitch_data'])).json()
+
+        assert spread(m4) > spread(nearest)
+
+    def test_cached_and_tagged_separately(self, client):
+        """Test that methods and budgets get their own ETags"""
+        plain = self.extract(client)
+        lttb = self.extract(client, downsample='lttb', points=50)
+        m4 = self.extract(client, downsample='m4', points=50)
+        again = self.extract(client, downsample='lttb', points=50)
+
+        assert len({plain.headers['etag'], lttb.headers['etag'], m4.headers['etag']}) == 3
+        assert again.json() == lttb.json()
+        assert 'downsample' not in plain.json()
+
+    def test_binary(self, client):
+        """Test that downsampled contours use the irregular binary layout"""
+        from encoding import decode_contour_binary
+
+        body = self.extract(client, downsample='lttb', points=40, format='binary').content
+        json_body = self.extract(client, downsample='lttb', points=40).json()
+
+        contour = decode_contour_binary(body)['pitch_contour']
+        assert len(contour) == 40
+        np.testing.assert_allclose(contour.times, [p['time'] for p in json_body['pitch_data']], atol=1e-5)
+
+    def test_invalid_combinations(self, client):
+        """Test that compact output and stray budgets are rejected"""
+        assert self.extract(client, downsample='m4', format='compact').status_code == 422
+        assert self.extract(client, points=100).status_code == 422
+        assert self.extract(client, downsample='m4', points=3).status_code == 422
+        assert self.extract(client, downsample='bogus').status_code == 422
@@ -0,0 +1,255 @@
+import pytest
+import sys
+import os
+import time
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from encoding import (
+    BINARY_HEADER, BINARY_MEDIA_TYPE, FLAG_CONFIDENCE, FLAG_REGULAR_GRID, UNVOICED_CENTS,
+    decode_contour_binary, decode_contour_compact, encode_contour_binary,
+    encode_contour_compact, hz_to_cents, is_regular_grid, wants_binary,
+)
+
+
+def grid_contour(n=20, start=0.0, interval=0.5):
+    times = start + interval * np.arange(1, n + 1)
+    return PitchContour(times, 220.0 + np.arange(n), np.linspace(0, 1, n))
+
+
+class TestWantsBinary:
+    """Test suite for response format negotiation"""
+
+    @pytest.mark.parametrize("accept,response_format,expected", [
+        (None, None, False),
+        ('*/*', None, False),
+        ('application/json', None, False),
+        ('application/octet-stream', None, True),
+        ('application/json;q=0.9, application/octet-stream', None, True),
+        ('application/octet-stream;q=0', None, False),
+        ('application/octet-stream', 'json', False),
+        (None, 'binary', True),
+    ])
+    def test_negotiation(self, accept, response_format, expected):
+        """Test that format overrides Accept and JSON is the default"""
+        assert wants_binary(accept, response_format) is expected
+
+
+class TestBinaryEncoding:
+    """Test suite for the binary contour payload"""
+
+    def test_regular_grid_omits_time_column(self):
+        """Test that grid-aligned contours are sent without times"""
+        contour = grid_contour()
+        payload = encode_contour_binary(contour, 22050, 10.0, interval=0.5, start_time=0.0)
+
+        assert len(payload) == BINARY_HEADER.size + 4 * len(contour)
+        assert payload[5] & FLAG_REGULAR_GRID
+
+    def test_round_trip_regular_grid(self):
+        """Test that decoding restores times from the grid"""
+        contour = grid_contour(start=1.25)
+        payload = encode_contour_binary(contour, 22050, 12.0, interval=0.5, start_time=1.25)
+
+        decoded = decode_contour_binary(payload)
+
+        assert decoded['sample_rate'] == 22050
+        assert decoded['duration'] == 12.0
+        assert decoded['interval'] == 0.5
+        np.testing.assert_allclose(decoded['pitch_contour'].times, contour.times)
+        np.testing.assert_array_equal(decoded['pitch_contour'].frequencies, contour.frequencies)
+
+    def test_round_trip_irregular_times(self):
+        """Test that gaps in the grid fall back to an explicit time column"""
+        contour = PitchContour([0.5, 1.0, 2.5], [200.0, 210.0, 220.0], [0.2, 0.5, 1.0])
+        payload = encode_contour_binary(contour, 22050, 3.0, interval=0.5, start_time=0.0,
+                                        include_confidence=True)
+
+        decoded = decode_contour_binary(payload)
+
+        assert not payload[5] & FLAG_REGULAR_GRID
+        assert payload[5] & FLAG_CONFIDENCE
+        assert decoded['interval'] == 0.0
+        assert decoded['pitch_contour'] == contour
+
+    def test_empty_contour(self):
+        """Test that an empty contour encodes to a bare header"""
+        payload = encode_contour_binary(PitchContour.empty(), 22050, 0.0, interval=0.5)
+
+        assert len(payload) == BINARY_HEADER.size
+        assert len(decode_contour_binary(payload)['pitch_contour']) == 0
+
+    def test_is_regular_grid(self):
+        """Test grid detection against the expected origin"""
+        contour = grid_contour(start=2.0)
+
+        assert is_regular_grid(contour, 2.0, 0.5)
+        assert not is_regular_grid(contour, 0.0, 0.5)
+        assert not is_regular_grid(contour, 2.0, 0.0)
+
+    def test_payload_is_smaller_than_json(self):
+        """Test that the binary form is a fraction of the JSON size"""
+        import json
+
+        contour = grid_contour(n=2000, interval=0.1)
+        payload = encode_contour_binary(contour, 22050, 200.0, interval=0.1, start_time=0.0)
+
+        assert len(payload) * 4 < len(json.dumps(contour.to_points()))
+
+    @pytest.mark.parametrize("payload,message", [
+        (b'PTCH', "shorter than header"),
+        (b'XXXX' + bytes(BINARY_HEADER.size - 4), "not a pitch contour"),
+    ])
+    def test_malformed_payload(self, payload, message):
+        """Test that malformed payloads are rejected"""
+        with pytest.raises(ValueError, match=message):
+            decode_contour_binary(payload)
+
+    def test_truncated_payload(self):
+        """Test that a payload shorter than its header claims is rejected"""
+        payload = encode_contour_binary(grid_contour(), 22050, 10.0, interval=0.5, start_time=0.0)
+
+        with pytest.raises(ValueError, match="does not match header"):
+            decode_contour_binary(payload[:-4])
+
+
+class TestCompactEncoding:
+    """Test suite for the quantized cents JSON shape"""
+
+    def test_hz_to_cents(self):
+        """Test cents relative to A4 and the unvoiced sentinel"""
+        cents = hz_to_cents(np.array([440.0, 880.0, 220.0, 466.1638, 0.0]))
+
+        assert cents.tolist() == [0, 1200, -1200, 100, UNVOICED_CENTS]
+
+    def test_grid_description(self):
+        """Test that the grid starts at the first point with one value per slot"""
+        data = encode_contour_compact(grid_contour(n=4, start=0.0), 0.5)
+
+        assert data['start'] == 0.5
+        assert data['interval'] == 0.5
+        assert len(data['cents']) == 4
+        assert all(isinstance(c, int) for c in data['cents'])
+
+    def test_missing_slots_are_unvoiced(self):
+        """Test that gaps in the grid are filled with the sentinel"""
+        contour = PitchContour([1.0, 1.5, 3.0], [440.0, 440.0, 880.0])
+
+        data = encode_contour_compact(contour, 0.5)
+
+        assert data['cents'] == [0, 0, UNVOICED_CENTS, UNVOICED_CENTS, 1200]
+
+    def test_round_trip_within_one_cent(self):
+        """Test that decoding restores times and frequencies to within a cent"""
+        contour = PitchContour(0.5 * np.arange(1, 201), np.geomspace(65.0, 2000.0, 200))
+
+        decoded = decode_contour_compact(encode_contour_compact(contour, 0.5))
+
+        np.testing.assert_allclose(decoded.times, contour.times, atol=1e-5)
+        error = 1200 * np.abs(np.log2(decoded.frequencies / contour.frequencies))
+        assert error.max() <= 0.51
+
+    def test_empty_contour(self):
+        """Test that an empty contour encodes to an empty grid"""
+        data = encode_contour_compact(PitchContour.empty(), 0.5)
+
+        assert data['cents'] == []
+        assert len(decode_contour_compact(data)) == 0
+
+    def test_an_order_of_magnitude_smaller(self):
+        """Test that the compact shape is far smaller than the point list"""
+        import json
+
+        contour = PitchContour(0.1 * np.arange(1, 3001), 200.0 + 300.0 * np.random.rand(3000))
+        compact = json.dumps(encode_contour_compact(contour, 0.1))
+
+        assert len(compact) * 5 < len(json.dumps(contour.to_points()))
+
+    def test_invalid_interval(self):
+        """Test that a non-positive interval is rejected"""
+        with pytest.raises(ValueError, match="interval"):
+            encode_contour_compact(grid_contour(), 0.0)
+
+
+async def fake_decode(source):
+    """Stand-in for the ffmpeg pipe decode"""
+    return np.zeros(22050, dtype=np.float32)
+
+
+def fixed_analysis(samples, sr, engine):
+    """Stand-in for the analysis: three seconds of A4"""
+    return {
+        'pitch_contour': PitchContour(np.arange(31) * 0.1, np.full(31, 440.0)),
+        'duration': 3.0,
+        'sample_rate': 22050,
+    }
+
+
+class TestBinaryEndpoints:
+    """Test suite for content negotiation on the extraction endpoints"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client with a fake pipeline and empty cache"""
+        return app_client(decode_audio=fake_decode, analyze_samples=fixed_analysis)
+
+    def test_json_is_default(self, client):
+        """Test that clients without an Accept preference get JSON"""
+        response = client.post('/api/extract-pitch', json={'url': 'https://youtu.be/abc'})
+
+        assert response.headers['content-type'].startswith('application/json')
+        assert len(response.json()['pitch_data']) == 5
+
+    @pytest.mark.parametrize("headers,query", [
+        ({'Accept': BINARY_MEDIA_TYPE}, ''),
+        ({}, '&format=binary'),
+    ])
+    def test_binary_matches_json(self, client, headers, query):
+        """Test that the binary response carries the same contour as JSON"""
+        url = {'url': 'https://youtu.be/abc'}
+        json_data = client.post('/api/extract-pitch?resample_interval=0.5', json=url).json()
+        response = client.post(f'/api/extract-pitch?resample_interval=0.5{query}', json=url, headers=headers)
+
+        assert response.headers['content-type'] == BINARY_MEDIA_TYPE
+        assert 'Accept' in response.headers['vary']
+        decoded = decode_contour_binary(response.content)
+        assert decoded['interval'] == 0.5
+        assert decoded['duration'] == json_data['duration']
+        assert decoded['pitch_contour'].to_points() == json_data['pitch_data']
+
+    def test_finished_job_served_as_binary(self, client):
+        """Test that job results honour the binary format"""
+        job_id = client.post('/api/jobs', json={'url': 'https://youtu.be/abc'}).json()['job_id']
+        for _ in range(100):
+            response = client.get(f'/api/jobs/{job_id}', headers={'Accept': BINARY_MEDIA_TYPE})
+            if response.headers['content-type'] == BINARY_MEDIA_TYPE:
+                break
+            assert response.json()['status'] in ('pending', 'running')
+            time.sleep(0.02)
+
+        assert len(decode_contour_binary(response.content)['pitch_contour']) == 5
+
+    def test_compact_format(self, client):
+        """Test that format=compact returns the cents grid"""
+        url = {'url': 'https://youtu.be/abc'}
+        response = client.post('/api/extract-pitch?format=compact', json=url)
+        data = response.json()
+
+        assert data['encoding'] == 'cents'
+        assert data['interval'] == 0.5
+        assert data['cents'] == [0] * 5
+        assert 'pitch_data' not in data
+
+    def test_compact_job_result(self, client):
+        """Test that job polling can return the compact shape"""
+        job_id = client.post('/api/jobs', json={'url': 'https://youtu.be/abc'}).json()['job_id']
+        for _ in range(100):
+            data = client.get(f'/api/jobs/{job_id}?format=compact').json()
+            if data['status'] == 'done':
+                break
+            time.sleep(0.02)
+
+        assert data['result']['cents'] == [0] * 5
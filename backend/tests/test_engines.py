@@ -0,0 +1,273 @@
+import pytest
+import sys
+import os
+import time
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+import engines
+from engines import (
+    PITCH_ENGINES,
+    PitchEngine,
+    cumulative_mean_normalized_difference,
+    default_engine_from_env,
+    frame_signal,
+    get_engine,
+    register_engine,
+)
+from pipeline import ANALYSIS_SAMPLE_RATE, analyze_samples
+
+SR = ANALYSIS_SAMPLE_RATE
+
+
+def harmonic_tone(frequency, seconds=1.0, harmonics=5):
+    """A tone with decaying harmonics, closer to a voice than a sine"""
+    t = np.arange(int(SR * seconds)) / SR
+    y = sum(0.3 / k * np.sin(2 * np.pi * k * frequency * t) for k in range(1, harmonics + 1))
+    return y.astype(np.float32)
+
+
+class TestRegistry:
+    """Test suite for engine lookup"""
+
+    def test_builtin_engines(self):
+        """Test that every documented engine is registered"""
+        assert set(PITCH_ENGINES) >= {'piptrack', 'pyin', 'yin', 'autocorr'}
+
+    def test_unknown_engine(self):
+        """Test that unknown names are rejected with the valid choices"""
+        with pytest.raises(ValueError, match='piptrack'):
+            get_engine('crepe')
+
+    def test_register_custom_engine(self, monkeypatch):
+        """Test that registered engines are usable by the pipeline"""
+        class ConstantEngine(PitchEngine):
+            name = 'constant'
+
+            def track(self, y, sr, center=True, first_frame=0):
+                return PitchContour([0.0, 0.1], [123.0, 123.0], [1.0, 1.0])
+
+        monkeypatch.setitem(PITCH_ENGINES, 'constant', None)
+        register_engine(ConstantEngine())
+
+        analysis = analyze_samples(np.zeros(SR, dtype=np.float32), engine='constant')
+
+        np.testing.assert_array_equal(analysis['pitch_contour'].frequencies, [123.0, 123.0])
+
+    def test_default_from_env(self, monkeypatch):
+        """Test that PITCH_ENGINE selects the default and is validated"""
+        monkeypatch.setenv('PITCH_ENGINE', 'yin')
+        assert default_engine_from_env() == 'yin'
+
+        monkeypatch.setenv('PITCH_ENGINE', 'nope')
+        with pytest.raises(ValueError):
+            default_engine_from_env()
+
+    def test_cache_tags_differ(self):
+        """Test that engines never share cache entries"""
+        tags = [engine.cache_tag for engine in PITCH_ENGINES.values()]
+        assert len(set(tags)) == len(tags)
+
+
+class TestEngines:
+    """Test suite for the pitch estimates of every engine"""
+
+    @pytest.mark.parametrize('engine', ['piptrack', 'yin', 'autocorr', 'pyin'])
+    @pytest.mark.parametrize('frequency', [82.0, 220.0, 440.0, 1000.0])
+    def test_harmonic_tone(self, engine, frequency):
+        """Test that the fundamental of a harmonic tone is found"""
+        contour = get_engine(engine).track(harmonic_tone(frequency), SR)
+
+        assert len(contour) > 0.9 * (1 + SR // get_engine(engine).hop_length)
+        assert np.median(contour.frequencies) == pytest.approx(frequency, rel=0.01)
+
+    @pytest.mark.parametrize('engine', ['piptrack', 'yin', 'autocorr', 'pyin'])
+    def test_same_frame_grid(self, engine):
+        """Test that voiced frames sit on the shared hop grid"""
+        contour = get_engine(engine).track(harmonic_tone(220.0), SR)
+
+        frames = contour.times * SR / get_engine(engine).hop_length
+        np.testing.assert_allclose(frames, np.round(frames), atol=1e-3)
+
+    @pytest.mark.parametrize('engine', ['yin', 'autocorr', 'pyin'])
+    def test_confidences_in_unit_range(self, engine):
+        """Test that absolute confidences are probabilities"""
+        contour = get_engine(engine).track(harmonic_tone(330.0), SR)
+
+        assert np.all((contour.confidences >= 0) & (contour.confidences <= 1))
+        assert np.median(contour.confidences) > 0.8
+
+    @pytest.mark.parametrize('engine', ['yin', 'autocorr'])
+    def test_noise_and_silence_unvoiced(self, engine):
+        """Test that aperiodic and silent input yields no voiced frames"""
+        noise = 0.3 * np.random.default_rng(0).standard_normal(SR).astype(np.float32)
+
+        assert len(get_engine(engine).track(noise, SR)) < 5
+        assert len(get_engine(engine).track(np.zeros(SR, dtype=np.float32), SR)) == 0
+
+    @pytest.mark.parametrize('engine', ['yin', 'autocorr'])
+    def test_blocked_frames_match_whole(self, engine):
+        """Test that frames later in the signal match a block started there"""
+        y = harmonic_tone(196.0, seconds=2.0)
+        tracker = get_engine(engine)
+        whole = tracker.track(y, SR, center=False)
+
+        offset = 40
+        part = tracker.track(y[offset * tracker.hop_length:], SR, center=False, first_frame=offset)
+
+        np.testing.assert_allclose(part.times, whole.times[-len(part):])
+        np.testing.assert_allclose(part.frequencies, whole.frequencies[-len(part):], rtol=1e-5)
+
+    def test_short_input(self):
+        """Test that input shorter than a frame yields an empty contour"""
+        for name in ('yin', 'autocorr'):
+            assert len(get_engine(name).track(np.ones(100, dtype=np.float32), SR, center=False)) == 0
+
+
+def cmnd_reference(frame, max_lag):
+    """Direct per-lag evaluation of YIN's difference function"""
+    frame = frame.astype(np.float64)
+    width = len(frame) - max_lag - 1
+    difference = np.array([np.sum((frame[:width] - frame[lag:lag + width]) ** 2)
+                           for lag in range(max_lag + 2)])
+    cmnd = np.ones(max_lag + 2)
+    running = np.cumsum(difference[1:]) / np.arange(1, max_lag + 2)
+    cmnd[1:] = difference[1:] / running
+    return cmnd
+
+
+class TestYin:
+    """Test suite for the vectorized YIN engine"""
+
+    def test_cmnd_matches_direct_definition(self):
+        """Test that the FFT-based difference function equals the per-lag sums"""
+        y = harmonic_tone(150.0) + 0.05 * np.random.default_rng(2).standard_normal(SR).astype(np.float32)
+        frames = frame_signal(y, 2048, 512, center=False)[:20]
+
+        cmnd = cumulative_mean_normalized_difference(frames, 600)
+
+        for frame, row in zip(frames, cmnd):
+            np.testing.assert_allclose(row, cmnd_reference(frame, 600), rtol=1e-6, atol=1e-9)
+
+    def test_framing_is_a_view(self):
+        """Test that uncentred framing does not copy the signal"""
+        y = np.zeros(SR, dtype=np.float32)
+
+        assert np.shares_memory(frame_signal(y, 2048, 512, center=False), y)
+
+    def test_block_size_does_not_matter(self, monkeypatch):
+        """Test that bounded-memory blocks give the whole-signal result"""
+        y = harmonic_tone(247.0, seconds=3.0)
+        whole = get_engine('yin').track(y, SR)
+
+        monkeypatch.setattr(engines, 'ENGINE_BLOCK_FRAMES', 7)
+        blocked = get_engine('yin').track(y, SR)
+
+        np.testing.assert_array_equal(blocked.times, whole.times)
+        np.testing.assert_allclose(blocked.frequencies, whole.frequencies, rtol=1e-9)
+
+    def test_no_octave_error_on_strong_harmonic(self):
+        """Test that a dominant second harmonic does not pull the estimate up an octave"""
+        t = np.arange(SR) / SR
+        y = (0.2 * np.sin(2 * np.pi * 110.0 * t) + 0.6 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+        contour = get_engine('yin').track(y, SR)
+
+        assert np.median(contour.frequencies) == pytest.approx(110.0, rel=0.01)
+
+    def test_long_track_is_fast(self):
+        """Test that a four-minute track is analyzed in a few seconds"""
+        t = np.arange(SR * 240) / SR
+        y = (0.4 * np.sin(2 * np.pi * np.cumsum(220 + 80 * np.sin(2 * np.pi * 0.2 * t)) / SR)).astype(np.float32)
+
+        start = time.perf_counter()
+        contour = get_engine('yin').track(y, SR)
+        elapsed = time.perf_counter() - start
+
+        assert len(contour) > 0.99 * (len(y) // 512)
+        assert elapsed < 5.0
+
+
+class TestAnalyzeSamples:
+    """Test suite for engine selection in the pipeline"""
+
+    def test_default_is_piptrack(self):
+        """Test that the default engine keeps the original normalized confidences"""
+        analysis = analyze_samples(harmonic_tone(440.0))
+
+        assert analysis['pitch_contour'].confidences.max() == pytest.approx(1.0)
+
+    def test_engine_selected(self):
+        """Test that absolute confidences are not renormalized"""
+        y = harmonic_tone(440.0)
+        raw = get_engine('autocorr').track(y, SR)
+
+        analysis = analyze_samples(y, engine='autocorr')
+
+        np.testing.assert_allclose(analysis['pitch_contour'].confidences, raw.confidences)
+
+    def test_unknown_engine(self):
+        """Test that the pipeline rejects unknown engines"""
+        with pytest.raises(ValueError):
+            analyze_samples(np.zeros(SR, dtype=np.float32), engine='crepe')
+
+
+class TestEngineParameter:
+    """Test suite for the engine query parameter"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' is a 220 Hz tone"""
+        analyzed = []
+
+        async def fake_decode(source):
+            return harmonic_tone(220.0, seconds=2.0)
+
+        def recording_analyze(samples, sr, engine):
+            analyzed.append(engine)
+            return analyze_samples(samples, sr, engine)
+
+        client = app_client(decode_audio=fake_decode, analyze_samples=recording_analyze)
+        client.analyzed = analyzed
+        return client
+
+    URL = 'https://youtu.be/enginetest1'
+
+    def extract(self, client, engine=None):
+        params = {'url': self.URL, 'resample_interval': 0.5}
+        if engine:
+            params['engine'] = engine
+        return client.get('/api/extract-pitch', params=params)
+
+    def test_engine_reported_and_cached_separately(self, client):
+        """Test that each engine gets its own analysis, cache entry and ETag"""
+        import main
+
+        default = self.extract(client)
+        yin = self.extract(client, 'yin')
+        again = self.extract(client, 'yin')
+
+        assert default.json()['engine'] == main.default_engine
+        assert yin.json()['engine'] == 'yin'
+        assert yin.headers['etag'] != default.headers['etag']
+        assert again.json() == yin.json()
+        assert client.analyzed == [main.default_engine, 'yin']
+
+    def test_unknown_engine_rejected(self, client):
+        """Test that an unknown engine is a validation error"""
+        assert self.extract(client, 'crepe').status_code == 422
+
+    def test_pyin_streams_as_one_chunk(self, client):
+        """Test that engines needing the whole signal still stream"""
+        import json
+
+        response = client.get('/api/extract-pitch/stream',
+                              params={'url': self.URL, 'engine': 'pyin', 'resample_interval': 0.5})
+        events = [json.loads(line) for line in response.text.splitlines()]
+
+        assert [event['type'] for event in events] == ['start', 'chunk', 'done']
+        assert events[0]['engine'] == events[-1]['engine'] == 'pyin'
+        assert client.analyzed == ['pyin']
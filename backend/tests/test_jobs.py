@@ -0,0 +1,385 @@
+import pytest
+import sys
+import os
+import asyncio
+import time
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from jobs import JobManager, SingleFlight, JOB_DONE, JOB_FAILED, map_unordered
+
+
+class TestSingleFlight:
+    """Test suite for concurrent request coalescing"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that concurrent callers for one key run the work once"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'result'
+
+        async def scenario():
+            return await asyncio.gather(*[flights.do('k', work) for _ in range(5)])
+
+        results = asyncio.run(scenario())
+
+        assert results == ['result'] * 5
+        assert len(calls) == 1
+        assert flights.started == 1
+        assert flights.coalesced == 4
+
+    def test_different_keys_run_separately(self):
+        """Test that distinct keys are not coalesced"""
+        flights = SingleFlight()
+
+        async def scenario():
+            return await asyncio.gather(
+                flights.do('a', lambda: asyncio.sleep(0.01, result='a')),
+                flights.do('b', lambda: asyncio.sleep(0.01, result='b')),
+            )
+
+        assert asyncio.run(scenario()) == ['a', 'b']
+        assert flights.started == 2
+
+    def test_errors_propagate_to_all_callers(self):
+        """Test that a failure is reported to every waiting caller"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('boom')
+
+        async def scenario():
+            return await asyncio.gather(
+                flights.do('k', work), flights.do('k', work), return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flights.in_flight('k')
+
+    def test_cancelled_caller_does_not_cancel_shared_work(self):
+        """Test that one caller going away leaves the computation running"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        async def scenario():
+            first = asyncio.ensure_future(flights.do('k', work))
+            second = asyncio.ensure_future(flights.do('k', work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(scenario()) == 'done'
+
+
+    def test_start_registers_before_returning(self):
+        """Test that start() makes the key in flight at once and later calls join it"""
+        flights = SingleFlight()
+
+        async def scenario():
+            task = flights.start('k', lambda: asyncio.sleep(0.01, result='first'))
+            assert flights.in_flight('k')
+            joined = await flights.do('k', lambda: asyncio.sleep(0, result='second'))
+            return await task, joined
+
+        assert asyncio.run(scenario()) == ('first', 'first')
+        assert flights.coalesced == 1
+
+class TestJobManager:
+    """Test suite for the job registry"""
+
+    def test_job_lifecycle(self):
+        """Test that a submitted job reports its result when done"""
+        manager = JobManager()
+
+        async def scenario():
+            job = manager.submit(lambda: asyncio.sleep(0.01, result={'ok': True}), {'url': 'x'})
+            assert not job.finished
+            await asyncio.sleep(0.05)
+            return manager.get(job.id)
+
+        job = asyncio.run(scenario())
+
+        assert job.status == JOB_DONE
+        assert job.to_dict()['result'] == {'ok': True}
+
+    def test_failed_job_reports_error(self):
+        """Test that exceptions mark the job as failed"""
+        manager = JobManager()
+
+        async def fail():
+            raise ValueError('bad input')
+
+        async def scenario():
+            job = manager.submit(fail, {})
+            await asyncio.sleep(0.01)
+            return job
+
+        job = asyncio.run(scenario())
+
+        assert job.status == JOB_FAILED
+        assert job.to_dict()['error'] == 'bad input'
+        assert 'result' not in job.to_dict()
+
+    def test_finished_jobs_expire(self):
+        """Test that finished jobs are dropped after their TTL"""
+        manager = JobManager(result_ttl=0.01)
+        job = manager.completed({'ok': True}, {})
+        time.sleep(0.02)
+
+        assert manager.get(job.id) is None
+
+    def test_unknown_job(self):
+        """Test that unknown ids return None"""
+        assert JobManager().get('missing') is None
+
+
+class TestMapUnordered:
+    """Test suite for bounded fan-out"""
+
+    def collect(self, func, items, limit):
+        async def scenario():
+            return [outcome async for outcome in map_unordered(func, items, limit)]
+        return asyncio.run(scenario())
+
+    def test_completion_order_and_limit(self):
+        """Test that results stream as they finish with bounded concurrency"""
+        active = []
+        peak = []
+
+        async def work(delay):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(delay)
+            active.pop()
+            return delay
+
+        outcomes = self.collect(work, [0.08, 0.01, 0.04, 0.02], limit=2)
+
+        assert [index for index, _, _ in outcomes] == [1, 2, 3, 0]
+        assert [result for _, result, _ in outcomes] == [0.01, 0.04, 0.02, 0.08]
+        assert max(peak) == 2
+
+    def test_errors_are_yielded_not_raised(self):
+        """Test that one failing item does not stop the others"""
+        async def work(item):
+            if item == 'bad':
+                raise RuntimeError('boom')
+            return item
+
+        outcomes = sorted(self.collect(work, ['a', 'bad', 'c'], limit=3), key=lambda o: o[0])
+
+        assert outcomes[0] == (0, 'a', None)
+        assert outcomes[1][1] is None and str(outcomes[1][2]) == 'boom'
+        assert outcomes[2] == (2, 'c', None)
+
+    def test_closing_cancels_running_items(self):
+        """Test that abandoning the iterator cancels work in flight"""
+        cancelled = []
+
+        async def work(delay):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        async def scenario():
+            outcomes = map_unordered(work, [0.01, 1.0, 1.0], limit=3)
+            first = await outcomes.__anext__()
+            await outcomes.aclose()
+            await asyncio.sleep(0)
+            return first
+
+        assert asyncio.run(scenario())[1] == 0.01
+        assert cancelled == [1.0, 1.0]
+
+    def test_invalid_limit(self):
+        """Test that a limit below one is rejected"""
+        with pytest.raises(ValueError):
+            self.collect(lambda item: asyncio.sleep(0), [1], limit=0)
+
+
+async def fake_decode(source):
+    """Stand-in for the ffmpeg pipe decode, taking as long as a short download"""
+    await asyncio.sleep(0.1)
+    return np.zeros(22050, dtype=np.float32)
+
+
+def fixed_analysis(samples, sr, engine):
+    """Stand-in for the analysis: three seconds of A4"""
+    return {
+        'pitch_contour': PitchContour(np.arange(31) * 0.1, np.full(31, 440.0)),
+        'duration': 3.0,
+        'sample_rate': 22050,
+    }
+
+
+class TestJobEndpoints:
+    """Test suite for /api/jobs"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client with a fake pipeline and empty cache"""
+        return app_client(decode_audio=fake_decode, analyze_samples=fixed_analysis)
+
+    def wait_for(self, client, job_id):
+        for _ in range(100):
+            data = client.get(f'/api/jobs/{job_id}').json()
+            if data['status'] in (JOB_DONE, JOB_FAILED):
+                return data
+            time.sleep(0.02)
+        raise AssertionError('job did not finish')
+
+    def test_submit_and_poll(self, client):
+        """Test that a job id is returned and later yields the result"""
+        response = client.post('/api/jobs', json={'url': 'https://youtu.be/abc'})
+
+        assert response.status_code == 202
+        data = self.wait_for(client, response.json()['job_id'])
+        assert data['status'] == JOB_DONE
+        assert data['result']['status'] == 'success'
+        assert len(data['result']['pitch_data']) == 5
+
+    def test_concurrent_jobs_coalesce_across_intervals(self, client):
+        """Test that jobs for one video share a single download"""
+        first = client.post('/api/jobs?resample_interval=0.5', json={'url': 'https://youtu.be/abc'})
+        second = client.post('/api/jobs?resample_interval=1.0', json={'url': 'https://www.youtube.com/watch?v=abc'})
+
+        assert second.json()['coalesced'] is True
+        a = self.wait_for(client, first.json()['job_id'])
+        b = self.wait_for(client, second.json()['job_id'])
+
+        assert client.pools.downloads == 1
+        assert a['result']['resample_interval'] == 0.5
+        assert b['result']['resample_interval'] == 1.0
+        assert len(b['result']['pitch_data']) == 2
+
+    def test_cached_result_completes_immediately(self, client):
+        """Test that a cached extraction yields an already finished job"""
+        client.post('/api/extract-pitch', json={'url': 'https://youtu.be/abc'})
+
+        response = client.post('/api/jobs', json={'url': 'https://youtu.be/abc'})
+
+        assert response.json()['status'] == JOB_DONE
+        assert client.pools.downloads == 1
+
+    def test_new_interval_reuses_cached_analysis(self, client):
+        """Test that a different resample_interval does not re-run the pipeline"""
+        client.post('/api/extract-pitch?resample_interval=0.5', json={'url': 'https://youtu.be/abc'})
+        response = client.post('/api/extract-pitch?resample_interval=0.1', json={'url': 'https://youtu.be/abc'})
+
+        assert response.status_code == 200
+        assert response.json()['resample_interval'] == 0.1
+        assert client.pools.downloads == 1
+
+    def test_unknown_job_returns_404(self, client):
+        """Test that polling an unknown job id fails cleanly"""
+        assert client.get('/api/jobs/does-not-exist').status_code == 404
+
+
+class TestBatchEndpoint:
+    """Test suite for /api/extract-pitch/batch"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client with a fake pipeline and empty cache"""
+        return app_client(decode_audio=fake_decode, analyze_samples=fixed_analysis)
+
+    def batch(self, client, items, query='', **body):
+        import json
+
+        response = client.post(f'/api/extract-pitch/batch{query}', json={'items': items, **body})
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_results_for_every_item(self, client):
+        """Test that each item yields one tagged result line"""
+        items = [{'url': f'https://youtu.be/video{i}'} for i in range(6)]
+
+        events = self.batch(client, items, concurrency=3)
+
+        results = [e for e in events if e['type'] == 'result']
+        assert sorted(e['index'] for e in results) == list(range(6))
+        assert all(e['url'] == items[e['index']]['url'] for e in results)
+        assert all(e['status'] == 'success' and len(e['pitch_data']) == 5 for e in results)
+        assert events[-1] == {'type': 'done', 'succeeded': 6, 'failed': 0}
+
+    def test_runs_in_parallel(self, client):
+        """Test that downloads overlap instead of running one by one"""
+        start = time.monotonic()
+        self.batch(client, [{'url': f'https://youtu.be/video{i}'} for i in range(8)], concurrency=8)
+
+        # Each fake decode takes 0.1 s
+        assert time.monotonic() - start < 0.5
+        assert client.pools.downloads == 8
+
+    def test_duplicates_share_one_download(self, client):
+        """Test that batch items coalesce like concurrent requests"""
+        items = [{'url': 'https://youtu.be/abc'}, {'url': 'https://www.youtube.com/watch?v=abc'}]
+
+        events = self.batch(client, items)
+
+        assert events[-1]['succeeded'] == 2
+        assert client.pools.downloads == 1
+
+    def test_compact_format(self, client):
+        """Test that result lines honour format=compact"""
+        events = self.batch(client, [{'url': 'https://youtu.be/abc'}], query='?format=compact')
+
+        assert events[0]['encoding'] == 'cents'
+
+    def test_unknown_upload_is_an_item_error(self, client):
+        """Test that a missing upload fails only its own item"""
+        items = [{'upload_id': 'ab' * 32}, {'url': 'https://youtu.be/abc'}]
+
+        events = self.batch(client, items)
+
+        error = next(e for e in events if e['type'] == 'error')
+        assert error['index'] == 0
+        assert error['upload_id'] == 'ab' * 32
+        assert 'upload' in error['detail']
+        assert events[-1] == {'type': 'done', 'succeeded': 1, 'failed': 1}
+
+    def test_cached_upload_reference(self, client):
+        """Test that an upload's analysis is found by its id"""
+        import main
+
+        digest = 'cd' * 32
+        main.result_cache.put(
+            main.source_analysis_key(main.upload_source_id(digest)),
+            {'pitch_contour': PitchContour(np.arange(31) * 0.1, np.full(31, 330.0)),
+             'duration': 3.0, 'sample_rate': 22050},
+        )
+
+        events = self.batch(client, [{'upload_id': digest}])
+
+        assert events[0]['type'] == 'result'
+        assert events[0]['pitch_data'][0]['frequency'] == 330.0
+        assert client.pools.downloads == 0
+
+    @pytest.mark.parametrize('body', [
+        {'items': []},
+        {'items': [{}]},
+        {'items': [{'url': 'https://youtu.be/a', 'upload_id': 'ab' * 32}]},
+        {'items': [{'upload_id': 'not-a-hash'}]},
+        {'items': [{'url': ' '}]},
+        {'items': [{'url': 'https://youtu.be/a'}], 'concurrency': 0},
+    ])
+    def test_invalid_requests(self, client, body):
+        """Test that malformed batches are rejected up front"""
+        assert client.post('/api/extract-pitch/batch', json=body).status_code == 422
@@ -0,0 +1,269 @@
+import pytest
+import sys
+import os
+import time
+import asyncio
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live import (
+    LIVE_HOP_SECONDS,
+    Decimator,
+    LiveBatchScheduler,
+    LivePitchSession,
+    estimate_sessions,
+    live_decimation,
+)
+
+SR = 44100
+
+
+def sine(frequency, seconds, sr=SR, amplitude=0.5):
+    t = np.arange(int(sr * seconds)) / sr
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+class TestLivePitchSession:
+    """Test suite for incremental live pitch estimation"""
+
+    def test_hops_estimated_as_audio_arrives(self):
+        """Test that each complete hop yields one estimate, whatever the chunking"""
+        session = LivePitchSession(SR)
+        audio = sine(330.0, 1.0)
+
+        messages = []
+        for chunk in np.array_split(audio, 37):
+            session.push(chunk.tobytes())
+            messages += session.estimate()
+
+        expected_hops = (len(audio) - session.frame_length) // session.hop_length + 1
+        assert len(messages) == expected_hops
+        assert np.allclose(np.diff([m['time'] for m in messages]), LIVE_HOP_SECONDS, atol=1e-6)
+        assert np.median([m['frequency'] for m in messages]) == pytest.approx(330.0, rel=0.005)
+
+    def test_int16(self):
+        """Test that int16 PCM is scaled like float32"""
+        session = LivePitchSession(16000, 'int16')
+        audio = (sine(220.0, 0.5, sr=16000) * 32767).astype('<i2')
+
+        session.push(audio.tobytes())
+        messages = session.estimate()
+
+        assert np.median([m['frequency'] for m in messages]) == pytest.approx(220.0, rel=0.005)
+
+    def test_silence_unvoiced(self):
+        """Test that silent hops carry no frequency"""
+        session = LivePitchSession(SR)
+        session.push(np.zeros(SR // 2, dtype=np.float32).tobytes())
+
+        messages = session.estimate()
+
+        assert messages and all(m['frequency'] is None for m in messages)
+
+    def test_backlog_bounded(self):
+        """Test that unprocessed audio beyond the limit drops the oldest hops"""
+        session = LivePitchSession(SR, max_pending_hops=10)
+        audio = np.concatenate([sine(220.0, 2.0), sine(440.0, 0.2)])
+
+        for chunk in np.array_split(audio, 20):
+            session.push(chunk.tobytes())
+        messages = session.estimate()
+
+        assert len(messages) == 10
+        assert session.dropped_hops > 150
+        # The kept hops are the newest ones, timed on the stream clock
+        assert messages[-1]['time'] == pytest.approx(len(audio) / SR - 0.02, abs=0.011)
+        assert messages[-1]['frequency'] == pytest.approx(440.0, rel=0.01)
+
+    def test_hop_latency(self):
+        """Test that one hop is estimated well within the 30 ms budget"""
+        session = LivePitchSession(48000)
+        audio = sine(196.0, 5.0, sr=48000)
+        hop = session.hop_length
+        session.push(audio[:session.frame_length - hop].tobytes())
+
+        durations = []
+        for start in range(session.frame_length - hop, len(audio) - hop, hop):
+            session.push(audio[start:start + hop].tobytes())
+            began = time.perf_counter()
+            assert len(session.estimate()) == 1
+            durations.append(time.perf_counter() - began)
+
+        assert np.percentile(durations, 99) < 0.030
+
+    def test_invalid(self):
+        """Test that unsupported settings and partial samples are rejected"""
+        with pytest.raises(ValueError):
+            LivePitchSession(1000)
+        with pytest.raises(ValueError):
+            LivePitchSession(SR, 'mulaw')
+        with pytest.raises(ValueError):
+            LivePitchSession(SR, 'int16').push(b'\x00\x01\x02')
+
+
+class TestDecimation:
+    """Test suite for decimating live audio to the analysis rate"""
+
+    @pytest.mark.parametrize('sample_rate,factor', [
+        (48000, 4), (44100, 3), (96000, 8), (22050, 2), (16000, 1), (8000, 1),
+    ])
+    def test_factor(self, sample_rate, factor):
+        """Test that the factor keeps the analysis rate above the floor and hops whole"""
+        assert live_decimation(sample_rate) == factor
+        assert live_decimation(sample_rate, min_rate=sample_rate) == 1
+
+    @pytest.mark.parametrize('pieces', [1, 7, 333, 4801])
+    def test_chunking_invariant(self, pieces):
+        """Test that the output is the filtered signal's every factor-th sample, however it is split"""
+        decimator = Decimator(4)
+        audio = np.random.default_rng(0).standard_normal(4801).astype(np.float32)
+
+        output = np.concatenate([decimator.process(chunk) for chunk in np.array_split(audio, pieces)])
+
+        expected = np.convolve(audio, decimator.taps)[:len(audio)][3::4]
+        np.testing.assert_allclose(output, expected, atol=1e-5)
+
+    def test_session_timing_unchanged(self):
+        """Test that a decimated session reports hops on the client clock"""
+        session = LivePitchSession(48000)
+        session.push(sine(1000.0, 0.5, sr=48000).tobytes())
+
+        messages = session.estimate()
+
+        assert session.analysis_rate == 12000
+        assert len(messages) == (24000 - session.frame_length) // session.hop_length + 1
+        assert messages[0]['time'] == pytest.approx(0.02)
+        assert np.median([m['frequency'] for m in messages]) == pytest.approx(1000.0, rel=0.005)
+
+    def test_full_rate_agrees(self):
+        """Test that decimated and full-rate sessions estimate the same pitches"""
+        audio = sine(523.25, 0.5)
+        decimated = LivePitchSession(SR)
+        full = LivePitchSession(SR, min_analysis_rate=SR)
+        decimated.push(audio.tobytes())
+        full.push(audio.tobytes())
+
+        a, b = decimated.estimate(), full.estimate()
+
+        assert [m['time'] for m in a] == [m['time'] for m in b]
+        assert np.allclose([m['frequency'] for m in a[1:]], [m['frequency'] for m in b[1:]], rtol=0.003)
+
+
+class TestLiveBatching:
+    """Test suite for estimating many live sessions together"""
+
+    def sessions(self, rates=(SR, 16000, SR, 22050), seconds=0.3):
+        sessions = []
+        for index, rate in enumerate(rates):
+            session = LivePitchSession(rate)
+            session.push(sine(150.0 + 60 * index, seconds, sr=rate).tobytes())
+            sessions.append(session)
+        return sessions
+
+    def test_batch_matches_per_session(self):
+        """Test that batched estimates equal each session's own estimates"""
+        expected = [session.estimate() for session in self.sessions()]
+
+        batched = self.sessions()
+        results = estimate_sessions([(session, *session.take_frames()) for session in batched])
+
+        assert results == expected
+        assert all(batched_session.pending_hops == 0 for batched_session in batched)
+
+    def test_empty_requests(self):
+        """Test that sessions without complete hops get no messages"""
+        session = LivePitchSession(SR)
+
+        assert estimate_sessions([(session, *session.take_frames())]) == [[]]
+
+    def test_scheduler_batches_concurrent_sessions(self):
+        """Test that concurrent requests share batches and get their own results"""
+        expected = [session.estimate() for session in self.sessions()]
+        scheduler = LiveBatchScheduler(max_wait=0.05, max_batch=1000)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(scheduler.estimate(s) for s in self.sessions()))
+            finally:
+                await scheduler.close()
+
+        results = asyncio.run(run())
+
+        assert results == expected
+        assert scheduler.batches == 1
+        assert scheduler.frames == sum(len(messages) for messages in expected)
+
+    def test_scheduler_max_batch(self):
+        """Test that a full batch runs without waiting and batches stay within max_batch"""
+        sessions = self.sessions(rates=(SR,) * 6, seconds=0.1)
+        frames_each = sessions[0].pending_hops
+        scheduler = LiveBatchScheduler(max_wait=10.0, max_batch=2 * frames_each)
+
+        async def run():
+            try:
+                return await asyncio.wait_for(
+                    asyncio.gather(*(scheduler.estimate(s) for s in sessions)), timeout=5.0
+                )
+            finally:
+                await scheduler.close()
+
+        results = asyncio.run(run())
+
+        assert [len(messages) for messages in results] == [frames_each] * 6
+        assert scheduler.batches == 3
+
+    def test_scheduler_invalid(self):
+        """Test that impossible limits are rejected"""
+        with pytest.raises(ValueError):
+            LiveBatchScheduler(max_batch=0)
+        with pytest.raises(ValueError):
+            LiveBatchScheduler(max_wait=-1)
+
+
+class TestLivePitchSocket:
+    """Test suite for the /ws/pitch WebSocket"""
+
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+        import main
+
+        with TestClient(main.app) as client:
+            yield client
+
+    def test_round_trip(self, client):
+        """Test that streamed audio comes back as ordered pitch messages"""
+        audio = sine(262.0, 0.5, sr=22050)
+
+        with client.websocket_connect('/ws/pitch?sample_rate=22050') as websocket:
+            ready = websocket.receive_json()
+            assert ready['type'] == 'ready'
+            expected = (len(audio) - ready['frame_length']) // ready['hop_length'] + 1
+
+            for chunk in np.array_split(audio, 10):
+                websocket.send_bytes(chunk.tobytes())
+            messages = [websocket.receive_json() for _ in range(expected)]
+
+        assert {m['type'] for m in messages} == {'pitch'}
+        times = [m['time'] for m in messages]
+        assert times == sorted(times)
+        assert np.median([m['frequency'] for m in messages]) == pytest.approx(262.0, rel=0.005)
+
+    def test_malformed_payload(self, client):
+        """Test that partial samples end the session with an error"""
+        with client.websocket_connect('/ws/pitch?encoding=int16') as websocket:
+            websocket.receive_json()
+            websocket.send_bytes(b'\x00\x01\x02')
+            message = websocket.receive_json()
+
+        assert message['type'] == 'error'
+
+    def test_invalid_parameters(self, client):
+        """Test that bad query parameters refuse the connection"""
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect('/ws/pitch?sample_rate=100') as websocket:
+                websocket.receive_json()
@@ -0,0 +1,108 @@
+import pytest
+import sys
+import os
+import itertools
+import warnings
+import numpy as np
+from scipy.signal import medfilt
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from median import MEDIAN_NETWORKS, RunningMedian, median_filter, window_medians
+
+
+def reference(values, kernel_size):
+    """scipy's medfilt, quiet about kernels longer than the input"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return medfilt(values, kernel_size)
+
+
+def contour_like(n, seed=0):
+    """Frequencies with repeated values, octave jumps and unvoiced zeros"""
+    rng = np.random.default_rng(seed)
+    values = (220 * 2 ** rng.normal(0, 0.3, n)).astype(np.float32)
+    values[rng.random(n) < 0.05] *= 2
+    values[::11] = values[5]
+    values[rng.random(n) < 0.02] = 0.0
+    return values
+
+
+class TestMedianNetworks:
+    """Test suite for the median selection networks"""
+
+    @pytest.mark.parametrize('kernel_size', sorted(MEDIAN_NETWORKS))
+    def test_every_binary_input(self, kernel_size):
+        """Test that each network selects the median of all 0/1 inputs (so of any input)"""
+        inputs = np.array(list(itertools.product([0, 1], repeat=kernel_size)), dtype=np.int8)
+
+        medians = window_medians(inputs.ravel(), kernel_size)[::kernel_size]
+
+        assert np.array_equal(medians, np.sort(inputs, axis=1)[:, kernel_size // 2])
+
+
+class TestMedianFilter:
+    """Test suite for the batch median filter"""
+
+    @pytest.mark.parametrize('kernel_size', [1, 3, 5, 7, 9, 11, 15])
+    def test_matches_medfilt(self, kernel_size):
+        """Test that every output, ends included, equals medfilt's"""
+        values = contour_like(5000)
+
+        filtered = median_filter(values, kernel_size)
+
+        assert filtered.dtype == values.dtype
+        assert np.array_equal(filtered, reference(values, kernel_size))
+
+    @pytest.mark.parametrize('n', [0, 1, 2, 4])
+    def test_shorter_than_kernel(self, n):
+        """Test that inputs shorter than the kernel are padded like medfilt pads them"""
+        values = np.arange(1, n + 1, dtype=np.float64)
+
+        assert np.array_equal(median_filter(values, 5), reference(values, 5) if n else values)
+
+    def test_even_kernel(self):
+        """Test that even kernels are rejected"""
+        with pytest.raises(ValueError):
+            median_filter(np.ones(10), 4)
+
+
+class TestRunningMedian:
+    """Test suite for the streaming median filter"""
+
+    @pytest.mark.parametrize('kernel_size', [1, 3, 5, 9, 11])
+    def test_blocks_match_batch(self, kernel_size):
+        """Test that blocks of any size, with carried state, reproduce medfilt"""
+        values = contour_like(3000, seed=kernel_size)
+        rng = np.random.default_rng(kernel_size)
+        cuts = np.cumsum(rng.integers(0, 90, 200))
+        blocks = np.split(values, cuts[cuts < len(values)])
+
+        running = RunningMedian(kernel_size)
+        outputs = [running.process(block) for block in blocks] + [running.finish()]
+
+        assert np.array_equal(np.concatenate(outputs), reference(values, kernel_size))
+
+    def test_sample_by_sample(self):
+        """Test that single samples come out with a lag of half the kernel"""
+        values = contour_like(200)
+        running = RunningMedian(5)
+
+        outputs = [running.push(value) for value in values]
+
+        assert outputs[:2] == [None, None]
+        assert np.array_equal(outputs[2:] + list(running.finish()), reference(values, 5))
+
+    def test_finished(self):
+        """Test that a finished filter takes no more samples"""
+        running = RunningMedian(3)
+        running.finish()
+
+        with pytest.raises(RuntimeError):
+            running.push(1.0)
+
+    def test_invalid_kernel(self):
+        """Test that invalid kernels are rejected"""
+        with pytest.raises(ValueError):
+            RunningMedian(0)
@@ -0,0 +1,153 @@
+import pytest
+import sys
+import os
+import struct
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from midi import MIDI_TICKS_PER_BEAT, variable_length_quantity, write_midi
+from notes import NoteEvents
+from pipeline import ANALYSIS_SAMPLE_RATE
+
+
+def read_vlq(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_midi(data):
+    """Minimal SMF reader: header fields and (absolute tick, event bytes) of the one track"""
+    assert data[:4] == b'MThd'
+    length, file_format, tracks, division = struct.unpack('>IHHH', data[4:14])
+    assert (length, tracks) == (6, 1)
+    assert data[14:18] == b'MTrk'
+    (track_length,) = struct.unpack('>I', data[18:22])
+    track = data[22:22 + track_length]
+    assert len(track) == track_length
+
+    events, pos, tick = [], 0, 0
+    while pos < len(track):
+        delta, pos = read_vlq(track, pos)
+        tick += delta
+        status = track[pos]
+        if status == 0xFF:
+            kind = track[pos + 1]
+            size, start = read_vlq(track, pos + 2)
+            events.append((tick, ('meta', kind, bytes(track[start:start + size]))))
+            pos = start + size
+        elif status & 0xF0 == 0xC0:
+            events.append((tick, ('program', track[pos + 1])))
+            pos += 2
+        else:
+            events.append((tick, (status & 0xF0, track[pos + 1], track[pos + 2])))
+            pos += 3
+    return file_format, division, events
+
+
+class TestVariableLengthQuantity:
+    """Test suite for MIDI variable-length quantities"""
+
+    @pytest.mark.parametrize('value,encoded', [
+        (0, b'\x00'), (0x40, b'\x40'), (0x7F, b'\x7f'), (0x80, b'\x81\x00'),
+        (0x2000, b'\xc0\x00'), (0x3FFF, b'\xff\x7f'), (0x0FFFFFFF, b'\xff\xff\xff\x7f'),
+    ])
+    def test_spec_examples(self, value, encoded):
+        """Test the examples of the SMF specification"""
+        assert variable_length_quantity(value) == encoded
+
+    def test_negative(self):
+        """Test that negative deltas are rejected"""
+        with pytest.raises(ValueError):
+            variable_length_quantity(-1)
+
+
+class TestWriteMidi:
+    """Test suite for the Standard MIDI File writer"""
+
+    def test_notes_round_trip(self):
+        """Test that note timing, pitch and velocity survive a read back"""
+        notes = NoteEvents([0.0, 0.5, 1.25], [0.5, 1.0, 2.0], [60, 64, 67], [0, 5, -5], [1.0, 0.5, 0.0])
+
+        file_format, division, events = read_midi(write_midi(notes, track_name='melody'))
+
+        assert (file_format, division) == (0, MIDI_TICKS_PER_BEAT)
+        ticks_per_second = MIDI_TICKS_PER_BEAT * 2
+        ons = [(tick, e[1], e[2]) for tick, e in events if e[0] == 0x90]
+        offs = [(tick, e[1]) for tick, e in events if e[0] == 0x80]
+        assert ons == [(0, 60, 110), (ticks_per_second // 2, 64, 75), (int(1.25 * ticks_per_second), 67, 40)]
+        assert offs == [(ticks_per_second // 2, 60), (ticks_per_second, 64), (2 * ticks_per_second, 67)]
+        metas = {e[1]: e[2] for _, e in events if e[0] == 'meta'}
+        assert metas[0x03] == b'melody'
+        assert metas[0x51] == (500000).to_bytes(3, 'big')
+        assert events[-1][1] == ('meta', 0x2F, b'')
+
+    def test_offs_before_ons_at_same_tick(self):
+        """Test that a repeated note is released before it is struck again"""
+        notes = NoteEvents([0.0, 0.5], [0.5, 1.0], [62, 62], [0, 0], [1, 1])
+
+        _, _, events = read_midi(write_midi(notes))
+        at_half = [e[0] for tick, e in events if tick == MIDI_TICKS_PER_BEAT and e[0] in (0x80, 0x90)]
+
+        assert at_half == [0x80, 0x90]
+
+    def test_empty(self):
+        """Test that silence gives a valid file without notes"""
+        _, _, events = read_midi(write_midi(NoteEvents.empty()))
+
+        assert not [e for _, e in events if e[0] in (0x80, 0x90)]
+
+
+class TestMidiEndpoint:
+    """Test suite for GET /api/tracks/{id}/midi"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' plays A4 then E5"""
+        calls = {'decode': 0, 'write': 0}
+
+        async def fake_decode(source):
+            calls['decode'] += 1
+            t = np.arange(ANALYSIS_SAMPLE_RATE * 2) / ANALYSIS_SAMPLE_RATE
+            frequency = np.where(t < 1, 440.0, 659.26)
+            return (0.5 * np.sin(2 * np.pi * np.cumsum(frequency) / ANALYSIS_SAMPLE_RATE)).astype(np.float32)
+
+        def counting_write(*args, **kwargs):
+            calls['write'] += 1
+            return write_midi(*args, **kwargs)
+
+        client = app_client(decode_audio=fake_decode, write_midi=counting_write)
+        client.calls = calls
+        return client
+
+    VIDEO = 'miditest001'
+
+    def test_download(self, client):
+        """Test that the file holds the played notes and downloads as an attachment"""
+        response = client.get(f'/api/tracks/{self.VIDEO}/midi')
+
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'audio/midi'
+        assert f'filename="{self.VIDEO}.mid"' in response.headers['content-disposition']
+        _, _, events = read_midi(response.content)
+        assert [e[1] for _, e in events if e[0] == 0x90] == [69, 76]
+
+    def test_written_once(self, client):
+        """Test that repeated downloads are served from the cache"""
+        first = client.get(f'/api/tracks/{self.VIDEO}/midi')
+        second = client.get(f'/api/tracks/{self.VIDEO}/midi')
+        third = client.get(f'/api/tracks/{self.VIDEO}/midi', headers={'If-None-Match': first.headers['etag']})
+
+        assert second.content == first.content
+        assert third.status_code == 304
+        assert client.calls == {'decode': 1, 'write': 1}
+
+    def test_unknown_upload(self, client):
+        """Test that forgotten uploads are 404"""
+        assert client.get(f'/api/tracks/{"ef" * 32}/midi').status_code == 404
@@ -0,0 +1,165 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from notes import NoteEvents, midi_note_name, segment_notes
+from pipeline import ANALYSIS_SAMPLE_RATE
+
+HOP = 512 / ANALYSIS_SAMPLE_RATE
+
+
+def melody(notes, vibrato=0.0, gaps=()):
+    """Contour of (midi, seconds) notes at the analysis hop, minus unvoiced gaps"""
+    bounds = np.cumsum([0.0] + [seconds for _, seconds in notes])
+    times = np.arange(0, bounds[-1], HOP)
+    midi = np.array([note for note, _ in notes])[np.searchsorted(bounds, times, side='right') - 1]
+    midi = midi + vibrato * np.sin(2 * np.pi * 6 * times)
+    voiced = np.ones(len(times), dtype=bool)
+    for start, end in gaps:
+        voiced &= (times < start) | (times >= end)
+    frequencies = 440 * 2 ** ((midi[voiced] - 69) / 12)
+    return PitchContour(times[voiced], frequencies, np.full(voiced.sum(), 0.8))
+
+
+class TestSegmentNotes:
+    """Test suite for note segmentation"""
+
+    def test_scale(self):
+        """Test that held notes become one event each with their timing"""
+        events = segment_notes(melody([(60, 0.5), (62, 0.5), (64, 0.5), (65, 0.5)]))
+
+        assert events.midi.tolist() == [60, 62, 64, 65]
+        np.testing.assert_allclose(events.onsets, [0, 0.5, 1.0, 1.5], atol=HOP)
+        np.testing.assert_allclose(events.offsets, [0.5, 1.0, 1.5, 2.0], atol=HOP)
+        np.testing.assert_allclose(events.cents, 0, atol=1e-3)
+        np.testing.assert_allclose(events.confidences, 0.8)
+
+    def test_vibrato_across_boundary_is_one_note(self):
+        """Test that hysteresis keeps a wide vibrato on its note"""
+        contour = melody([(60.3, 2.0)], vibrato=0.3)
+
+        events = segment_notes(contour)
+
+        assert events.midi.tolist() == [60]
+        assert events.cents[0] == pytest.approx(30, abs=5)
+
+    def test_no_hysteresis_flips(self):
+        """Test that without hysteresis the same vibrato splits into many notes"""
+        contour = melody([(60.3, 2.0)], vibrato=0.3)
+
+        assert len(segment_notes(contour, hysteresis=0.0, min_duration=0.0)) > 10
+
+    def test_short_blips_merged(self):
+        """Test that runs shorter than the minimum join the previous note"""
+        events = segment_notes(melody([(60, 0.5), (67, 0.05), (62, 0.5)]))
+
+        assert events.midi.tolist() == [60, 62]
+        assert events.offsets[0] == pytest.approx(events.onsets[1], abs=HOP)
+
+    def test_short_start_merged_into_following(self):
+        """Test that a blip opening a phrase joins the note after it"""
+        events = segment_notes(melody([(59, 0.04), (64, 0.5)]))
+
+        assert events.midi.tolist() == [64]
+        assert events.onsets[0] == 0
+
+    def test_gaps_split_notes(self):
+        """Test that unvoiced gaps end notes and short phrases are dropped"""
+        events = segment_notes(melody([(60, 3.0)], gaps=[(1.0, 1.2), (2.0, 2.95)]))
+
+        assert events.midi.tolist() == [60, 60]
+        assert events.offsets[0] == pytest.approx(1.0, abs=HOP)
+        assert events.offsets[1] == pytest.approx(2.0, abs=HOP)
+
+    def test_empty(self):
+        """Test that silence has no notes"""
+        assert len(segment_notes(PitchContour.empty())) == 0
+
+    def test_invalid_hysteresis(self):
+        """Test that hysteresis must leave room for a note change"""
+        with pytest.raises(ValueError):
+            segment_notes(melody([(60, 1.0)]), hysteresis=0.5)
+
+    def test_far_fewer_events_than_points(self):
+        """Test that a sung line shrinks by orders of magnitude"""
+        rng = np.random.default_rng(0)
+        notes = [(int(n), float(d)) for n, d in zip(rng.integers(55, 75, 100), rng.uniform(0.2, 1.0, 100))]
+        contour = melody(notes, vibrato=0.2)
+
+        events = segment_notes(contour)
+
+        assert len(contour) > 20 * len(events)
+
+
+class TestNoteEvents:
+    """Test suite for the note event container"""
+
+    def test_names(self):
+        """Test scientific pitch names"""
+        assert midi_note_name(69) == 'A4'
+        assert midi_note_name(60) == 'C4'
+        assert midi_note_name(61) == 'C#4'
+        assert midi_note_name(23) == 'B0'
+
+    def test_to_dicts(self):
+        """Test the JSON form of events"""
+        events = NoteEvents([0.5], [1.25], [69], [-12.34], [0.91234])
+
+        assert events.to_dicts() == [{
+            'onset': 0.5, 'offset': 1.25, 'midi': 69, 'note': 'A4', 'cents': -12.3, 'confidence': 0.912
+        }]
+
+
+class TestNotesEndpoint:
+    """Test suite for GET /api/tracks/{id}/notes"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' plays A4, C5, E5 for a second each"""
+        calls = {'decode': 0, 'segment': 0}
+
+        async def fake_decode(source):
+            calls['decode'] += 1
+            t = np.arange(ANALYSIS_SAMPLE_RATE * 3) / ANALYSIS_SAMPLE_RATE
+            frequency = np.array([440.0, 523.25, 659.26])[(t // 1).astype(int)]
+            return (0.5 * np.sin(2 * np.pi * np.cumsum(frequency) / ANALYSIS_SAMPLE_RATE)).astype(np.float32)
+
+        def counting_segment(contour):
+            calls['segment'] += 1
+            return segment_notes(contour)
+
+        client = app_client(decode_audio=fake_decode, segment_notes=counting_segment)
+        client.calls = calls
+        return client
+
+    VIDEO = 'notestest01'
+
+    def test_notes_of_track(self, client):
+        """Test that the played notes come back as events"""
+        response = client.get(f'/api/tracks/{self.VIDEO}/notes')
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [note['note'] for note in body['notes']] == ['A4', 'C5', 'E5']
+        assert body['notes'][1]['onset'] == pytest.approx(1.0, abs=0.1)
+        assert body['duration'] == 3.0
+
+    def test_cached_and_conditional(self, client):
+        """Test that segmentation runs once and ETags short-circuit"""
+        first = client.get(f'/api/tracks/{self.VIDEO}/notes')
+        second = client.get(f'/api/tracks/{self.VIDEO}/notes')
+        third = client.get(f'/api/tracks/{self.VIDEO}/notes', headers={'If-None-Match': first.headers['etag']})
+
+        assert second.json() == first.json()
+        assert third.status_code == 304
+        assert client.calls == {'decode': 1, 'segment': 1}
+
+    def test_unknown_tracks(self, client):
+        """Test that malformed IDs and forgotten uploads are 404"""
+        assert client.get('/api/tracks/nope/notes').status_code == 404
+        assert client.get(f'/api/tracks/{"cd" * 32}/notes').status_code == 404
@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engines import extract_dominant_pitch, PIPTRACK_HOP_LENGTH
+
+
+def loop_reference(pitches, magnitudes, sr, hop_length):
+    """Per-frame reference implementation of dominant pitch picking"""
+    times, freqs = [], []
+    for t in range(pitches.shape[1]):
+        index = magnitudes[:, t].argmax()
+        if magnitudes[index, t] > 0.1:
+            times.append(t * hop_length / sr)
+            freqs.append(pitches[index, t])
+    return np.array(times), np.array(freqs)
+
+
+class TestExtractDominantPitch:
+    """Test suite for vectorized piptrack post-processing"""
+
+    def test_matches_per_frame_loop(self):
+        """Test that the vectorized result equals the per-frame loop"""
+        rng = np.random.default_rng(0)
+        magnitudes = rng.random((64, 500), dtype=np.float32) * 0.2
+        pitches = rng.random((64, 500), dtype=np.float32) * 1000
+
+        times, freqs, _ = extract_dominant_pitch(pitches, magnitudes, 22050)
+        ref_times, ref_freqs = loop_reference(pitches, magnitudes, 22050, PIPTRACK_HOP_LENGTH)
+
+        np.testing.assert_allclose(times, ref_times)
+        np.testing.assert_array_equal(freqs, ref_freqs)
+
+    def test_unvoiced_frames_dropped(self):
+        """Test that frames below the magnitude threshold are excluded"""
+        pitches = np.array([[100.0, 200.0, 300.0], [110.0, 220.0, 330.0]])
+        magnitudes = np.array([[0.5, 0.01, 0.0], [0.2, 0.05, 0.9]])
+
+        times, freqs, mags = extract_dominant_pitch(pitches, magnitudes, 22050, hop_length=512)
+
+        np.testing.assert_array_equal(freqs, [100.0, 330.0])
+        np.testing.assert_allclose(times, [0.0, 2 * 512 / 22050])
+        np.testing.assert_array_equal(mags, [0.5, 0.9])
+
+    def test_time_from_hop_length(self):
+        """Test that frame times follow the hop length"""
+        pitches = np.full((4, 10), 440.0)
+        magnitudes = np.ones((4, 10))
+
+        times, _, _ = extract_dominant_pitch(pitches, magnitudes, 1000, hop_length=100)
+
+        np.testing.assert_allclose(times, np.arange(10) * 0.1)
+
+    def test_no_frames(self):
+        """Test that empty piptrack output yields empty arrays"""
+        times, freqs, mags = extract_dominant_pitch(np.zeros((8, 0)), np.zeros((8, 0)), 22050)
+
+        assert len(times) == len(freqs) == len(mags) == 0
+
+    def test_piptrack_sine(self):
+        """Test dominant pitch of a pure tone on real piptrack output"""
+        import librosa
+
+        sr = 22050
+        t = np.arange(sr) / sr
+        y = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+        pitches, magnitudes = librosa.piptrack(y=y, sr=sr, hop_length=PIPTRACK_HOP_LENGTH)
+
+        _, freqs, _ = extract_dominant_pitch(pitches, magnitudes, sr)
+
+        assert np.median(freqs) == pytest.approx(440.0, rel=0.01)
@@ -0,0 +1,144 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from pipeline import ANALYSIS_SAMPLE_RATE, resample_pitch_contour
+from pyramid import PYRAMID_LEVELS, ContourPyramid
+
+
+def analysis_contour(seconds=30.0, frame=512 / 22050):
+    """A vibrato-like smoothed contour at the analysis frame rate"""
+    times = np.arange(0.1, seconds, frame)
+    frequencies = 220 * 2 ** (np.sin(2 * np.pi * 5.5 * times) / 24)
+    return PitchContour(times, frequencies, np.linspace(0.2, 1.0, len(times)))
+
+
+class TestContourPyramid:
+    """Test suite for multi-resolution contours"""
+
+    @pytest.mark.parametrize('mode', ['nearest', 'linear', 'mean', 'max'])
+    def test_levels_equal_direct_resampling(self, mode):
+        """Test that each level is the resampled analysis at its interval"""
+        contour = analysis_contour()
+        pyramid = ContourPyramid(contour, mode)
+
+        assert pyramid.intervals == PYRAMID_LEVELS
+        for interval in PYRAMID_LEVELS:
+            assert pyramid.level(interval) == resample_pitch_contour(contour, interval=interval, mode=mode)
+
+    def test_level_selected_without_resampling(self):
+        """Test that requests at a level return the stored contour"""
+        pyramid = ContourPyramid(analysis_contour())
+
+        assert pyramid.resample(0.5) is pyramid.levels[0.5]
+        assert pyramid.resample(0.1 + 1e-12) is pyramid.levels[0.1]
+
+    @pytest.mark.parametrize('interval', [0.15, 0.3, 0.7, 1.9])
+    def test_other_intervals_derived_exactly(self, interval):
+        """Test that intervals between levels match resampling the analysis"""
+        contour = analysis_contour()
+        pyramid = ContourPyramid(contour, 'median')
+
+        assert pyramid.resample(interval) == resample_pitch_contour(contour, interval=interval, mode='median')
+        assert pyramid.level(interval) is None
+
+    def test_custom_levels_sorted(self):
+        """Test that levels are kept fine to coarse"""
+        pyramid = ContourPyramid(analysis_contour(), levels=(1.0, 0.25))
+
+        assert pyramid.intervals == (0.25, 1.0)
+
+    def test_empty_contour(self):
+        """Test that silent tracks give empty levels"""
+        pyramid = ContourPyramid(PitchContour.empty())
+
+        assert all(len(level) == 0 for level in pyramid.levels.values())
+
+    def test_picklable(self):
+        """Test that pyramids survive the disk cache"""
+        import pickle
+
+        pyramid = ContourPyramid(analysis_contour(), 'mean')
+        restored = pickle.loads(pickle.dumps(pyramid))
+
+        assert restored.mode == 'mean'
+        assert restored.levels == pyramid.levels
+
+
+class TestPyramidEndpoint:
+    """Test suite for pyramid-backed extraction"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' is a gliding tone"""
+        calls = {'decode': 0, 'pyramid': 0}
+
+        async def fake_decode(source):
+            calls['decode'] += 1
+            t = np.arange(ANALYSIS_SAMPLE_RATE * 4) / ANALYSIS_SAMPLE_RATE
+            frequency = 220 + 40 * np.sin(2 * np.pi * 0.5 * t)
+            return (0.5 * np.sin(2 * np.pi * np.cumsum(frequency) / ANALYSIS_SAMPLE_RATE)).astype(np.float32)
+
+        def counting_pyramid(*args, **kwargs):
+            calls['pyramid'] += 1
+            return ContourPyramid(*args, **kwargs)
+
+        client = app_client(decode_audio=fake_decode, ContourPyramid=counting_pyramid)
+        client.calls = calls
+        return client
+
+    URL = 'https://youtu.be/pyramidtest'
+
+    def test_levels_match_extract_pitch(self, client):
+        """Test that every level equals the regular result at its interval"""
+        response = client.get('/api/extract-pitch/pyramid', params={'url': self.URL})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [level['resample_interval'] for level in body['levels']] == list(PYRAMID_LEVELS)
+        # 0.05 s is finer than /api/extract-pitch allows
+        for level in body['levels'][1:]:
+            single = client.get('/api/extract-pitch', params={
+                'url': self.URL, 'resample_interval': level['resample_interval']
+            }).json()
+            assert single['pitch_data'] == level['pitch_data']
+        assert client.calls == {'decode': 1, 'pyramid': 1}
+
+    def test_any_interval_from_one_pyramid(self, client):
+        """Test that new intervals neither re-analyze nor rebuild the pyramid"""
+        for interval in (0.5, 0.13, 0.1, 1.7, 2.0):
+            assert client.get('/api/extract-pitch', params={
+                'url': self.URL, 'resample_interval': interval
+            }).status_code == 200
+
+        assert client.calls == {'decode': 1, 'pyramid': 1}
+
+    def test_pyramid_per_mode(self, client):
+        """Test that each resample mode gets its own pyramid over one analysis"""
+        client.get('/api/extract-pitch', params={'url': self.URL, 'resample_mode': 'mean'})
+        client.get('/api/extract-pitch', params={'url': self.URL, 'resample_mode': 'max'})
+
+        assert client.calls == {'decode': 1, 'pyramid': 2}
+
+    def test_compact_levels(self, client):
+        """Test that compact levels carry cents grids at their interval"""
+        body = client.get('/api/extract-pitch/pyramid', params={'url': self.URL, 'format': 'compact'}).json()
+
+        for level in body['levels']:
+            assert level['encoding'] == 'cents'
+            assert level['interval'] == level['resample_interval']
+            assert len(level['cents']) > 0
+
+    def test_conditional_get(self, client):
+        """Test that a matching If-None-Match skips the pipeline"""
+        first = client.get('/api/extract-pitch/pyramid', params={'url': self.URL})
+        second = client.get('/api/extract-pitch/pyramid', params={'url': self.URL},
+                            headers={'If-None-Match': first.headers['etag']})
+
+        assert second.status_code == 304
+        assert client.calls['decode'] == 1
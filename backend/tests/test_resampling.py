@@ -0,0 +1,169 @@
+import pytest
+import sys
+import os
+import bisect
+import time
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from resampling import aggregate_bins, nearest_indices, resample_contour, target_times
+
+
+def bisect_reference(times, freqs, interval):
+    """Per-target binary search, as the original resampler did it"""
+    times = [float(t) for t in times]
+    targets = np.arange(times[0] + interval, times[-1], interval)
+    picked = []
+    for target in targets:
+        idx = bisect.bisect_left(times, target)
+        if idx == 0:
+            picked.append(freqs[0])
+        elif idx >= len(times):
+            picked.append(freqs[-1])
+        elif abs(times[idx] - target) <= abs(times[idx - 1] - target):
+            picked.append(freqs[idx])
+        else:
+            picked.append(freqs[idx - 1])
+    return targets, np.array(picked)
+
+
+class TestNearestMode:
+    """Test suite for searchsorted nearest-point resampling"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_bisect_reference(self, seed):
+        """Test that results equal the per-target bisect implementation"""
+        rng = np.random.default_rng(seed)
+        times = np.cumsum(rng.random(2000) * 0.05).astype(np.float32)
+        freqs = (200 + rng.random(2000) * 600).astype(np.float32)
+        contour = PitchContour(times, freqs)
+
+        for interval in (0.1, 0.5, 1.0):
+            result = resample_contour(contour, interval)
+            ref_targets, ref_freqs = bisect_reference(contour.times, contour.frequencies, interval)
+
+            np.testing.assert_allclose(result.times, ref_targets.astype(np.float32))
+            np.testing.assert_array_equal(result.frequencies, ref_freqs)
+
+    def test_ties_pick_later_point(self):
+        """Test that a target equidistant from two points takes the later one"""
+        indices = nearest_indices(np.array([0.0, 1.0, 2.0]), np.array([0.5, 1.5]))
+
+        np.testing.assert_array_equal(indices, [1, 2])
+
+    def test_target_grid_excludes_start_and_end(self):
+        """Test the shared target grid"""
+        contour = PitchContour(np.arange(21) * 0.1, np.full(21, 440.0))
+
+        np.testing.assert_allclose(target_times(contour, 0.5), [0.5, 1.0, 1.5])
+
+    def test_handles_millions_of_points(self):
+        """Test that large contours resample quickly"""
+        n = 2_000_000
+        contour = PitchContour(np.arange(n) * 0.005, np.full(n, 440.0))
+
+        start = time.perf_counter()
+        result = resample_contour(contour, 0.1)
+        elapsed = time.perf_counter() - start
+
+        assert len(result) == 99999
+        assert elapsed < 1.0
+
+
+class TestLinearMode:
+    """Test suite for linear-interpolation resampling"""
+
+    def test_interpolates_between_points(self):
+        """Test that frequencies are interpolated at the targets"""
+        contour = PitchContour([0.0, 1.0, 2.0], [400.0, 500.0, 600.0])
+
+        result = resample_contour(contour, 0.5, mode='linear')
+
+        np.testing.assert_allclose(result.times, [0.5, 1.0, 1.5])
+        np.testing.assert_allclose(result.frequencies, [450.0, 500.0, 550.0])
+
+
+class TestAggregateModes:
+    """Test suite for per-bin aggregation"""
+
+    @pytest.fixture
+    def contour(self):
+        # Points at 0.0..1.9 s every 0.1 s; bins of width 0.5 centred on 0.5 and 1.0, 1.5
+        times = np.arange(20) * 0.1
+        freqs = np.array([100, 200, 300, 400, 500, 600, 700, 800, 900, 1000,
+                          110, 120, 130, 140, 150, 160, 170, 180, 190, 200], dtype=float)
+        return PitchContour(times, freqs)
+
+    def test_matches_python_aggregation(self, contour):
+        """Test every statistic against a straightforward per-bin computation"""
+        targets = target_times(contour, 0.5)
+        stats = aggregate_bins(contour, targets, 0.5, frame_period=0.1)
+
+        times = contour.times.astype(np.float64)
+        for k, target in enumerate(targets):
+            mask = (times >= target - 0.25) & (times < target + 0.25)
+            members = contour.frequencies[mask].astype(np.float64)
+            assert stats['count'][k] == len(members)
+            assert stats['mean'][k] == pytest.approx(members.mean())
+            assert stats['median'][k] == pytest.approx(np.median(members))
+            assert stats['min'][k] == members.min()
+            assert stats['max'][k] == members.max()
+            assert stats['voiced_ratio'][k] == pytest.approx(min(len(members) / 5, 1.0))
+
+    @pytest.mark.parametrize("mode", ['mean', 'median', 'min', 'max'])
+    def test_modes_use_matching_statistic(self, contour, mode):
+        """Test that each aggregate mode returns its statistic"""
+        targets = target_times(contour, 0.5)
+        stats = aggregate_bins(contour, targets, 0.5)
+
+        result = resample_contour(contour, 0.5, mode=mode)
+
+        np.testing.assert_allclose(result.frequencies, stats[mode].astype(np.float32))
+
+    def test_empty_bins_dropped(self):
+        """Test that bins with no voiced frames produce no output point"""
+        times = np.concatenate([np.arange(10) * 0.1, 5.0 + np.arange(10) * 0.1])
+        contour = PitchContour(times, np.full(20, 440.0))
+
+        result = resample_contour(contour, 0.5, mode='mean')
+
+        assert all(t < 1.25 or t > 4.75 for t in result.times)
+        assert len(result) < len(target_times(contour, 0.5))
+
+    def test_voiced_ratio_in_confidence(self):
+        """Test that aggregate confidence reflects how much of the bin is voiced"""
+        times = np.array([0.0, 0.9, 1.0, 1.1, 2.0])
+        contour = PitchContour(times, np.full(5, 440.0))
+
+        result = resample_contour(contour, 1.0, mode='mean', frame_period=0.1)
+
+        np.testing.assert_allclose(result.confidences, [0.3])
+
+    def test_unknown_mode_rejected(self, contour):
+        """Test that unknown modes raise ValueError"""
+        with pytest.raises(ValueError, match="unknown resample mode"):
+            resample_contour(contour, 0.5, mode='mode')
+
+
+class TestResampleModeEndpoint:
+    """Test suite for the resample_mode query parameter"""
+
+    def test_invalid_mode_rejected(self):
+        """Test that unsupported modes fail validation"""
+        from fastapi.testclient import TestClient
+        import main
+
+        response = TestClient(main.app).post(
+            "/api/extract-pitch?resample_mode=bogus", json={"url": "https://youtu.be/x"}
+        )
+
+        assert response.status_code == 422
+
+    def test_mode_is_part_of_cache_key(self):
+        """Test that modes are cached separately"""
+        import main
+
+        assert main.result_cache_key("u", 0.5, 'mean') != main.result_cache_key("u", 0.5, 'nearest')
@@ -0,0 +1,316 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from pipeline import ANALYSIS_SAMPLE_RATE
+from scoring import (
+    band_costs,
+    banded_dtw,
+    estimate_offset,
+    grid_cents,
+    masked_cross_correlation,
+    score_contours,
+)
+
+FRAME = 512 / 22050
+
+
+def melody(seconds=24.0, note_seconds=0.5, shift=0.0, semitones=0.0, rest=(8.0, 9.0)):
+    """Notes a few semitones apart at the analysis frame rate, with a rest"""
+    times = np.arange(0.1, seconds, FRAME)
+    times = times[(times < rest[0]) | (times >= rest[1])]
+    steps = np.array([0, 3, 7, 5, 2, 9, 4, 0])
+    notes = steps[((times - shift) // note_seconds).astype(int) % len(steps)]
+    return PitchContour(times, 220 * 2 ** ((notes + semitones) / 12))
+
+
+def full_dtw_cost(costs):
+    """Reference DP over the whole matrix, out-of-band cells excluded"""
+    n, width = costs.shape
+    band = width // 2
+    total = np.full((n + 1, n + 1), np.inf)
+    total[0, 0] = 0.0
+    for i in range(n):
+        for k in range(width):
+            j = i + k - band
+            if 0 <= j < n:
+                total[i + 1, j + 1] = costs[i, k] + min(total[i, j], total[i, j + 1], total[i + 1, j])
+    return total[n, n]
+
+
+class TestBandedDtw:
+    """Test suite for the banded DTW alignment"""
+
+    @pytest.mark.parametrize('seed', range(8))
+    def test_matches_full_dynamic_programming(self, seed):
+        """Test that the row-vectorized recurrence finds the optimal path"""
+        rng = np.random.default_rng(seed)
+        n, band = int(rng.integers(1, 50)), int(rng.integers(0, 6))
+        target = rng.normal(0, 300, n)
+        user = target + rng.normal(0, 60, n)
+        target[rng.random(n) < 0.2] = np.nan
+        user[rng.random(n) < 0.2] = np.nan
+        costs = band_costs(target, user, band)
+
+        target_path, user_path = banded_dtw(costs)
+
+        assert costs[target_path, user_path - target_path + band].sum() == pytest.approx(full_dtw_cost(costs))
+        assert (target_path[0], user_path[0]) == (0, 0)
+        assert (target_path[-1], user_path[-1]) == (n - 1, n - 1)
+        assert np.all(np.diff(target_path) >= 0) and np.all(np.diff(user_path) >= 0)
+        assert np.all(np.diff(target_path) + np.diff(user_path) >= 1)
+        assert np.all(np.abs(user_path - target_path) <= band)
+
+    def test_recovers_time_shift(self):
+        """Test that a delayed copy is aligned by its delay"""
+        target = np.repeat([0.0, 300.0, 700.0, 500.0, np.nan, 200.0], 10)
+        user = np.concatenate([np.full(3, np.nan), target[:-3]])
+
+        target_path, user_path = banded_dtw(band_costs(target, user, 5))
+
+        voiced = ~np.isnan(target[target_path]) & ~np.isnan(user[user_path])
+        assert np.median((user_path - target_path)[voiced]) == 3
+
+
+class TestGridCents:
+    """Test suite for binning contours onto the scoring grid"""
+
+    def test_mean_per_slot(self):
+        """Test that slots hold the mean cents of their points and NaN when empty"""
+        contour = PitchContour([0.01, 0.02, 0.12, 0.3], [440.0, 440.0, 880.0, 0.0])
+
+        cents = grid_cents(contour, 0.0, 5, 0.05)
+
+        assert cents[0] == pytest.approx(0.0)
+        assert cents[2] == pytest.approx(1200.0)
+        assert np.isnan(cents[[1, 3, 4]]).all()
+
+
+class TestScoreContours:
+    """Test suite for sing-along scoring"""
+
+    def test_perfect_take(self):
+        """Test that singing the target exactly hits every voiced frame"""
+        score = score_contours(melody(), melody())
+
+        assert score['accuracy'] == 1.0
+        assert score['coverage'] == 1.0
+        assert score['cents_error'] == pytest.approx(0.0, abs=0.1)
+
+    def test_late_take_forgiven_within_band(self):
+        """Test that timing within the band is absorbed and timing beyond it is not"""
+        late = melody(shift=0.2, rest=(8.2, 9.2))
+
+        aligned = score_contours(melody(), late, band_seconds=0.5)
+        rigid = score_contours(melody(), late, band_seconds=0.0)
+
+        assert aligned['accuracy'] > 0.95
+        assert rigid['accuracy'] < 0.7
+
+    def test_offset_compensates_latency(self):
+        """Test that offset moves the user's times before alignment"""
+        late = PitchContour(melody().times + 0.8, melody().frequencies)
+
+        assert score_contours(melody(), late, band_seconds=0.2)['accuracy'] < 0.7
+        assert score_contours(melody(), late, offset=-0.8, band_seconds=0.2)['accuracy'] > 0.95
+
+    def test_octave_invariance(self):
+        """Test that an octave below is a hit only when octaves are ignored"""
+        low = melody(semitones=-12)
+
+        assert score_contours(melody(), low)['accuracy'] == 1.0
+        assert score_contours(melody(), low, octave_invariant=False)['accuracy'] == 0.0
+
+    def test_silent_take(self):
+        """Test that an empty take scores zero with no error to report"""
+        score = score_contours(melody(), PitchContour([], []))
+
+        assert score['accuracy'] == 0.0
+        assert score['coverage'] == 0.0
+        assert score['cents_error'] is None
+
+    def test_segments(self):
+        """Test that sections report their own accuracy"""
+        target = melody()
+        sharp_middle = np.where((target.times >= 10) & (target.times < 20), 2 ** (1 / 12), 1.0)
+        user = PitchContour(target.times, target.frequencies * sharp_middle)
+
+        score = score_contours(target, user, segment_seconds=10.0)
+
+        assert [(s['start'], s['end']) for s in score['segments']] == [(0.0, 10.0), (10.0, 20.0), (20.0, 24.0)]
+        accuracies = [s['accuracy'] for s in score['segments']]
+        assert accuracies[0] == 1.0 and accuracies[2] == 1.0
+        assert accuracies[1] < 0.1
+        assert score['segments'][1]['cents_error'] == pytest.approx(100.0, abs=5.0)
+
+    def test_memory_linear_in_length(self):
+        """Test that a long song is scored without an n-by-n matrix"""
+        import tracemalloc
+
+        target = melody(seconds=600.0)
+        tracemalloc.start()
+        score_contours(target, target)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # A few kB per frame, where an n-by-n float matrix would take 1.1 GB
+        frames = 600.0 / 0.05
+        assert peak < 4000 * frames
+
+    def test_empty_target(self):
+        """Test that a target without voiced frames is rejected"""
+        with pytest.raises(ValueError):
+            score_contours(PitchContour([], []), melody())
+
+
+class TestEstimateOffset:
+    """Test suite for FFT cross-correlation latency estimation"""
+
+    def test_correlation_matches_direct_pearson(self):
+        """Test that the FFT sums give each lag's correlation over voiced pairs"""
+        rng = np.random.default_rng(3)
+        target = rng.normal(0, 100, 80)
+        user = rng.normal(0, 100, 80)
+        target[rng.random(80) < 0.3] = np.nan
+        user[rng.random(80) < 0.3] = np.nan
+
+        lags, correlations, overlaps = masked_cross_correlation(target, user, 12)
+
+        for lag, correlation, overlap in zip(lags, correlations, overlaps):
+            i = np.arange(max(0, -lag), min(80, 80 - lag))
+            voiced = ~np.isnan(target[i]) & ~np.isnan(user[i + lag])
+            assert overlap == voiced.sum()
+            assert correlation == pytest.approx(np.corrcoef(target[i][voiced], user[i + lag][voiced])[0, 1])
+
+    @pytest.mark.parametrize('delay', [0.37, -0.23, 0.0, 1.5])
+    def test_recovers_delay(self, delay):
+        """Test that a delayed take's lag is found to within a fraction of a frame"""
+        target = melody()
+        late = PitchContour(target.times + delay, target.frequencies)
+
+        estimate = estimate_offset(target, late)
+
+        assert estimate['lag'] == pytest.approx(delay, abs=0.02)
+        assert estimate['offset'] == pytest.approx(-estimate['lag'])
+        assert estimate['confidence'] > 0.95
+
+    def test_transposition_ignored(self):
+        """Test that singing in another octave or key does not move the lag"""
+        target = melody()
+        low = melody(shift=0.3, semitones=-17, rest=(8.3, 9.3))
+
+        assert estimate_offset(target, low)['lag'] == pytest.approx(0.3, abs=0.02)
+
+    def test_unrelated_take_low_confidence(self):
+        """Test that a take unrelated to the target correlates weakly"""
+        rng = np.random.default_rng(0)
+        target = melody()
+        noise = PitchContour(target.times, 220 * 2 ** (rng.normal(0, 4, len(target)) / 12))
+
+        assert estimate_offset(target, noise)['confidence'] < 0.3
+
+    def test_no_overlap(self):
+        """Test that a take with no voiced overlap is rejected"""
+        with pytest.raises(ValueError):
+            estimate_offset(melody(seconds=5.0), PitchContour([], []))
+
+
+class TestScoreEndpoint:
+    """Test suite for POST /api/tracks/{id}/score"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' and recordings are the same gliding tone"""
+        async def fake_decode(source):
+            t = np.arange(ANALYSIS_SAMPLE_RATE * 6) / ANALYSIS_SAMPLE_RATE
+            frequency = 220 + 40 * np.sin(2 * np.pi * 0.5 * t)
+            return (0.5 * np.sin(2 * np.pi * np.cumsum(frequency) / ANALYSIS_SAMPLE_RATE)).astype(np.float32)
+
+        return app_client(decode_audio=fake_decode)
+
+    VIDEO = 'scoretest01'
+
+    def test_contour_take(self, client):
+        """Test that posting the target's own contour scores perfectly"""
+        target = client.get(f'/api/tracks/{self.VIDEO}/pitch').json()['pitch_data']
+
+        response = client.post(f'/api/tracks/{self.VIDEO}/score', json={'pitch_data': target})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['accuracy'] == 1.0
+        assert body['track_id'] == self.VIDEO
+        assert len(body['segments']) == 1
+
+    def test_flat_take(self, client):
+        """Test that a take a semitone flat misses when timing is held fixed"""
+        target = client.get(f'/api/tracks/{self.VIDEO}/pitch').json()['pitch_data']
+        flat = [{'time': p['time'], 'frequency': p['frequency'] / 2 ** (1 / 12)} for p in target]
+
+        body = client.post(
+            f'/api/tracks/{self.VIDEO}/score', params={'band': 0}, json={'pitch_data': flat}
+        ).json()
+
+        assert body['accuracy'] < 0.1
+        assert body['cents_error'] == pytest.approx(100.0, abs=5.0)
+
+    def test_recording_take(self, client):
+        """Test that an uploaded recording is analyzed and scored"""
+        response = client.post(
+            f'/api/tracks/{self.VIDEO}/score',
+            files={'file': ('take.wav', b'RIFF0000WAVE', 'audio/wav')},
+        )
+
+        assert response.status_code == 200
+        assert response.json()['accuracy'] == 1.0
+
+    def test_invalid_body(self, client):
+        """Test that a malformed take is rejected"""
+        response = client.post(f'/api/tracks/{self.VIDEO}/score', json={'pitch_data': [{'time': 1.0}]})
+
+        assert response.status_code == 422
+
+    def test_offset(self, client):
+        """Test that a delayed take's latency is reported"""
+        target = client.get(f'/api/tracks/{self.VIDEO}/pitch').json()['pitch_data']
+        late = [{'time': p['time'] + 0.4, 'frequency': p['frequency']} for p in target]
+
+        response = client.post(f'/api/tracks/{self.VIDEO}/offset', json={'pitch_data': late})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['lag'] == pytest.approx(0.4, abs=0.03)
+        assert body['confidence'] > 0.9
+
+    def test_offset_without_overlap(self, client):
+        """Test that an empty take cannot be aligned"""
+        response = client.post(f'/api/tracks/{self.VIDEO}/offset', json={'pitch_data': []})
+
+        assert response.status_code == 422
+
+    def test_unknown_upload(self, client):
+        """Test that scoring against an upload that is no longer cached is a 404"""
+        response = client.post(f'/api/tracks/{"ab" * 32}/score', json={'pitch_data': []})
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('endpoint', ['score', 'offset'])
+    def test_unknown_track_skips_take_analysis(self, client, monkeypatch, endpoint):
+        """Test that an unknown track is rejected before the recording is decoded"""
+        import main
+
+        async def unexpected_decode(source):
+            raise AssertionError('the take was decoded')
+
+        monkeypatch.setattr(main, 'decode_audio', unexpected_decode)
+        response = client.post(
+            f'/api/tracks/{"ab" * 32}/{endpoint}',
+            files={'file': ('take.wav', b'RIFF0000WAVE', 'audio/wav')},
+        )
+
+        assert response.status_code == 404
@@ -0,0 +1,238 @@
+import pytest
+import sys
+import os
+import json
+import asyncio
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from engines import PIPTRACK_HOP_LENGTH
+from pipeline import ANALYSIS_SAMPLE_RATE, analyze_samples, resample_pitch_contour
+from streaming import STREAM_BLOCK_FRAMES, StreamingPitchTracker, stream_step
+
+BLOCK_SAMPLES = STREAM_BLOCK_FRAMES * PIPTRACK_HOP_LENGTH
+
+
+def glide_samples(seconds=6.3):
+    """A gliding tone with silent gaps, the kind of input the pipeline sees"""
+    sr = ANALYSIS_SAMPLE_RATE
+    t = np.arange(int(sr * seconds)) / sr
+    frequency = 300 + 100 * np.sin(2 * np.pi * 0.3 * t)
+    gate = np.sin(2 * np.pi * 0.7 * t) > -0.3
+    noise = 0.01 * np.random.default_rng(1).standard_normal(len(t))
+    y = 0.4 * np.sin(2 * np.pi * np.cumsum(frequency) / sr) * gate + noise
+    return y.astype(np.float32)
+
+
+def sample_blocks(y, block_samples=BLOCK_SAMPLES):
+    """Consecutive blocks of y, as audio_source.decode_blocks yields them"""
+    return [y[start:start + block_samples] for start in range(0, len(y), block_samples)]
+
+
+def run_stream(y, interval, mode, engine='piptrack'):
+    """Feed every block through stream_step and collect the outputs"""
+    tracker = StreamingPitchTracker(interval, mode, engine=engine)
+    smoothed, resampled = [], []
+    for block in sample_blocks(y) + [None]:
+        tracker, s, r = stream_step(tracker, block)
+        smoothed.append(s)
+        resampled.append(r)
+    return tracker, smoothed, resampled
+
+
+@pytest.fixture(scope='module')
+def glide():
+    """Decoded samples plus their batch analysis"""
+    y = glide_samples()
+    return y, analyze_samples(y)
+
+
+class TestStreamingPitchTracker:
+    """Test suite for block-by-block extraction"""
+
+    @pytest.mark.parametrize('mode', ['nearest', 'linear', 'mean', 'median', 'min', 'max'])
+    @pytest.mark.parametrize('interval', [0.1, 0.5, 1.3])
+    def test_matches_batch_resampling(self, glide, mode, interval):
+        """Test that concatenated chunks equal the batch result"""
+        y, analysis = glide
+        expected = resample_pitch_contour(analysis['pitch_contour'], interval=interval, mode=mode)
+
+        _, _, chunks = run_stream(y, interval, mode)
+        streamed = PitchContour.concatenate(chunks)
+
+        assert len(streamed) == len(expected)
+        np.testing.assert_allclose(streamed.times, expected.times)
+        np.testing.assert_allclose(streamed.frequencies, expected.frequencies, rtol=1e-6)
+
+    def test_smoothed_contour_matches_analysis(self, glide):
+        """Test that the smoothed points and normalized confidences match"""
+        y, analysis = glide
+
+        tracker, smoothed, _ = run_stream(y, 0.5, 'nearest')
+        contour = PitchContour.concatenate(smoothed)
+
+        np.testing.assert_allclose(contour.frequencies, analysis['pitch_contour'].frequencies, rtol=1e-6)
+        np.testing.assert_allclose(contour.confidences / tracker.peak,
+                                   analysis['pitch_contour'].confidences, rtol=1e-5)
+        assert tracker.duration == pytest.approx(analysis['duration'])
+
+    @pytest.mark.parametrize('engine', ['yin', 'autocorr'])
+    def test_other_engines_match_batch(self, glide, engine):
+        """Test that frame-local engines stream to the batch contour and confidences"""
+        y, _ = glide
+        analysis = analyze_samples(y, engine=engine)
+
+        tracker, smoothed, _ = run_stream(y, 0.5, 'nearest', engine=engine)
+        contour = PitchContour.concatenate(smoothed)
+
+        assert len(contour) == len(analysis['pitch_contour'])
+        np.testing.assert_allclose(contour.frequencies, analysis['pitch_contour'].frequencies, rtol=1e-4)
+        np.testing.assert_allclose(contour.confidences, analysis['pitch_contour'].confidences, atol=1e-4)
+
+    def test_points_arrive_before_the_end(self, glide):
+        """Test that the first chunk is emitted after the first few blocks"""
+        y, _ = glide
+
+        _, _, chunks = run_stream(y, 0.1, 'nearest')
+
+        first = next(i for i, chunk in enumerate(chunks) if len(chunk))
+        assert first <= 1
+        assert sum(1 for chunk in chunks if len(chunk)) > 1
+
+    def test_block_size_does_not_matter(self):
+        """Test that odd block sizes give the same contour"""
+        sr = ANALYSIS_SAMPLE_RATE
+        t = np.arange(sr * 2) / sr
+        y = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+
+        results = []
+        for size in (1000, 7777, len(y)):
+            tracker = StreamingPitchTracker(0.1, 'mean')
+            parts = [tracker.process(y[i:i + size])[1] for i in range(0, len(y), size)]
+            parts.append(tracker.finish()[1])
+            results.append(PitchContour.concatenate(parts))
+
+        for contour in results[1:]:
+            np.testing.assert_allclose(contour.frequencies, results[0].frequencies)
+
+    def test_silence_yields_nothing(self):
+        """Test that a silent stream produces no points"""
+        tracker = StreamingPitchTracker()
+        tracker.process(np.zeros(ANALYSIS_SAMPLE_RATE, dtype=np.float32))
+
+        smoothed, resampled = tracker.finish()
+
+        assert len(smoothed) == len(resampled) == 0
+
+    def test_finish_twice_raises(self):
+        """Test that a finished tracker rejects more input"""
+        tracker = StreamingPitchTracker()
+        tracker.finish()
+
+        with pytest.raises(RuntimeError):
+            tracker.finish()
+        with pytest.raises(RuntimeError):
+            tracker.process(np.zeros(10))
+
+    @pytest.mark.parametrize('kwargs', [{'interval': 0}, {'mode': 'cubic'}, {'engine': 'pyin'},
+                                        {'engine': 'crepe'}])
+    def test_invalid_parameters(self, kwargs):
+        """Test that bad parameters are rejected up front"""
+        with pytest.raises(ValueError):
+            StreamingPitchTracker(**kwargs)
+
+
+class TestStreamEndpoint:
+    """Test suite for /api/extract-pitch/stream"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose videos resolve to a local glide"""
+        y = glide_samples(seconds=3.0)
+
+        async def fake_decode_blocks(source, block_samples):
+            # The blocks ffmpeg would produce for a file at the analysis rate
+            for block in sample_blocks(y, block_samples):
+                # Let other requests run while the block "downloads"
+                await asyncio.sleep(0)
+                yield block
+
+        return app_client(decode_blocks=fake_decode_blocks)
+
+    URL = '/api/extract-pitch/stream?url=https://youtu.be/abc&resample_interval=0.1'
+
+    def test_ndjson_events(self, client):
+        """Test the event sequence and that the result is cached"""
+        response = client.get(self.URL)
+
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[0]['type'] == 'start'
+        assert events[-1]['type'] == 'done'
+        chunks = [e for e in events if e['type'] == 'chunk']
+        assert len(chunks) > 1
+        points = [p for chunk in chunks for p in chunk['pitch_data']]
+        assert events[-1]['points'] == len(points)
+
+        # The regular endpoint now serves the same contour from the cache
+        result = client.get('/api/extract-pitch?url=https://youtu.be/abc&resample_interval=0.1').json()
+        assert client.pools.downloads == 1
+        assert result['pitch_data'] == pytest.approx(points)
+
+    def test_cached_result_is_one_chunk(self, client):
+        """Test that a cached result is sent without downloading again"""
+        client.get(self.URL)
+
+        events = [json.loads(line) for line in client.get(self.URL).text.splitlines()]
+
+        assert [e['type'] for e in events] == ['start', 'chunk', 'done']
+        assert client.pools.downloads == 1
+
+    def test_concurrent_requests_share_one_analysis(self, client):
+        """Test that requests arriving during a stream wait for its analysis"""
+        import main
+
+        url = 'https://youtu.be/abc'
+
+        async def collect(events):
+            return [event async for event in events]
+
+        async def scenario():
+            return await asyncio.gather(
+                collect(main.stream_pitch_events(url, 0.1, 'nearest')),
+                collect(main.stream_pitch_events(url, 0.1, 'nearest')),
+                main.build_pitch_result(url, 0.5, 'nearest'),
+            )
+
+        first, second, result = asyncio.run(scenario())
+
+        assert client.pools.downloads == 1
+        assert len([e for e in first if e['type'] == 'chunk']) > 1
+        assert [e['type'] for e in second] == ['start', 'chunk', 'done']
+        assert second[1]['pitch_data'] == [p for e in first if e['type'] == 'chunk' for p in e['pitch_data']]
+        assert result['duration'] == first[-1]['duration']
+
+    def test_sse_from_accept_header(self, client):
+        """Test that EventSource clients get Server-Sent Events"""
+        response = client.get(self.URL, headers={'Accept': 'text/event-stream'})
+
+        assert response.headers['content-type'].startswith('text/event-stream')
+        assert response.text.startswith('event: start\ndata: {')
+        assert 'event: done\n' in response.text
+
+    def test_error_event(self, client, monkeypatch):
+        """Test that pipeline failures end the stream with an error event"""
+        import main
+
+        def failing_resolve(url):
+            raise RuntimeError('video unavailable')
+
+        monkeypatch.setattr(main, 'resolve_audio_source', failing_resolve)
+        response = client.post('/api/extract-pitch/stream', json={'url': 'https://youtu.be/xyz'})
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[-1] == {'type': 'error', 'detail': 'video unavailable'}
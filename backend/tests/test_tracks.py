@@ -0,0 +1,185 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour import PitchContour
+from pipeline import ANALYSIS_SAMPLE_RATE, resample_pitch_contour
+from tracks import SeekIndex, TrackIndex, parse_track_id
+
+
+def analysis_contour(seconds=30.0, frame=512 / 22050, gap=(12.0, 14.5)):
+    """A vibrato-like contour at the analysis frame rate, with an unvoiced gap"""
+    times = np.arange(0.1, seconds, frame)
+    times = times[(times < gap[0]) | (times >= gap[1])]
+    frequencies = 220 * 2 ** (np.sin(2 * np.pi * 5.5 * times) / 24)
+    return PitchContour(times, frequencies, np.linspace(0.2, 1.0, len(times)))
+
+
+class TestSeekIndex:
+    """Test suite for the per-second seek index"""
+
+    def test_locate_matches_searchsorted(self):
+        """Test that lookups equal a binary search over all times"""
+        times = analysis_contour().times
+        seek = SeekIndex(times)
+
+        for time in np.concatenate([[-1.0, 0.0, 12.0, 13.0, 14.5, 29.99, 30.0, 45.0],
+                                    np.random.default_rng(0).uniform(0, 31, 200),
+                                    times[::37]]):
+            assert seek.locate(time) == np.searchsorted(times, time)
+
+    def test_empty(self):
+        """Test that an empty track locates everything at 0"""
+        assert SeekIndex(np.array([])).locate(5.0) == 0
+
+
+class TestTrackIndex:
+    """Test suite for windowed contour queries"""
+
+    WINDOWS = [(0.0, 5.0), (3.3, 7.9), (11.0, 15.0), (12.5, 14.0), (27.0, 40.0), (0.0, 30.0)]
+
+    @pytest.mark.parametrize('start,end', WINDOWS)
+    def test_window_is_slice_of_analysis(self, start, end):
+        """Test that raw windows hold exactly the points in [start, end)"""
+        contour = analysis_contour()
+
+        assert TrackIndex(contour).window(start, end) == contour.window(start, end)
+
+    @pytest.mark.parametrize('mode', ['nearest', 'linear', 'mean', 'median', 'min', 'max'])
+    @pytest.mark.parametrize('interval', [0.05, 0.1, 0.37, 1.0, 2.0])
+    def test_resampled_window_matches_full_result(self, mode, interval):
+        """Test that resampled windows equal the full result restricted to the window"""
+        contour = analysis_contour()
+        full = resample_pitch_contour(contour, interval=interval, mode=mode)
+        track = TrackIndex(contour)
+
+        for start, end in self.WINDOWS:
+            assert track.resampled_window(start, end, interval, mode) == full.window(start, end)
+
+    def test_short_contour(self):
+        """Test that contours shorter than an interval keep their first point"""
+        contour = PitchContour([1.0, 1.2], [220.0, 230.0], [1.0, 1.0])
+        track = TrackIndex(contour)
+
+        assert track.resampled_window(0.0, 5.0, 1.0) == resample_pitch_contour(contour, interval=1.0)
+        assert len(track.resampled_window(2.0, 5.0, 1.0)) == 0
+
+    def test_invalid_arguments(self):
+        """Test that bad intervals and modes are rejected"""
+        track = TrackIndex(analysis_contour())
+
+        with pytest.raises(ValueError):
+            track.resampled_window(0.0, 1.0, 0.0)
+        with pytest.raises(ValueError):
+            track.resampled_window(0.0, 1.0, 0.1, 'mode')
+
+
+class TestParseTrackId:
+    """Test suite for track ID parsing"""
+
+    def test_youtube_id(self):
+        """Test that video IDs map to YouTube sources"""
+        assert parse_track_id('dQw4w9WgXcQ') == 'youtube:dQw4w9WgXcQ'
+
+    def test_upload_id(self):
+        """Test that upload digests map to upload sources"""
+        from uploads import upload_source_id
+
+        digest = 'ab' * 32
+        assert parse_track_id(digest) == upload_source_id(digest)
+
+    @pytest.mark.parametrize('track_id', ['', 'short', 'dQw4w9WgXc!', 'AB' * 32, 'x' * 40])
+    def test_malformed(self, track_id):
+        """Test that anything else is rejected"""
+        assert parse_track_id(track_id) is None
+
+
+class TestTrackEndpoint:
+    """Test suite for GET /api/tracks/{id}/pitch"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client whose 'video' is a gliding tone"""
+        calls = {'decode': 0}
+
+        async def fake_decode(source):
+            calls['decode'] += 1
+            t = np.arange(ANALYSIS_SAMPLE_RATE * 6) / ANALYSIS_SAMPLE_RATE
+            frequency = 220 + 40 * np.sin(2 * np.pi * 0.5 * t)
+            return (0.5 * np.sin(2 * np.pi * np.cumsum(frequency) / ANALYSIS_SAMPLE_RATE)).astype(np.float32)
+
+        client = app_client(decode_audio=fake_decode)
+        client.calls = calls
+        return client
+
+    VIDEO = 'tracktest01'
+    URL = f'https://www.youtube.com/watch?v={VIDEO}'
+
+    def test_raw_window(self, client):
+        """Test that only analysis points inside the window are returned"""
+        response = client.get(f'/api/tracks/{self.VIDEO}/pitch', params={'start': 2.0, 'end': 3.0})
+
+        assert response.status_code == 200
+        body = response.json()
+        times = [point['time'] for point in body['pitch_data']]
+        assert len(times) > 40
+        assert 2.0 <= min(times) and max(times) < 3.0
+        assert body['resample_interval'] is None
+        assert (body['track_id'], body['start'], body['end']) == (self.VIDEO, 2.0, 3.0)
+
+    @pytest.mark.parametrize('mode', ['nearest', 'mean'])
+    def test_resolution_matches_extract_pitch(self, client, mode):
+        """Test that resampled windows are the full result's points in the window"""
+        full = client.get('/api/extract-pitch', params={
+            'url': self.URL, 'resample_interval': 0.2, 'resample_mode': mode
+        }).json()['pitch_data']
+        window = client.get(f'/api/tracks/{self.VIDEO}/pitch', params={
+            'start': 1.5, 'end': 4.0, 'resolution': 0.2, 'resample_mode': mode
+        }).json()
+
+        assert window['pitch_data'] == [p for p in full if 1.5 <= p['time'] < 4.0]
+        assert client.calls['decode'] == 1
+
+    def test_end_defaults_to_duration(self, client):
+        """Test that an open window runs to the end of the track"""
+        body = client.get(f'/api/tracks/{self.VIDEO}/pitch', params={'start': 5.0}).json()
+
+        assert body['end'] == body['duration']
+        assert max(point['time'] for point in body['pitch_data']) > 5.9
+
+    def test_binary_and_compact(self, client):
+        """Test that windows use the regular result encodings"""
+        from encoding import BINARY_MEDIA_TYPE
+
+        binary = client.get(f'/api/tracks/{self.VIDEO}/pitch',
+                            params={'start': 1.0, 'end': 2.0, 'format': 'binary'})
+        compact = client.get(f'/api/tracks/{self.VIDEO}/pitch',
+                             params={'start': 1.0, 'end': 2.0, 'resolution': 0.1, 'format': 'compact'})
+
+        assert binary.headers['content-type'] == BINARY_MEDIA_TYPE
+        assert compact.json()['encoding'] == 'cents'
+        assert len(compact.json()['cents']) == 10
+
+    def test_invalid_requests(self, client):
+        """Test that bad ranges, ids and combinations are rejected"""
+        assert client.get(f'/api/tracks/{self.VIDEO}/pitch', params={'start': 3, 'end': 2}).status_code == 422
+        assert client.get(f'/api/tracks/{self.VIDEO}/pitch', params={'format': 'compact'}).status_code == 422
+        assert client.get('/api/tracks/nope/pitch').status_code == 404
+        assert client.get(f'/api/tracks/{"ab" * 32}/pitch').status_code == 404
+        assert client.calls['decode'] == 0
+
+    def test_conditional_get(self, client):
+        """Test that a matching If-None-Match skips the pipeline"""
+        params = {'start': 1.0, 'end': 2.0}
+        first = client.get(f'/api/tracks/{self.VIDEO}/pitch', params=params)
+        second = client.get(f'/api/tracks/{self.VIDEO}/pitch', params=params,
+                            headers={'If-None-Match': first.headers['etag']})
+        other = client.get(f'/api/tracks/{self.VIDEO}/pitch', params={'start': 1.0, 'end': 2.5})
+
+        assert second.status_code == 304
+        assert other.headers['etag'] != first.headers['etag']
+        assert client.calls['decode'] == 1
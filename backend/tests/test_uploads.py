@@ -0,0 +1,263 @@
+import pytest
+import sys
+import os
+import io
+import asyncio
+import hashlib
+import numpy as np
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uploads import (
+    MULTIPART_OVERHEAD_BYTES,
+    EmptyUpload,
+    MalformedUpload,
+    MissingUpload,
+    UploadTooLarge,
+    spool_multipart,
+    upload_source_id,
+)
+
+BOUNDARY = 'xYzBoundary'
+CONTENT_TYPE = f'multipart/form-data; boundary={BOUNDARY}'
+
+
+def multipart_body(data, field='file', filename='take.wav', fields=()):
+    """A multipart/form-data body with plain fields followed by one file"""
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields
+    ]
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: audio/wav\r\n\r\n'.encode() + data + b'\r\n'
+    )
+    return b''.join(parts) + f'--{BOUNDARY}--\r\n'.encode()
+
+
+def chunked(body, size=1000):
+    """Async iterator over body in pieces, like Request.stream()"""
+    async def stream():
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+    return stream()
+
+
+def spool(body, destination=None, content_type=CONTENT_TYPE, size=1000, **kwargs):
+    return asyncio.run(spool_multipart(content_type, chunked(body, size), destination or io.BytesIO(), **kwargs))
+
+
+class TestSpoolMultipart:
+    """Test suite for streamed multipart upload ingest"""
+
+    @pytest.mark.parametrize('size', [1, 7, 1000, 1 << 20])
+    def test_copies_and_hashes(self, size):
+        """Test that the file is copied whole and hashed whatever the chunking"""
+        data = os.urandom(10000)
+        destination = io.BytesIO()
+
+        digest = spool(multipart_body(data, fields=[('note', 'x')]), destination, size=size)
+
+        assert destination.getvalue() == data
+        assert digest == hashlib.sha256(data).hexdigest()
+
+    def test_size_cap_stops_early(self):
+        """Test that parsing stops as soon as the file exceeds the cap"""
+        destination = io.BytesIO()
+        consumed = []
+
+        async def stream():
+            body = multipart_body(b'x' * 50000)
+            for start in range(0, len(body), 1024):
+                consumed.append(start)
+                yield body[start:start + 1024]
+
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(spool_multipart(CONTENT_TYPE, stream(), destination, max_bytes=2048))
+        assert len(destination.getvalue()) <= 2048
+        assert len(consumed) < 5
+
+    def test_body_cap_without_file(self):
+        """Test that other fields cannot stream an unbounded body"""
+        body = multipart_body(b'x', fields=[('note', 'y' * (MULTIPART_OVERHEAD_BYTES + 4096))])
+
+        with pytest.raises(UploadTooLarge):
+            spool(body, max_bytes=1024)
+
+    def test_exactly_at_cap(self):
+        """Test that a file of exactly max_bytes is accepted"""
+        digest = spool(multipart_body(b'x' * 2048), max_bytes=2048)
+
+        assert digest == hashlib.sha256(b'x' * 2048).hexdigest()
+
+    def test_empty_upload(self):
+        """Test that an empty file is rejected"""
+        with pytest.raises(EmptyUpload):
+            spool(multipart_body(b''))
+
+    @pytest.mark.parametrize('body,content_type', [
+        (multipart_body(b'abc', field='other'), CONTENT_TYPE),
+        (b'url=x', 'application/x-www-form-urlencoded'),
+        (multipart_body(b'abc'), 'multipart/form-data'),
+    ])
+    def test_missing_file(self, body, content_type):
+        """Test that a body without the file field is rejected"""
+        with pytest.raises(MissingUpload):
+            spool(body, content_type=content_type)
+
+    def test_truncated_body(self):
+        """Test that a body cut off before the closing boundary is rejected"""
+        body = multipart_body(os.urandom(5000))
+
+        with pytest.raises(MalformedUpload):
+            spool(body[:3000])
+
+    def test_source_id_is_distinct_from_videos(self):
+        """Test that upload identifiers cannot collide with video IDs"""
+        assert upload_source_id('ab' * 32).startswith('upload:sha256:')
+
+
+def tone_wav(frequency=440.0, seconds=2.0):
+    """WAV bytes of a pure tone at the analysis rate"""
+    import soundfile
+    from pipeline import ANALYSIS_SAMPLE_RATE
+
+    t = np.arange(int(ANALYSIS_SAMPLE_RATE * seconds)) / ANALYSIS_SAMPLE_RATE
+    buffer = io.BytesIO()
+    soundfile.write(buffer, 0.5 * np.sin(2 * np.pi * frequency * t), ANALYSIS_SAMPLE_RATE, format='WAV')
+    return buffer.getvalue()
+
+
+class TestUploadEndpoint:
+    """Test suite for /api/extract-pitch-file"""
+
+    @pytest.fixture
+    def client(self, app_client):
+        """Create a test client that decodes uploads with librosa"""
+        import main
+
+        decodes = []
+
+        async def fake_decode(source):
+            import librosa
+
+            decodes.append(source.location)
+            y, _ = librosa.load(source.location, sr=main.ANALYSIS_SAMPLE_RATE)
+            return y
+
+        client = app_client(decode_audio=fake_decode)
+        client.decodes = decodes
+        return client
+
+    URL = '/api/extract-pitch-file?resample_interval=0.1'
+
+    def upload(self, client, data, name='take1.wav', url=None):
+        return client.post(url or self.URL, files={'file': (name, data, 'audio/wav')})
+
+    def test_same_shape_as_extract_pitch(self, client):
+        """Test that the JSON body matches the YouTube endpoint's"""
+        data = tone_wav()
+        response = self.upload(client, data)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert set(body) == {'status', 'pitch_data', 'duration', 'sample_rate',
+                             'resample_interval', 'resample_mode', 'engine'}
+        assert body['duration'] == pytest.approx(2.0)
+        assert np.median([p['frequency'] for p in body['pitch_data']]) == pytest.approx(440.0, rel=0.01)
+        assert response.headers['etag']
+        assert response.headers['x-upload-id'] == hashlib.sha256(data).hexdigest()
+
+    def test_cached_by_content_hash(self, client):
+        """Test that re-uploading the same bytes under another name skips decoding"""
+        data = tone_wav()
+        first = self.upload(client, data)
+        second = self.upload(client, data, name='copy.wav')
+        other = self.upload(client, tone_wav(330.0))
+
+        assert second.json() == first.json()
+        assert second.headers['etag'] == first.headers['etag']
+        assert other.headers['etag'] != first.headers['etag']
+        assert len(client.decodes) == 2
+
+    def test_new_interval_reuses_analysis(self, client):
+        """Test that another resample_interval does not decode again"""
+        data = tone_wav()
+        self.upload(client, data)
+
+        response = self.upload(client, data, url='/api/extract-pitch-file?resample_interval=0.5')
+
+        assert response.json()['resample_interval'] == 0.5
+        assert len(client.decodes) == 1
+
+    def test_binary_format(self, client):
+        """Test that format negotiation works as for YouTube extraction"""
+        response = self.upload(client, tone_wav(), url=self.URL + '&format=binary')
+
+        assert response.headers['content-type'] == 'application/octet-stream'
+        assert response.content[:4] == b'PTCH'
+
+    def test_too_large(self, client, monkeypatch):
+        """Test that uploads above the cap are rejected"""
+        import main
+
+        monkeypatch.setattr(main, 'max_upload_bytes', 1024)
+        response = self.upload(client, tone_wav())
+
+        assert response.status_code == 413
+        assert client.decodes == []
+
+    def test_too_large_chunked(self, client, monkeypatch):
+        """Test that the cap holds for chunked requests without a Content-Length"""
+        import main
+
+        monkeypatch.setattr(main, 'max_upload_bytes', 1024)
+        body = multipart_body(tone_wav())
+
+        def chunks():
+            for start in range(0, len(body), 4096):
+                yield body[start:start + 4096]
+
+        response = client.post(self.URL, content=chunks(), headers={'Content-Type': CONTENT_TYPE})
+
+        assert response.status_code == 413
+        assert client.decodes == []
+
+    def test_chunked_upload(self, client):
+        """Test that a chunked upload is analyzed like a sized one"""
+        data = tone_wav()
+        body = multipart_body(data)
+
+        def chunks():
+            for start in range(0, len(body), 4096):
+                yield body[start:start + 4096]
+
+        response = client.post(self.URL, content=chunks(), headers={'Content-Type': CONTENT_TYPE})
+
+        assert response.status_code == 200
+        assert response.headers['x-upload-id'] == hashlib.sha256(data).hexdigest()
+
+    def test_empty_file(self, client):
+        """Test that an empty upload is a client error"""
+        assert self.upload(client, b'').status_code == 400
+
+    def test_missing_file_field(self, client):
+        """Test that a form without the file is rejected"""
+        response = client.post(self.URL, data={'other': 'x'})
+
+        assert response.status_code == 422
+
+    def test_undecodable_file(self, client, monkeypatch):
+        """Test that ffmpeg decode failures are reported as 400"""
+        import main
+        from audio_source import AudioDecodeError
+
+        async def failing_decode(source):
+            raise AudioDecodeError('ffmpeg failed to decode audio: Invalid data found')
+
+        monkeypatch.setattr(main, 'decode_audio', failing_decode)
+        response = self.upload(client, b'not audio')
+
+        assert response.status_code == 400
+        assert 'Invalid data' in response.json()['detail']
@@ -0,0 +1,88 @@
+import pytest
+import sys
+import os
+import asyncio
+import time
+
+# Add backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workers import WorkerPools, limit_worker_threads, pools_from_env
+
+
+class TestWorkerPools:
+    """Test suite for the CPU process pool and I/O thread pool"""
+
+    @pytest.fixture
+    def pools(self):
+        """Create small pools and shut them down afterwards"""
+        pools = WorkerPools(cpu_workers=2, io_workers=2)
+        yield pools
+        pools.shutdown()
+
+    def test_cpu_work_runs_in_another_process(self, pools):
+        """Test that CPU work is executed outside the server process"""
+        pid = asyncio.run(pools.run_cpu(os.getpid))
+        assert pid != os.getpid()
+
+    def test_worker_thread_limits_applied(self, pools):
+        """Test that worker processes cap native thread pools"""
+        value = asyncio.run(pools.run_cpu(os.getenv, 'OMP_NUM_THREADS'))
+        assert value == '1'
+
+    def test_io_work_runs_on_thread(self, pools):
+        """Test that I/O work runs on the bounded download pool"""
+        import threading
+
+        name = asyncio.run(pools.run_io(lambda: threading.current_thread().name))
+        assert name.startswith('pitch-io')
+
+    def test_event_loop_stays_responsive(self, pools):
+        """Test that blocking work does not stall other coroutines"""
+        async def scenario():
+            blocking = asyncio.ensure_future(pools.run_io(time.sleep, 0.3))
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            await asyncio.sleep(0)
+            latency = time.perf_counter() - start
+            await blocking
+            return latency
+
+        assert asyncio.run(scenario()) < 0.05
+
+    def test_shutdown_recreates_pools(self, pools):
+        """Test that pools are recreated lazily after shutdown"""
+        first = pools.io
+        pools.shutdown()
+        assert pools.io is not first
+
+
+class TestWorkerConfiguration:
+    """Test suite for worker pool configuration"""
+
+    def test_defaults_to_core_count(self):
+        """Test that the process pool is sized per core by default"""
+        assert WorkerPools().cpu_workers == (os.cpu_count() or 1)
+
+    def test_pools_from_env(self, monkeypatch):
+        """Test environment overrides"""
+        monkeypatch.setenv('PITCH_CPU_WORKERS', '3')
+        monkeypatch.setenv('PITCH_IO_WORKERS', '5')
+        monkeypatch.setenv('PITCH_THREADS_PER_WORKER', '2')
+
+        pools = pools_from_env()
+
+        assert pools.cpu_workers == 3
+        assert pools.io_workers == 5
+        assert pools.threads_per_worker == 2
+
+    def test_limit_worker_threads_sets_env(self, monkeypatch):
+        """Test that the initializer exports thread limits"""
+        for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+            monkeypatch.delenv(name, raising=False)
+
+        limit_worker_threads(2)
+
+        assert os.environ['OMP_NUM_THREADS'] == '2'
+        assert os.environ['OPENBLAS_NUM_THREADS'] == '2'
+        assert os.environ['MKL_NUM_THREADS'] == '2'
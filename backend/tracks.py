@@ -0,0 +1,129 @@
+"""
+Time-window queries over stored per-track contours.
+
+A TrackIndex wraps a track's smoothed analysis contour with a SeekIndex: the
+position of the first point of every whole second. Locating a time is one
+array lookup plus a binary search within that second, so a window is found
+in O(log n) and sliced without copying, and the work and response size of a
+query grow with the window rather than with the song.
+
+Windows can also be resampled: the targets are the window's part of the
+global grid of resample_pitch_contour, evaluated from the window's
+neighbourhood only, so they equal the full result restricted to the window.
+"""
+from typing import Optional
+
+import numpy as np
+
+from contour import PitchContour
+from resampling import RESAMPLE_MODES, estimate_frame_period, resample_at_targets
+from uploads import upload_source_id
+
+# Seek index granularity in seconds
+SEEK_INDEX_STEP = 1.0
+
+
+class SeekIndex:
+    """
+    Offsets of the first point at or after every multiple of step.
+
+    Args:
+        times: Sorted point times
+        step: Bucket width in seconds
+    """
+
+    def __init__(self, times: np.ndarray, step: float = SEEK_INDEX_STEP):
+        self.times = times
+        self.step = step
+        n_buckets = int(np.ceil(times[-1] / step)) + 1 if len(times) else 1
+        self.offsets = np.searchsorted(times, np.arange(n_buckets + 1) * step, side='left')
+
+    def locate(self, time: float) -> int:
+        """Index of the first point at or after time, like np.searchsorted(times, time)."""
+        bucket = min(max(int(np.floor(time / self.step)), 0), len(self.offsets) - 2)
+        lo, hi = int(self.offsets[bucket]), int(self.offsets[bucket + 1])
+        return lo + int(np.searchsorted(self.times[lo:hi], time, side='left'))
+
+
+class TrackIndex:
+    """
+    A track's analysis contour, indexed for window queries.
+
+    Args:
+        contour: Smoothed analysis contour of the track
+    """
+
+    def __init__(self, contour: PitchContour):
+        self.contour = contour
+        self.seek = SeekIndex(contour.times)
+        # Whole-contour hop, so windowed aggregates see the same voiced ratio
+        self.frame_period = estimate_frame_period(contour.times)
+
+    def window(self, start: float, end: float) -> PitchContour:
+        """Analysis points with start <= time < end (a view)."""
+        return self.contour[self.seek.locate(start):self.seek.locate(end)]
+
+    def resampled_window(
+        self,
+        start: float,
+        end: float,
+        interval: float,
+        mode: str = 'nearest',
+    ) -> PitchContour:
+        """
+        Points of resample_pitch_contour(contour, interval, mode) with
+        start <= time < end.
+
+        Raises:
+            ValueError: If interval is not positive or mode is unknown
+        """
+        if interval <= 0:
+            raise ValueError("interval must be a positive number")
+        if mode not in RESAMPLE_MODES:
+            raise ValueError(f"unknown resample mode '{mode}', expected one of {', '.join(RESAMPLE_MODES)}")
+
+        contour = self.contour
+        if len(contour) == 0:
+            return contour
+        first_time, last_time = float(contour.times[0]), float(contour.times[-1])
+        if len(contour) == 1 or last_time - first_time < interval:
+            # resample_contour keeps just the first point
+            return contour[:1].window(start, end)
+
+        targets = self._grid(first_time, last_time, interval, start, end)
+        if len(targets) == 0:
+            return PitchContour.empty()
+
+        # One point beyond an interval on either side covers every target's
+        # neighbours and aggregation bin
+        lo = max(self.seek.locate(targets[0] - interval) - 1, 0)
+        hi = min(self.seek.locate(targets[-1] + interval) + 1, len(contour))
+        resampled = resample_at_targets(contour[lo:hi], targets, interval, mode, self.frame_period)
+        # Bounds apply to the stored (float32) times, as in PitchContour.window
+        return resampled.window(start, end)
+
+    @staticmethod
+    def _grid(first_time: float, last_time: float, interval: float,
+              start: float, end: float) -> np.ndarray:
+        # Same values as np.arange(first_time + interval, last_time, interval)
+        # (resampling.target_times), for the indices around [start, end)
+        origin = first_time + interval
+        step = (origin + interval) - origin
+        count = int(np.ceil((last_time - origin) / interval))
+        lo = min(max(int(np.floor((start - origin) / step)) - 1, 0), count)
+        hi = min(max(int(np.ceil((end - origin) / step)) + 1, 0), count)
+        return origin + np.arange(lo, hi) * step
+
+
+def parse_track_id(track_id: str) -> Optional[str]:
+    """
+    Source identifier of a track ID, or None if it is malformed.
+
+    Track IDs are YouTube video IDs (11 characters) or the X-Upload-Id
+    (SHA-256 hex) of an uploaded file.
+    """
+    if len(track_id) == 64 and all(c in '0123456789abcdef' for c in track_id):
+        return upload_source_id(track_id)
+    if len(track_id) == 11 and all(c.isascii() and (c.isalnum() or c in '-_') for c in track_id):
+        return f'youtube:{track_id}'
+    return None
@@ -0,0 +1,183 @@
+"""
+Ingest of uploaded audio files.
+
+The multipart/form-data request body is parsed as it arrives and the file
+part is written in the same pass into a file that ffmpeg can seek
+(containers such as MP4/M4A keep their index at the end, so they cannot be
+decoded from a pipe), hashing the bytes on the way so identical recordings
+share one cache entry whatever their file name. Nothing else is buffered,
+and the copy stops as soon as the size cap is exceeded, whether or not the
+client sent a Content-Length.
+"""
+import asyncio
+import hashlib
+import os
+from typing import AsyncIterable, BinaryIO, Dict, List
+
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+DEFAULT_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# Allowance for multipart boundaries, part headers and other fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Form field carrying the audio file
+UPLOAD_FIELD = 'file'
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the configured size cap."""
+
+
+class EmptyUpload(ValueError):
+    """The upload contains no data."""
+
+
+class MissingUpload(ValueError):
+    """The request is not a multipart form with a file in the expected field."""
+
+
+class MalformedUpload(ValueError):
+    """The multipart body is invalid or ends early."""
+
+
+def max_upload_bytes_from_env() -> int:
+    """Upload size cap from PITCH_UPLOAD_MAX_MB (default 100 MB)."""
+    megabytes = os.getenv('PITCH_UPLOAD_MAX_MB')
+    if megabytes is None:
+        return DEFAULT_MAX_UPLOAD_BYTES
+    return int(float(megabytes) * 1024 * 1024)
+
+
+def upload_source_id(digest: str) -> str:
+    """Cache identifier of uploaded audio, the counterpart of normalize_video_id."""
+    return f'upload:sha256:{digest}'
+
+
+class _FilePart:
+    """MultipartParser callbacks that collect the data of one file field."""
+
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field.encode()
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.found = False
+        self.ended = False
+        # File data parsed from the latest body chunk, not yet written
+        self.pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._name = b''
+        self._value = b''
+        self._in_file = False
+
+    def callbacks(self) -> Dict:
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+            'on_part_data': self.on_part_data,
+            'on_part_end': self.on_part_end,
+            'on_end': self.on_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._name.lower()] = self._value
+        self._name = self._value = b''
+
+    def on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._headers.get(b'content-disposition', b''))
+        # Only the first file sent under the field is kept
+        self._in_file = (
+            not self.found and params.get(b'name') == self.field and b'filename' in params
+        )
+        self.found = self.found or self._in_file
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_file:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit")
+        chunk = data[start:end]
+        self.digest.update(chunk)
+        self.pending.append(chunk)
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+    def on_end(self) -> None:
+        self.ended = True
+
+
+async def spool_multipart(
+    content_type: str,
+    body: AsyncIterable[bytes],
+    destination: BinaryIO,
+    max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+    field: str = UPLOAD_FIELD,
+) -> str:
+    """
+    Copy the file in one field of a multipart/form-data body into destination.
+
+    Args:
+        content_type: Content-Type header of the request (with the boundary)
+        body: The request body as it arrives (Request.stream())
+        destination: Binary file receiving the file's data
+        max_bytes: Largest accepted file
+        field: Form field of the file
+
+    Returns:
+        Hex SHA-256 digest of the file
+
+    Raises:
+        UploadTooLarge: As soon as the file exceeds max_bytes, or the whole
+                        body max_bytes + MULTIPART_OVERHEAD_BYTES
+        MissingUpload: If the body is not multipart or has no file in field
+        MalformedUpload: If the multipart body is invalid or incomplete
+        EmptyUpload: If the file is empty
+    """
+    media_type, params = parse_options_header(content_type)
+    boundary = params.get(b'boundary')
+    if media_type != b'multipart/form-data' or not boundary:
+        raise MissingUpload(f"expected a multipart/form-data body with a '{field}' file")
+
+    part = _FilePart(field, max_bytes)
+    try:
+        parser = MultipartParser(boundary, part.callbacks())
+    except ValueError as e:
+        raise MalformedUpload(str(e))
+
+    received = 0
+    async for chunk in body:
+        received += len(chunk)
+        if received > max_bytes + MULTIPART_OVERHEAD_BYTES:
+            raise UploadTooLarge(f"upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+        try:
+            parser.write(chunk)
+        except MultipartParseError as e:
+            raise MalformedUpload(f"invalid multipart body: {e}")
+        if part.pending:
+            data = b''.join(part.pending)
+            part.pending.clear()
+            # Disk writes are blocking; keep them off the event loop
+            await asyncio.to_thread(destination.write, data)
+
+    if not part.found:
+        raise MissingUpload(f"expected a multipart/form-data body with a '{field}' file")
+    if not part.ended:
+        raise MalformedUpload("multipart body ended early")
+    if part.size == 0:
+        raise EmptyUpload("uploaded file is empty")
+
+    await asyncio.to_thread(destination.flush)
+    return part.digest.hexdigest()
@@ -0,0 +1,137 @@
+"""
+Executor pools that keep blocking work off the asyncio event loop.
+
+Downloads are I/O bound and run on a small bounded thread pool. Decoding and
+pitch tracking are CPU bound and run in a process pool sized to the machine,
+so N concurrent extractions use N cores while the event loop stays free to
+answer health checks and cache hits.
+
+Each worker process limits its BLAS/OpenMP/FFT thread pools (one thread by
+default) so that N workers do not oversubscribe the CPU with N x cores
+threads.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+# Environment variables honoured by the native thread pools numpy, scipy,
+# librosa (numba) and friends may load inside a worker
+THREAD_LIMIT_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'NUMBA_NUM_THREADS',
+)
+
+
+def limit_worker_threads(threads_per_worker: int) -> None:
+    """
+    Process pool initializer capping native thread pools in a worker.
+
+    Environment variables cover libraries that are imported after the worker
+    starts; threadpoolctl (when installed) additionally caps pools of
+    libraries that were already loaded.
+    """
+    for name in THREAD_LIMIT_ENV_VARS:
+        os.environ[name] = str(threads_per_worker)
+
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=threads_per_worker)
+
+
+class WorkerPools:
+    """
+    Lazily created CPU process pool and I/O thread pool.
+
+    Args:
+        cpu_workers: Number of worker processes (default: one per core)
+        io_workers: Number of download threads
+        threads_per_worker: Native BLAS/FFT threads allowed per worker process
+        start_method: multiprocessing start method for the process pool
+    """
+
+    def __init__(
+        self,
+        cpu_workers: Optional[int] = None,
+        io_workers: int = 4,
+        threads_per_worker: int = 1,
+        start_method: str = 'spawn',
+    ):
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.io_workers = io_workers
+        self.threads_per_worker = threads_per_worker
+        self.start_method = start_method
+
+        self._cpu: Optional[Executor] = None
+        self._io: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cpu(self) -> Executor:
+        """Process pool for decoding and pitch analysis."""
+        with self._lock:
+            if self._cpu is None:
+                self._cpu = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=limit_worker_threads,
+                    initargs=(self.threads_per_worker,),
+                )
+            return self._cpu
+
+    @property
+    def io(self) -> Executor:
+        """Bounded thread pool for network lookups and downloads."""
+        with self._lock:
+            if self._io is None:
+                self._io = ThreadPoolExecutor(
+                    max_workers=self.io_workers,
+                    thread_name_prefix='pitch-io',
+                )
+            return self._io
+
+    async def run_cpu(self, func: Callable, *args: Any) -> Any:
+        """Run a picklable function in the process pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu, func, *args)
+
+    async def run_io(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking I/O function on the download thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io, func, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down both pools; they are recreated on next use."""
+        with self._lock:
+            cpu, io = self._cpu, self._io
+            self._cpu = self._io = None
+        if cpu is not None:
+            cpu.shutdown(wait=wait, cancel_futures=True)
+        if io is not None:
+            io.shutdown(wait=wait, cancel_futures=True)
+
+
+def pools_from_env() -> WorkerPools:
+    """
+    Build the application pools from environment variables.
+
+    PITCH_CPU_WORKERS (default: core count), PITCH_IO_WORKERS (default 4),
+    PITCH_THREADS_PER_WORKER (default 1) and PITCH_WORKER_START_METHOD
+    (default 'spawn') override the defaults.
+    """
+    cpu_workers = int(os.getenv('PITCH_CPU_WORKERS', '0')) or None
+    return WorkerPools(
+        cpu_workers=cpu_workers,
+        io_workers=int(os.getenv('PITCH_IO_WORKERS', '4')),
+        threads_per_worker=int(os.getenv('PITCH_THREADS_PER_WORKER', '1')),
+        start_method=os.getenv('PITCH_WORKER_START_METHOD', 'spawn'),
+    )
@@ -203,6 +203,17 @@ class PlaybackController {
         this.noteSequence = noteBlocks;
     }
     
+    /**
+     * Load note events segmented by the backend (/tracks/{id}/notes)
+     */
+    loadNoteEvents(notes) {
+        this.noteSequence = notes.map(event => ({
+            note: event.note,
+            startTime: event.onset,
+            duration: event.offset - event.onset
+        }));
+    }
+    
     /**
      * Start or resume playback
      */
@@ -369,9 +380,19 @@ class PitchMatcher {
     constructor() {
         // API configuration
         this.apiUrl = 'http://localhost:8000/api';
+        this.jobPollInterval = 1000; // ms between extraction job status polls
+        this.resultFormat = 'binary'; // extraction result encoding: 'binary', 'compact' or 'json'
+        this.streamExtraction = true; // draw the contour progressively from /extract-pitch/stream
         
         // App state
         this.targetPitchData = [];
+        this.targetPyramid = null; // finer contour levels for zooming, from /extract-pitch/pyramid
+        this.targetTrackId = null; // YouTube video ID or X-Upload-Id, for /tracks/{id}/pitch
+        this.targetWindow = null; // full-resolution contour around the visible range
+        this.targetNotes = null; // note events of the target, from /tracks/{id}/notes
+        this.windowFetchTimer = null;
+        this.windowFetchDelay = 150; // ms after the last zoom/pan before fetching a window
+        this.windowMinZoom = 4; // below this zoom the pyramid levels are detailed enough
         this.userPitchData = [];
         this.isRecording = false;
         this.audioContext = null;
@@ -431,6 +452,9 @@ class PitchMatcher {
         // UI elements
         this.youtubeUrlInput = document.getElementById('youtubeUrl');
         this.processBtn = document.getElementById('processBtn');
+        this.audioFileInput = document.getElementById('audioFile');
+        this.uploadBtn = document.getElementById('uploadBtn');
+        this.midiBtn = document.getElementById('midiBtn');
         this.startBtn = document.getElementById('startBtn');
         this.stopBtn = document.getElementById('stopBtn');
         this.zoomInBtn = document.getElementById('zoomInBtn');
@@ -479,6 +503,11 @@ class PitchMatcher {
     
     bindEvents() {
         this.processBtn.addEventListener('click', () => this.processYouTubeUrl());
+        this.uploadBtn.addEventListener('click', () => this.audioFileInput.click());
+        if (this.midiBtn) {
+            this.midiBtn.addEventListener('click', () => this.downloadMidi());
+        }
+        this.audioFileInput.addEventListener('change', () => this.processAudioFile());
         this.startBtn.addEventListener('click', () => this.startMicrophone());
         this.stopBtn.addEventListener('click', () => this.stopMicrophone());
         
@@ -570,8 +599,12 @@ class PitchMatcher {
             return;
         }
         
-        // Load notes into playback controller
-        this.playbackController.loadNotes(notesToPlay, (freq) => this.frequencyToNote(freq));
+        // Load notes into playback controller; the target has server-side note events
+        if (notesToPlay === this.targetPitchData && this.targetNotes) {
+            this.playbackController.loadNoteEvents(this.targetNotes);
+        } else {
+            this.playbackController.loadNotes(notesToPlay, (freq) => this.frequencyToNote(freq));
+        }
         
         // Set speed and volume
         this.playbackController.setSpeed(parseFloat(this.speedSelect.value));
@@ -719,6 +752,7 @@ class PitchMatcher {
     handleMouseUp(e) {
         this.viewState.isDragging = false;
         this.canvas.style.cursor = 'grab';
+        this.scheduleWindowFetch();
     }
     
     handleMouseLeave(e) {
@@ -765,6 +799,7 @@ class PitchMatcher {
     handleMouseUpNotes(e) {
         this.viewState.isDragging = false;
         this.notesCanvas.style.cursor = 'grab';
+        this.scheduleWindowFetch();
     }
     
     handleMouseLeaveNotes(e) {
@@ -798,6 +833,7 @@ class PitchMatcher {
     
     updateZoomDisplay() {
         this.zoomLevelSpan.textContent = `${Math.round(this.viewState.zoom * 100)}%`;
+        this.scheduleWindowFetch();
     }
     
     updateTooltip(mouseX, mouseY) {
@@ -931,43 +967,446 @@ class PitchMatcher {
         this.processBtn.disabled = true;
         
         try {
-            const response = await fetch(`${this.apiUrl}/extract-pitch`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ url: url }),
-            });
+            this.targetPitchData = [];
+            this.targetPyramid = null;
+            this.targetTrackId = this.youtubeVideoId(url);
+            this.targetWindow = null;
+            this.targetNotes = null;
+            this.resetView();
             
-            if (!response.ok) {
-                throw new Error('Failed to process YouTube URL');
-            }
+            const data = this.streamExtraction
+                ? await this.runStreamingExtraction(url)
+                : await this.runExtractionJob(url);
             
-            const data = await response.json();
+            this.applyPitchResult(data);
+            this.loadTargetNotes().catch(error => console.warn('Note events unavailable:', error));
+            // The analysis is cached now, so the pyramid is cheap; zooming works without it
+            this.loadPitchPyramid(url).catch(error => console.warn('Pitch pyramid unavailable:', error));
             
-            if (data.status === 'success') {
-                this.targetPitchData = data.pitch_data;
-                this.showStatus(`Successfully extracted pitch data! Duration: ${data.duration.toFixed(1)}s`, 'success');
-                this.startBtn.disabled = false;
-                
-                // Enable playback controls
-                if (this.playBtn) {
-                    this.playBtn.disabled = false;
-                }
-                
-                this.resetView();
+        } catch (error) {
+            console.error('Error processing YouTube URL:', error);
+            this.showStatus(`Error: ${error.message}`, 'error');
+        } finally {
+            this.processBtn.disabled = false;
+        }
+    }
+    
+    /**
+     * Extract the pitch of a local recording via /extract-pitch-file.
+     * The result has the same shape as YouTube extraction.
+     */
+    async processAudioFile() {
+        const file = this.audioFileInput.files[0];
+        if (!file) {
+            return;
+        }
+        
+        this.showStatus(`Processing ${file.name}... This may take a moment.`, 'loading');
+        this.uploadBtn.disabled = true;
+        
+        try {
+            const binary = this.resultFormat === 'binary';
+            const formatQuery = binary ? '' : `?format=${this.resultFormat}`;
+            const form = new FormData();
+            form.append('file', file);
+            
+            const response = await fetch(`${this.apiUrl}/extract-pitch-file${formatQuery}`, {
+                method: 'POST',
+                headers: binary ? { 'Accept': 'application/octet-stream, application/json;q=0.9' } : {},
+                body: form,
+            });
+            this.targetPyramid = null;
+            this.targetTrackId = response.headers.get('X-Upload-Id');
+            this.targetWindow = null;
+            this.targetNotes = null;
+            
+            if (response.headers.get('Content-Type') === 'application/octet-stream') {
+                this.applyPitchResult(this.decodePitchBinary(await response.arrayBuffer()));
             } else {
-                throw new Error(data.detail || 'Unknown error occurred');
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.detail || 'Failed to process audio file');
+                }
+                this.applyPitchResult(this.normalizePitchResult(data));
             }
+            this.loadTargetNotes().catch(error => console.warn('Note events unavailable:', error));
             
         } catch (error) {
-            console.error('Error processing YouTube URL:', error);
+            console.error('Error processing audio file:', error);
             this.showStatus(`Error: ${error.message}`, 'error');
         } finally {
-            this.processBtn.disabled = false;
+            this.uploadBtn.disabled = false;
+            // Allow picking the same file again
+            this.audioFileInput.value = '';
         }
     }
     
+    /**
+     * Show a successful extraction result as the target curve.
+     */
+    applyPitchResult(data) {
+        if (data.status !== 'success') {
+            throw new Error(data.detail || 'Unknown error occurred');
+        }
+        
+        this.targetPitchData = data.pitch_data;
+        this.showStatus(`Successfully extracted pitch data! Duration: ${data.duration.toFixed(1)}s`, 'success');
+        this.startBtn.disabled = false;
+        
+        // Enable playback controls
+        if (this.playBtn) {
+            this.playBtn.disabled = false;
+        }
+        if (this.midiBtn) {
+            this.midiBtn.disabled = !this.targetTrackId;
+        }
+        
+        this.resetView();
+    }
+    
+    /**
+     * Fetch every resolution level of the target contour, so zooming in can
+     * draw finer detail without another extraction.
+     */
+    async loadPitchPyramid(url) {
+        const query = new URLSearchParams({ url: url, format: 'compact' });
+        const response = await fetch(`${this.apiUrl}/extract-pitch/pyramid?${query}`);
+        const data = await response.json();
+        if (!response.ok || data.status !== 'success') {
+            throw new Error(data.detail || 'Failed to load pitch pyramid');
+        }
+        
+        this.targetPyramid = data.levels.map(level => ({
+            interval: level.resample_interval,
+            pitchData: this.normalizePitchResult(level).pitch_data,
+        }));
+        this.draw();
+    }
+    
+    /**
+     * Download the target's note events as a Standard MIDI File.
+     */
+    downloadMidi() {
+        if (!this.targetTrackId) {
+            return;
+        }
+        const link = document.createElement('a');
+        link.href = `${this.apiUrl}/tracks/${encodeURIComponent(this.targetTrackId)}/midi`;
+        link.download = `${this.targetTrackId}.mid`;
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+    }
+    
+    /**
+     * Fetch the target's note events for playback; without them playback
+     * falls back to converting every contour point.
+     */
+    async loadTargetNotes() {
+        const trackId = this.targetTrackId;
+        if (!trackId) {
+            return;
+        }
+        
+        const response = await fetch(`${this.apiUrl}/tracks/${encodeURIComponent(trackId)}/notes`);
+        const data = await response.json();
+        if (!response.ok || data.status !== 'success') {
+            throw new Error(data.detail || 'Failed to load note events');
+        }
+        if (trackId === this.targetTrackId) {
+            this.targetNotes = data.notes;
+        }
+    }
+    
+    /**
+     * The 11-character video ID of a YouTube URL, or null.
+     */
+    youtubeVideoId(url) {
+        const match = url.match(/(?:v=|youtu\.be\/|embed\/|shorts\/)([A-Za-z0-9_-]{11})/);
+        return match ? match[1] : null;
+    }
+    
+    /**
+     * Time range of the target contour currently on screen.
+     */
+    visibleTimeRange(width) {
+        const data = this.targetPitchData;
+        const minTime = data[0].time;
+        const timeRange = (data[data.length - 1].time - minTime) || 1;
+        const toTime = x => minTime + (x / width) * timeRange;
+        return {
+            start: toTime(-this.viewState.offsetX / this.viewState.zoom),
+            end: toTime((width - this.viewState.offsetX) / this.viewState.zoom),
+        };
+    }
+    
+    /**
+     * Fetch the visible window once zooming or panning has settled.
+     */
+    scheduleWindowFetch() {
+        clearTimeout(this.windowFetchTimer);
+        this.windowFetchTimer = setTimeout(() => {
+            this.loadVisibleWindow().catch(error => console.warn('Pitch window unavailable:', error));
+        }, this.windowFetchDelay);
+    }
+    
+    /**
+     * When zoomed in far, fetch every analysis frame around the visible
+     * range from /tracks/{id}/pitch; the response only covers the window,
+     * so it stays small however long the track is.
+     */
+    async loadVisibleWindow() {
+        if (!this.targetTrackId || this.targetPitchData.length < 2 ||
+            this.viewState.zoom < this.windowMinZoom) {
+            return;
+        }
+        
+        const visible = this.visibleTimeRange(this.canvas.offsetWidth);
+        const window = this.targetWindow;
+        if (window && window.trackId === this.targetTrackId &&
+            window.start <= visible.start && window.end >= visible.end) {
+            return;
+        }
+        
+        // Pad by half a screen on each side so short pans need no request
+        const pad = (visible.end - visible.start) / 2;
+        const start = Math.max(visible.start - pad, 0);
+        const end = visible.end + pad;
+        const trackId = this.targetTrackId;
+        const query = new URLSearchParams({ start: start, end: end });
+        const response = await fetch(`${this.apiUrl}/tracks/${encodeURIComponent(trackId)}/pitch?${query}`);
+        const data = await response.json();
+        if (!response.ok || data.status !== 'success') {
+            throw new Error(data.detail || 'Failed to load pitch window');
+        }
+        if (trackId !== this.targetTrackId) {
+            return;
+        }
+        
+        this.targetWindow = { trackId: trackId, start: data.start, end: data.end, pitchData: data.pitch_data };
+        this.draw();
+    }
+    
+    /**
+     * The target contour to draw at the current zoom: the fetched
+     * full-resolution window when it covers the view, otherwise the
+     * coarsest pyramid level that still gives a point every few pixels,
+     * but never coarser than the extracted result.
+     */
+    targetDisplayData(width) {
+        const data = this.targetPitchData;
+        if (data.length < 2) {
+            return data;
+        }
+        
+        const window = this.targetWindow;
+        if (window && window.trackId === this.targetTrackId &&
+            this.viewState.zoom >= this.windowMinZoom) {
+            const visible = this.visibleTimeRange(width);
+            if (window.start <= visible.start && window.end >= visible.end) {
+                return window.pitchData;
+            }
+        }
+        if (!this.targetPyramid) {
+            return data;
+        }
+        
+        const duration = data[data.length - 1].time - data[0].time;
+        const secondsPerPixel = duration / (width * this.viewState.zoom);
+        const baseInterval = duration / (data.length - 1);
+        const targetInterval = Math.min(secondsPerPixel * 3, baseInterval);
+        
+        let best = null;
+        for (const level of this.targetPyramid) {
+            if (level.interval <= targetInterval + 1e-9) {
+                best = level;
+            }
+        }
+        if (!best || best.interval >= baseInterval - 1e-9) {
+            return data;
+        }
+        return best.pitchData;
+    }
+    
+    /**
+     * Read the NDJSON extraction stream, drawing each chunk as it arrives
+     * so the curve starts appearing after the first block of audio.
+     * Resolves with the same shape as the other extraction results.
+     */
+    async runStreamingExtraction(url) {
+        const response = await fetch(`${this.apiUrl}/extract-pitch/stream?format=ndjson`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ url: url }),
+        });
+        
+        if (!response.ok || !response.body) {
+            throw new Error('Failed to process YouTube URL');
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const pitchData = [];
+        let buffered = '';
+        let summary = null;
+        
+        const handleLine = (line) => {
+            if (!line.trim()) {
+                return;
+            }
+            const event = JSON.parse(line);
+            if (event.type === 'chunk') {
+                pitchData.push(...event.pitch_data);
+                this.targetPitchData = pitchData;
+                this.showStatus(`Extracting pitch... ${pitchData.length} points so far`, 'loading');
+                this.draw();
+            } else if (event.type === 'error') {
+                throw new Error(event.detail || 'Unknown error occurred');
+            } else if (event.type === 'done') {
+                summary = event;
+            }
+        };
+        
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffered + decoder.decode());
+        
+        if (!summary) {
+            throw new Error('Extraction stream ended unexpectedly');
+        }
+        
+        return { ...summary, pitch_data: pitchData };
+    }
+    
+    /**
+     * Submit an extraction job and poll until it finishes.
+     * Avoids holding one HTTP request open for the whole pipeline.
+     */
+    async runExtractionJob(url) {
+        const binary = this.resultFormat === 'binary';
+        // Binary bodies are negotiated via Accept; the JSON flavours by query
+        const formatQuery = binary ? '' : `?format=${this.resultFormat}`;
+        
+        const response = await fetch(`${this.apiUrl}/jobs${formatQuery}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ url: url }),
+        });
+        
+        if (!response.ok) {
+            throw new Error('Failed to process YouTube URL');
+        }
+        
+        let job = await response.json();
+        
+        while (job.status === 'pending' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, this.jobPollInterval));
+            
+            const poll = await fetch(`${this.apiUrl}/jobs/${job.job_id}${formatQuery}`, {
+                headers: binary ? { 'Accept': 'application/octet-stream, application/json;q=0.9' } : {},
+            });
+            if (!poll.ok) {
+                throw new Error('Lost track of extraction job');
+            }
+            if (poll.headers.get('Content-Type') === 'application/octet-stream') {
+                return this.decodePitchBinary(await poll.arrayBuffer());
+            }
+            job = await poll.json();
+        }
+        
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Unknown error occurred');
+        }
+        
+        return this.normalizePitchResult(job.result);
+    }
+    
+    /**
+     * Expand a compact (format=compact) result into pitch_data points.
+     * Slot i of the cents grid is at start + i * interval; unvoiced slots
+     * are skipped, as in the plain JSON result.
+     */
+    normalizePitchResult(result) {
+        if (result.encoding !== 'cents') {
+            return result;
+        }
+        
+        const pitchData = [];
+        result.cents.forEach((cents, i) => {
+            if (cents !== result.unvoiced) {
+                pitchData.push({
+                    time: result.start + i * result.interval,
+                    frequency: result.reference_frequency * Math.pow(2, cents / 1200),
+                });
+            }
+        });
+        
+        return { ...result, pitch_data: pitchData };
+    }
+    
+    /**
+     * Decode the binary contour format (see backend/encoding.py) into the
+     * same shape as the JSON extraction result.
+     */
+    decodePitchBinary(buffer) {
+        const HEADER_SIZE = 40;
+        const FLAG_REGULAR_GRID = 0x02;
+        
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'PTCH' || view.getUint8(4) !== 1) {
+            throw new Error('Unsupported pitch data format');
+        }
+        
+        const flags = view.getUint8(5);
+        const count = view.getUint32(8, true);
+        const sampleRate = view.getUint32(12, true);
+        const startTime = view.getFloat64(16, true);
+        const interval = view.getFloat64(24, true);
+        const duration = view.getFloat64(32, true);
+        
+        // Columns are little-endian float32; read through DataView so the
+        // decoder does not depend on the host byte order
+        const column = (index) => {
+            const values = new Float64Array(count);
+            const offset = HEADER_SIZE + index * count * 4;
+            for (let i = 0; i < count; i++) {
+                values[i] = view.getFloat32(offset + i * 4, true);
+            }
+            return values;
+        };
+        
+        const regular = (flags & FLAG_REGULAR_GRID) !== 0;
+        const times = regular ? null : column(0);
+        const frequencies = column(regular ? 0 : 1);
+        
+        const pitchData = new Array(count);
+        for (let i = 0; i < count; i++) {
+            const time = regular ? startTime + (i + 1) * interval : times[i];
+            pitchData[i] = { time: time, frequency: frequencies[i] };
+        }
+        
+        return {
+            status: 'success',
+            pitch_data: pitchData,
+            duration: duration,
+            sample_rate: sampleRate,
+            resample_interval: interval || null,
+        };
+    }
+    
     async startMicrophone() {
         try {
             // Create audio context
@@ -1142,9 +1581,13 @@ class PitchMatcher {
         // Draw grid
         this.drawGrid(width, height);
         
-        // Draw target pitch (from YouTube)
+        // Draw target pitch (from YouTube), finer as the view zooms in
         if (this.targetPitchData.length > 0) {
-            this.drawPitchCurve(this.targetPitchData, '#00ff88', width, height);
+            const timeBounds = {
+                minTime: Math.min(...this.targetPitchData.map(p => p.time)),
+                maxTime: Math.max(...this.targetPitchData.map(p => p.time)),
+            };
+            this.drawPitchCurve(this.targetDisplayData(width), '#00ff88', width, height, timeBounds);
         }
         
         // Draw user pitch (from microphone)
@@ -1264,7 +1707,7 @@ class PitchMatcher {
         }
     }
     
-    drawPitchCurve(pitchData, color, width, height) {
+    drawPitchCurve(pitchData, color, width, height, timeBounds = null) {
         if (pitchData.length < 2) return;
         
         this.ctx.strokeStyle = color;
@@ -1276,9 +1719,9 @@ class PitchMatcher {
         const minFreq = 50;
         const maxFreq = 1000;
         
-        // Normalize time to canvas width
-        const maxTime = Math.max(...pitchData.map(p => p.time));
-        const minTime = Math.min(...pitchData.map(p => p.time));
+        // Normalize time to canvas width (timeBounds keeps pyramid levels aligned)
+        const maxTime = timeBounds ? timeBounds.maxTime : Math.max(...pitchData.map(p => p.time));
+        const minTime = timeBounds ? timeBounds.minTime : Math.min(...pitchData.map(p => p.time));
         const timeRange = maxTime - minTime || 1;
         
         let firstPoint = true;